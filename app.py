@@ -1,43 +1,23 @@
 import streamlit as st
 from pathlib import Path
 import tempfile
-import shutil
 import time
+import uuid
 
+from core.result_store import ResultStore
+from io_utils.download_server import download_path
 from io_utils.text_extract import extract_text_any
-from pipeline.topic_extraction import get_topic_tree
-from pipeline.qna_generation import build_qna_json
-from pipeline.save_outputs import save_all_qna
-from io_utils.zipping import zip_dir
-from pipeline.tts_convert import txt_to_mp3_tree
-from config import OUTPUT_DIR
-
-# ------------------------------
-# Helper: Create limited topic tree
-# ------------------------------
-def create_test_topic_tree(original_tree, max_topics=2, max_subtopics=2):
-    test_tree = {'topics': []}
-    limited_topics = original_tree.get('topics', [])[:max_topics]
-    for topic_entry in limited_topics:
-        topic = topic_entry.get('topic')
-        subtopics = topic_entry.get('subtopics', [])[:max_subtopics]
-        test_tree['topics'].append({'topic': topic, 'subtopics': subtopics})
-    return test_tree
+from io_utils.zipping import AUDIO_BUNDLE, COMBINED_BUNDLE, TEXT_BUNDLE
+from pipeline.job_queue import QueueFullError, get_job_queue
+from pipeline.runner import STEPS, estimate_job
+from pipeline.planner import describe_plan
+from config import DOWNLOAD_PORT, DOWNLOAD_URL, JOB_POLL_INTERVAL_S, JOB_STALE_AFTER_S
 
 # ------------------------------
 # Step Manager
 # ------------------------------
 def init_steps():
-    steps = [
-        {"name": "Extracting Topics"},
-        {"name": "Building Q&A JSON"},
-        {"name": "Clearing Old Outputs"},
-        {"name": "Saving Q&A Files"},
-        {"name": "Generating Audio (MP3s)"},
-        {"name": "Creating Text ZIP"},
-        {"name": "Creating Audio ZIP"},
-        {"name": "Creating Combined ZIP"},
-    ]
+    steps = [{"name": name} for name in STEPS]
     placeholders = {}
     table = st.container()
     with table:
@@ -68,6 +48,94 @@ def update_step(step_name, status, pct, placeholders):
     placeholders[step_name]["progress"].progress(pct)
     placeholders[step_name]["pct"].markdown(f"{pct}%")
 
+# ------------------------------
+# Job view: poll progress from the job store
+# ------------------------------
+def show_job(job_id):
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None:
+        st.warning("This job no longer exists.")
+        return
+
+    steps, placeholders = init_steps()
+    for step in steps:
+        update_step(step["name"], "waiting", 0, placeholders)
+
+    info = st.empty()
+    while True:
+        job = queue.get(job_id)
+        for step_name, (status, pct) in job["progress"].items():
+            if step_name in placeholders:
+                update_step(step_name, status, pct, placeholders)
+        if job["status"] == "failed" or job["result"] is not None:
+            break
+        # A worker that died (or a server restart) leaves the job without updates
+        waiting = job["status"] == "queued" and job_id in queue.active_jobs()
+        if not waiting and time.time() - job["updated"] > JOB_STALE_AFTER_S:
+            queue.store.set_error(job_id, f"no progress for {JOB_STALE_AFTER_S // 60} minutes")
+            job = queue.get(job_id)
+            break
+        if job["status"] == "queued":
+            info.info("Your job is queued and will start shortly.")
+        else:
+            info.info("Processing your resume… this may take a while. You can refresh this page safely.")
+        time.sleep(JOB_POLL_INTERVAL_S)
+    info.empty()
+
+    if job["status"] == "failed":
+        st.error(f"Processing failed: {job['error']}. Run it again to resume from where it stopped.")
+        return
+
+    result = job["result"]
+    for note in result.get("notes", []):
+        st.caption(note)
+    if result.get("failed"):
+        st.warning(f"{len(result['failed'])} subtopic(s) failed: " + ", ".join(f"{t} / {s}" for t, s in result["failed"]))
+
+    # ----------------------------
+    # Download buttons
+    # ----------------------------
+    bundles = result["bundles"]
+    if not all(Path(p).exists() for p in bundles.values()):
+        st.warning("This job's files have expired. Run it again to regenerate them.")
+        return
+    st.success("✅ All questions generated!")
+    c1, c2, c3 = st.columns(3)
+    if DOWNLOAD_PORT:
+        # Streamed from the local download route instead of through this session
+        base = (DOWNLOAD_URL or f"http://localhost:{DOWNLOAD_PORT}").rstrip("/")
+        c1.link_button("📥 Download Text (ZIP)", base + download_path(job_id, "text"))
+        c2.link_button("📥 Download MP3 (ZIP)", base + download_path(job_id, "audio"))
+        c3.link_button("📥 Download TEXT + MP3 (ZIP)", base + download_path(job_id, "both"))
+    else:
+        with c1:
+            with open(bundles["text"], "rb") as f:
+                st.download_button("📥 Download Text (ZIP)", f, file_name=TEXT_BUNDLE)
+        with c2:
+            with open(bundles["audio"], "rb") as f:
+                st.download_button("📥 Download MP3 (ZIP)", f, file_name=AUDIO_BUNDLE)
+        with c3:
+            with open(bundles["both"], "rb") as f:
+                st.download_button("📥 Download TEXT + MP3 (ZIP)", f, file_name=COMBINED_BUNDLE)
+
+    # ----------------------------
+    # Search the generated questions
+    # ----------------------------
+    if result.get("results") and Path(result["results"]).exists():
+        query = st.text_input("🔎 Search your questions and answers")
+        if query:
+            results = ResultStore(Path(result["results"]))
+            try:
+                hits = results.search(query, limit=20)
+            finally:
+                results.close()
+            if not hits:
+                st.caption("No matching questions.")
+            for hit in hits:
+                with st.expander(f"{hit['topic']} / {hit['subtopic']} — {hit['q']}"):
+                    st.write(hit["a"])
+
 # ------------------------------
 # Main App
 # ------------------------------
@@ -76,16 +144,11 @@ def main():
 
     if "resume_text" not in st.session_state:
         st.session_state.resume_text = None
-    if "topic_tree" not in st.session_state:
-        st.session_state.topic_tree = None
-    if "zip_text" not in st.session_state:
-        st.session_state.zip_text = None
-    if "zip_audio" not in st.session_state:
-        st.session_state.zip_audio = None
-    if "zip_both" not in st.session_state:
-        st.session_state.zip_both = None
-    if "processing_done" not in st.session_state:
-        st.session_state.processing_done = False
+    # The job and user IDs live in the URL so a browser refresh reattaches to the job
+    if "user_id" not in st.session_state:
+        st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+    if "job_id" not in st.session_state:
+        st.session_state.job_id = st.query_params.get("job")
 
     uploaded_file = st.file_uploader("Upload your Resume (txt/pdf/docx)", type=["txt", "pdf", "docx"])
 
@@ -100,113 +163,34 @@ def main():
         st.subheader("Resume Extracted")
         st.text_area("Resume Text", st.session_state.resume_text, height=300)
 
+        # Dry-run plan for both modes so the choice below is made from real numbers
+        if st.button("📊 Estimate Calls, Tokens & Time"):
+            with st.spinner("Planning the run…"):
+                st.session_state.estimate = estimate_job(st.session_state.resume_text, get_job_queue().store)
+        if st.session_state.get("estimate"):
+            for mode, plan in st.session_state.estimate.items():
+                st.caption(f"**{mode.title()}** — {describe_plan(plan)}")
+
         col1, col2 = st.columns(2)
         with col1:
             test_button = st.button("🧪 Test with Some Topics")
         with col2:
             full_button = st.button("📚 Create Full Questions")
 
-        if (test_button or full_button) and not st.session_state.processing_done:
-            st.info("Processing your resume… this may take a while.")
-            steps, placeholders = init_steps()
-
-            # STEP 1: Extract Topics
-            step = "Extracting Topics"
-            update_step(step, "running", 10, placeholders)
-            topic_tree = get_topic_tree(
-                st.session_state.resume_text,
-                progress_callback=lambda pct: update_step(step, "running", pct, placeholders),
-            )
-            update_step(step, "done", 100, placeholders)
-
-            # Limit for test mode
-            if test_button:
-                topic_tree = create_test_topic_tree(topic_tree, max_topics=2, max_subtopics=2)
-
-            st.session_state.topic_tree = topic_tree
-
-            # STEP 2: Build Q&A JSON
-            step = "Building Q&A JSON"
-            update_step(step, "running", 50, placeholders)
-            _ = build_qna_json("dummy_topic", st.session_state.resume_text)  # preview run
-            time.sleep(1)
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 3: Clear outputs
-            step = "Clearing Old Outputs"
-            update_step(step, "running", 30, placeholders)
-            if OUTPUT_DIR.exists():
-                shutil.rmtree(OUTPUT_DIR)
-            OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-            time.sleep(1)
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 4: Save Q&A Files
-            step = "Saving Q&A Files"
-            update_step(step, "running", 0, placeholders)
-            save_all_qna(
-                topic_tree,
-                st.session_state.resume_text,
-                build_qna_json,
-                progress_callback=lambda pct: update_step(step, "running", pct, placeholders),
-            )
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 5: Generate Audio (MP3s)
-            step = "Generating Audio (MP3s)"
-            update_step(step, "running", 50, placeholders)
-            audio_dir = OUTPUT_DIR.parent / "audio_output"
-            if audio_dir.exists():
-                shutil.rmtree(audio_dir)
-            audio_dir.mkdir(parents=True, exist_ok=True)
-            txt_files = list(OUTPUT_DIR.rglob("*.txt"))
-            txt_to_mp3_tree(txt_files, OUTPUT_DIR, audio_dir)
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 6: Create Text ZIP
-            step = "Creating Text ZIP"
-            update_step(step, "running", 50, placeholders)
-            zip_text = zip_dir(Path(OUTPUT_DIR), Path("interview_qna_texts.zip"))
-            st.session_state.zip_text = zip_text
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 7: Create Audio ZIP
-            step = "Creating Audio ZIP"
-            update_step(step, "running", 50, placeholders)
-            zip_audio = zip_dir(audio_dir, Path("interview_qna_audio.zip"))
-            st.session_state.zip_audio = zip_audio
-            update_step(step, "done", 100, placeholders)
-
-            # STEP 8: Create Combined ZIP
-            step = "Creating Combined ZIP"
-            update_step(step, "running", 50, placeholders)
-            both_dir = OUTPUT_DIR.parent / "both_output"
-            if both_dir.exists():
-                shutil.rmtree(both_dir)
-            both_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy(zip_text, both_dir / "interview_qna_texts.zip")
-            shutil.copy(zip_audio, both_dir / "interview_qna_audio.zip")
-            zip_both = zip_dir(both_dir, Path("interview_qna_texts+audio.zip"))
-            st.session_state.zip_both = zip_both
-            update_step(step, "done", 100, placeholders)
-
-            st.session_state.processing_done = True
-
-        # ----------------------------
-        # Download buttons
-        # ----------------------------
-        if st.session_state.processing_done:
-            st.success("✅ All questions generated!")
-            c1, c2, c3 = st.columns(3)
-            with c1:
-                with open(st.session_state.zip_text, "rb") as f:
-                    st.download_button("📥 Download Text (ZIP)", f, file_name="interview_qna_texts.zip")
-            with c2:
-                with open(st.session_state.zip_audio, "rb") as f:
-                    st.download_button("📥 Download MP3 (ZIP)", f, file_name="interview_qna_audio.zip")
-            with c3:
-                with open(st.session_state.zip_both, "rb") as f:
-                    st.download_button("📥 Download TEXT + MP3 (ZIP)", f, file_name="interview_qna_texts+audio.zip")
+        if test_button or full_button:
+            try:
+                st.session_state.job_id = get_job_queue().submit(
+                    st.session_state.resume_text,
+                    "test" if test_button else "full",
+                    user_id=st.session_state.user_id,
+                )
+                st.query_params["job"] = st.session_state.job_id
+                st.query_params["user"] = st.session_state.user_id
+            except QueueFullError as e:
+                st.error(str(e))
+
+    if st.session_state.job_id:
+        show_job(st.session_state.job_id)
 
 if __name__ == "__main__":
     main()
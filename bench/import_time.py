@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark.
+
+Imports the modules app.py loads (Streamlit aside) in fresh interpreters,
+with GROQ_API_KEY unset, and reports the median import time next to the
+time with the provider SDKs imported eagerly, as core.llm_client used to.
+The exit code is 1 if importing loads any SDK or fails.
+
+    python -m bench.import_time
+    python -m bench.import_time --repeat 10 --top 15   # also list the slowest imports
+"""
+from __future__ import annotations
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What app.py imports from the project
+APP_MODULES = ["io_utils.text_extract", "pipeline.job_queue", "pipeline.runner", "pipeline.planner"]
+# Loaded on first use only (core.providers, pipeline.tts_backends, core.token_budget, core.metrics)
+DEFERRED = [
+    "langchain", "langchain_core", "langchain_groq", "langchain_openai", "groq", "openai",
+    "dotenv", "gtts", "pyttsx3", "tiktoken", "http.server",
+]
+# What core.llm_client imported at module load before providers were resolved lazily
+LEGACY_EAGER = ["langchain_groq", "langchain.schema", "dotenv"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{"s": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("GROQ_API_KEY", None)  # importing must not need a key
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(ROOT), env.get("PYTHONPATH")) if p)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def probe(modules: List[str], importtime: bool = False) -> Dict:
+    """Import `modules` in a fresh interpreter; {"s", "loaded", "importtime"}."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + [
+        "-c", _PROBE.format(modules=modules, deferred=DEFERRED),
+    ]
+    proc = subprocess.run(cmd, cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {modules} failed:\n{proc.stderr.strip()[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["importtime"] = proc.stderr if importtime else ""
+    return result
+
+
+def slowest(importtime: str, n: int) -> List[tuple]:
+    """(cumulative µs, module) of the `n` slowest top-level imports in `-X importtime` output."""
+    rows = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = cumulative.strip()
+        # Nested imports are indented past the single space after the bar
+        if cumulative.isdigit() and not name[1:].startswith(" "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports of the app modules")
+    args = parser.parse_args(argv)
+
+    eager = [m for m in LEGACY_EAGER if importlib.util.find_spec(m.split(".")[0]) is not None]
+    lazy_runs = [probe(APP_MODULES) for _ in range(args.repeat)]
+    eager_runs = [probe(APP_MODULES + eager) for _ in range(args.repeat)] if eager else []
+
+    lazy_ms = statistics.median(r["s"] for r in lazy_runs) * 1000
+    print(f"app modules, lazy providers : {lazy_ms:8.1f} ms (median of {args.repeat})")
+    if eager_runs:
+        eager_ms = statistics.median(r["s"] for r in eager_runs) * 1000
+        print(f"with {', '.join(eager)} eager: {eager_ms:8.1f} ms → lazy is {lazy_ms / eager_ms:.0%} of it")
+    missing = sorted(set(LEGACY_EAGER) - set(eager))
+    if missing:
+        print(f"(not installed, left out of the eager measurement: {', '.join(missing)})")
+
+    if args.top:
+        for cumulative, name in slowest(probe(APP_MODULES, importtime=True)["importtime"], args.top):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    loaded = sorted({m for r in lazy_runs for m in r["loaded"]})
+    if loaded:
+        print(f"REGRESSION: importing the app modules loads {', '.join(loaded)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
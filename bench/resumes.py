@@ -0,0 +1,49 @@
+from __future__ import annotations
+import random
+from typing import Dict
+
+# Terms the fake LLM turns into topics (it ranks capitalized words by frequency)
+SKILLS = [
+    "Python", "Django", "Flask", "FastAPI", "Pandas", "NumPy", "PyTorch", "TensorFlow", "Scikit",
+    "Kubernetes", "Docker", "Terraform", "Ansible", "Jenkins", "GitHub", "GitLab", "Airflow", "Spark",
+    "Kafka", "Redis", "PostgreSQL", "MySQL", "MongoDB", "Cassandra", "Elasticsearch", "Snowflake",
+    "BigQuery", "Redshift", "Tableau", "PowerBI", "Looker", "React", "Angular", "Vue", "TypeScript",
+    "JavaScript", "Node", "Express", "GraphQL", "Java", "Spring", "Kotlin", "Scala", "Golang", "Rust",
+    "AWS", "Azure", "GCP", "Lambda", "SageMaker", "Databricks", "MLflow", "Kubeflow", "LangChain",
+    "Transformers", "NLP", "Computer Vision", "Linux", "Bash", "Prometheus", "Grafana", "Nginx",
+]
+
+VERBS = ["Built", "Designed", "Migrated", "Optimized", "Led", "Automated", "Scaled", "Launched"]
+OBJECTS = [
+    "a data pipeline", "an internal platform", "the billing service", "a recommendation engine",
+    "the reporting stack", "a feature store", "the CI/CD workflow", "a real-time dashboard",
+]
+
+SIZES: Dict[str, int] = {"small": 3_000, "medium": 20_000, "large": 80_000}
+
+
+def synthetic_resume(target_chars: int, seed: int = 0) -> str:
+    """A plausible-looking resume of roughly `target_chars` characters, same output for the same seed."""
+    rng = random.Random(seed)
+    lines = [
+        "Jordan Example",
+        "Senior Software Engineer",
+        "",
+        "SUMMARY",
+        "Engineer with broad experience across backend, data and machine learning systems.",
+        "",
+        "EXPERIENCE",
+    ]
+    job = 0
+    while sum(len(line) + 1 for line in lines) < target_chars:
+        job += 1
+        lines.append(f"Company {job} | Engineer | 20{10 + job % 14:02d} - 20{11 + job % 14:02d}")
+        for _ in range(rng.randint(3, 6)):
+            a, b = rng.sample(SKILLS, 2)
+            lines.append(
+                f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {a} and {b}, "
+                f"improving throughput by {rng.randint(10, 90)}%."
+            )
+        lines.append("")
+    lines += ["SKILLS", ", ".join(rng.sample(SKILLS, 20)), "", "EDUCATION", "B.Sc. Computer Science"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,224 @@
+"""
+Offline end-to-end benchmark.
+
+Runs the real extraction → topics → QnA → save → TTS → zip pipeline on
+synthetic resumes, with a fake LLM behind DynamicLLMClient and a fake TTS
+backend, and reports per-stage latency percentiles and throughput. The
+stable metrics (total wall time and the p50 of every stage that takes at
+least GATE_MIN_STAGE_S) are compared with bench/baselines.json; the exit code
+is 1 on a regression. Everything else is reported but not gated.
+
+    python -m bench.run_bench                       # all sizes, compare with baselines
+    python -m bench.run_bench --sizes small --repeat 9
+    python -m bench.run_bench --update-baselines    # store current results as the baseline
+"""
+from __future__ import annotations
+import argparse
+import functools
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import config
+from core import metrics
+from core.fake_llm import FakeChatModel
+from core.job_store import JobStore, resume_hash
+from core.llm_client import DynamicLLMClient, set_llm_client
+from core.question_bank import get_question_bank
+from core.retrieval import get_resume_index
+from core.workspace import WorkspaceManager
+from io_utils.text_extract import extract_text_any
+import pipeline.runner
+import pipeline.tts_convert
+from pipeline.runner import STEPS, run_pipeline
+from pipeline.tts_backends import FakeTTSBackend
+from bench.resumes import SIZES, synthetic_resume
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+EXTRACT_STEP = "Extracting Text"
+# Stages faster than this are dominated by scheduling noise and are not gated
+GATE_MIN_STAGE_S = 0.01
+# Absolute slack on top of the relative tolerance, for the same reason
+GATE_NOISE_FLOOR_S = 0.05
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def install_fake_llm(args) -> DynamicLLMClient:
+    """Point every pipeline module at a client backed by FakeChatModel."""
+    client = DynamicLLMClient(
+        hedge=False,
+        client_factory=functools.partial(
+            FakeChatModel,
+            latency_median=args.llm_latency,
+            latency_sigma=args.llm_sigma,
+            error_rate=args.error_rate,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed,
+        ),
+    )
+    client.cache.enabled = False  # every run must hit the (fake) provider
+    client.rate_limiter.rpm = client.rate_limiter.tpm = None  # the fake has no quota
+    set_llm_client(client)
+    return client
+
+
+def run_once(resume_path: Path, tmp: Path, args) -> Dict:
+    install_fake_llm(args)
+    get_resume_index.cache_clear()
+    store = JobStore(tmp / "jobs.sqlite3")
+    workspaces = WorkspaceManager(tmp / "workspaces", quota_bytes=None)
+    backend = FakeTTSBackend(latency=args.tts_latency, per_char=args.tts_per_char)
+
+    trace = metrics.start_trace("bench")
+    started = time.perf_counter()
+    try:
+        with metrics.span(EXTRACT_STEP):
+            text = extract_text_any(resume_path)
+        job_id = store.create_job(resume_hash(text), "full")
+        result = run_pipeline(store, job_id, text, "full", workspace=workspaces.get(job_id), tts_backend=backend)
+    finally:
+        metrics.end_trace()
+    report = trace.to_dict()
+    report["wall_s"] = time.perf_counter() - started
+    report["failed_units"] = len(result["failed"])
+    return report
+
+
+def _stage_key(step: str) -> str:
+    return step.lower().replace(" ", "_").replace("&", "").replace("(", "").replace(")", "")
+
+
+def summarize(runs: List[Dict]) -> Dict[str, float]:
+    """Flat metric dict: `*_per_s` is higher-is-better, everything else lower-is-better."""
+    out: Dict[str, float] = {}
+    walls = [r["wall_s"] for r in runs]
+    out["wall_s_p50"] = percentile(walls, 50)
+    out["wall_s_p95"] = percentile(walls, 95)
+
+    for step in [EXTRACT_STEP] + STEPS:
+        durations = [s["duration_s"] for r in runs for s in r["spans"] if s["name"] == step]
+        key = _stage_key(step)
+        out[f"{key}_s_p50"] = percentile(durations, 50)
+        out[f"{key}_s_p95"] = percentile(durations, 95)
+
+    units = [s["duration_s"] for r in runs for s in r["spans"] if s["name"] == "qna_unit"]
+    out["qna_unit_s_p50"] = percentile(units, 50)
+    out["qna_unit_s_p95"] = percentile(units, 95)
+    calls = [c["latency_s"] for r in runs for c in r["llm_calls"]]
+    out["llm_call_s_p50"] = percentile(calls, 50)
+    out["llm_call_s_p95"] = percentile(calls, 95)
+
+    def rate(amount: float, seconds: float) -> float:
+        return amount / seconds if seconds > 0 else 0.0
+
+    def stage(run: Dict, name: str) -> Dict:
+        return next((s for s in run["spans"] if s["name"] == name), {"duration_s": 0.0})
+
+    out["units_per_s"] = statistics.median(
+        rate(stage(r, "Saving Q&A Files").get("units", 0), stage(r, "Saving Q&A Files")["duration_s"]) for r in runs
+    )
+    out["tts_files_per_s"] = statistics.median(
+        rate(stage(r, "Generating Audio (MP3s)").get("files", 0), stage(r, "Generating Audio (MP3s)")["duration_s"])
+        for r in runs
+    )
+    out["zip_mb_per_s"] = statistics.median(
+        rate(stage(r, "Creating ZIP Bundles").get("bytes", 0) / 1e6, stage(r, "Creating ZIP Bundles")["duration_s"])
+        for r in runs
+    )
+    out["llm_calls"] = statistics.median(len(r["llm_calls"]) for r in runs)
+    out["failed_units"] = max(r["failed_units"] for r in runs)
+    return {k: round(v, 4) for k, v in out.items()}
+
+
+def gated(baseline: Dict[str, float]) -> List[str]:
+    """Metrics stable enough to fail the run on: wall time and the p50 of stages that take real time."""
+    stages = [f"{_stage_key(step)}_s_p50" for step in [EXTRACT_STEP] + STEPS]
+    return ["wall_s_p50"] + [k for k in stages if baseline.get(k, 0.0) >= GATE_MIN_STAGE_S]
+
+
+def compare(results: Dict[str, Dict[str, float]], baselines: Dict, tolerance: float) -> List[str]:
+    """Regressions against the baselines, as human-readable lines."""
+    problems = []
+    for size, current in results.items():
+        baseline = baselines.get("sizes", {}).get(size, {})
+        for key in gated(baseline):
+            if key not in current or key not in baseline:
+                continue
+            value, base = current[key], baseline[key]
+            if value > base + max(base * tolerance, GATE_NOISE_FLOOR_S):
+                problems.append(f"{size}.{key}: {value} > baseline {base} (+{tolerance:.0%})")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma-separated: " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="median fake LLM latency (s)")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--malformed-rate", type=float, default=0.03)
+    parser.add_argument("--tts-latency", type=float, default=0.005, help="fake TTS seconds per segment")
+    parser.add_argument("--tts-per-char", type=float, default=0.0)
+    parser.add_argument("--no-overlap", action="store_true", help="run QnA, TTS and zip as strict stages")
+    parser.add_argument("--tolerance", type=float, default=None, help="allowed regression (default from baselines)")
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--json", type=Path, help="also write the full results here")
+    args = parser.parse_args(argv)
+
+    if not config.METRICS_ENABLED:
+        print("METRICS_ENABLED must be True to benchmark.", file=sys.stderr)
+        return 2
+    pipeline.tts_convert.TTS_CACHE_DIR = None  # measure synthesis, not the segment cache
+    get_question_bank().enabled = False  # every unit is generated, as on a fresh install
+    if args.no_overlap:
+        pipeline.runner.PIPELINE_OVERLAP = False
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in args.sizes.split(","):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            resume_path = tmp / f"resume_{size}.txt"
+            resume_path.write_text(synthetic_resume(SIZES[size], seed=args.seed), encoding="utf-8")
+            runs = [run_once(resume_path, tmp / f"run{i}", args) for i in range(args.repeat)]
+        results[size] = summarize(runs)
+        print(f"\n== {size} ({SIZES[size]} chars, {args.repeat} runs)")
+        for key, value in results[size].items():
+            print(f"  {key:40s} {value}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baselines = json.loads(BASELINES_PATH.read_text(encoding="utf-8")) if BASELINES_PATH.exists() else {}
+    tolerance = args.tolerance if args.tolerance is not None else baselines.get("tolerance", 0.25)
+    if args.update_baselines:
+        baselines.setdefault("sizes", {}).update(results)
+        baselines["tolerance"] = tolerance
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return 0
+
+    problems = compare(results, baselines, tolerance)
+    if problems:
+        print("\nREGRESSIONS:")
+        for line in problems:
+            print("  " + line)
+        return 1
+    print("\nNo regressions against baselines." if baselines else "\nNo baselines yet (run with --update-baselines).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,32 +4,199 @@ from pathlib import Path
 
 # --- Paths ---
 BASE_DIR = Path(__file__).parent
-OUTPUT_DIR = BASE_DIR / "output"
-TEXT_ZIP_NAME = "qna_text_bundle.zip"
-AUDIO_ZIP_NAME = "qna_audio_bundle.zip"
+# Job/unit state for resumable generation runs
+JOB_STORE_PATH = BASE_DIR / ".cache" / "jobs.sqlite3"
+
+
+# --- Workspaces ---
+# Every job writes text/, audio/ and bundles/ under its own WORKSPACE_ROOT/<job_id>
+WORKSPACE_ROOT = BASE_DIR / ".cache" / "workspaces"
+WORKSPACE_TTL_HOURS = 24 # unused workspaces are deleted after this long
+WORKSPACE_QUOTA_MB = 500 # per workspace; None = unlimited
+WORKSPACE_GC_INTERVAL_S = 600
+# Downloads: None = the archives built per job, sent through Streamlit (held in memory
+# per download); a port streams them instead from a local route (io_utils/download_server.py)
+DOWNLOAD_PORT = None # e.g. 8502
+DOWNLOAD_URL = None # as the browser reaches it, e.g. behind a proxy; default http://localhost:<port>
+
+
+# --- Background jobs ---
+# Pipeline runs execute in worker processes; the UI submits and polls them
+JOB_WORKERS = 2
+JOB_QUEUE_DEPTH = 8 # queued + running jobs across all users
+JOB_MAX_PER_USER = 1
+JOB_POLL_INTERVAL_S = 1.0
+JOB_STALE_AFTER_S = 600 # a started job with no progress for this long is reported as failed
+
+
+# --- Metrics ---
+METRICS_ENABLED = True
+# Per-process snapshots and the merged Prometheus text file (metrics.prom)
+METRICS_DIR = BASE_DIR / ".cache" / "metrics"
+METRICS_PORT = None # e.g. 9464 to serve /metrics and /jobs/<job_id> locally
+METRICS_MAX_EVENTS = 5000 # spans / LLM calls kept per job trace
+METRICS_SNAPSHOT_TTL_HOURS = 24 # snapshots of exited (or this long idle) processes are deleted
+
+
+# --- LLM response cache ---
+# Responses that parse as JSON are cached on disk and reused for identical prompts
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = BASE_DIR / ".cache" / "llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_MAX_MB = 200
+LLM_CACHE_TTL_HOURS = 24 * 30 # None to keep entries until evicted
 
 
 # --- LLM model ---
+# Backend used by core/llm_client.py, loaded on first use (core/providers.py):
+# "groq", "openai" (any OpenAI-compatible server, e.g. a local vLLM, llama.cpp
+# or Ollama) or "fake" (offline canned answers, see core/fake_llm.py)
+LLM_PROVIDER = "groq"
+OPENAI_COMPAT_BASE_URL = "http://localhost:8000/v1"
+OPENAI_COMPAT_MODELS = ["local-model"] # names the server serves, in order of preference
+OPENAI_COMPAT_API_KEY_ENV = "OPENAI_API_KEY" # env var holding the server's key, if it needs one
 GROQ_MODEL_NAME = "compound-beta" # change if desired
 TEMPERATURE = 0.2
 MAX_TOKENS = 1024*8
 
 
+# --- Model routing ---
+# Rolling window (calls) used for per-model latency and error rate
+ROUTER_WINDOW = 20
+# Circuit opens after this many consecutive failures...
+ROUTER_FAILURE_THRESHOLD = 3
+# ...or once the rolling error rate reaches this fraction
+ROUTER_ERROR_RATE_THRESHOLD = 0.5
+# Seconds before a tripped model is tried again
+ROUTER_COOLDOWN_S = 30
+
+
+# --- Hedged requests ---
+# If the primary model is slower than its rolling latency percentile, send the
+# same prompt to the next model and keep whichever valid answer arrives first
+LLM_HEDGE_ENABLED = False
+LLM_HEDGE_PERCENTILE = 90
+LLM_HEDGE_MIN_DELAY_S = 2.0
+LLM_HEDGE_MAX_DELAY_S = 30.0 # also used before a model has enough latency samples
+LLM_HEDGE_POOL_SIZE = 16
+
+
 # --- Generation settings ---
 # How many questions per subtopic for each style
 N_LONG_Q = 10
 N_SHORT_Q = 10
+# Follow-up calls that ask only for the items a malformed or truncated completion missed
+QNA_REPAIR_ATTEMPTS = 2
+
+
+# Batched mode: one LLM call covers several subtopics of the same topic, so the
+# resume context is sent once per batch instead of once per subtopic
+QNA_BATCH_MODE = False
+QNA_MAX_BATCH_SIZE = 6
+# Completion tokens per generated item as JSON, used by the token-budget planner;
+# the 90th percentile of the sample outputs in output/ (median 157 long, 29 short)
+QNA_TOKENS_PER_LONG = 205
+QNA_TOKENS_PER_SHORT = 45
+
+
+# Streamed mode: QnA items are parsed and written to disk as the completion arrives
+QNA_STREAMING = False
+
+
+# --- Token budgets ---
+# Calls get max_tokens sized to the expected output and only go to models it fits;
+# a unit whose questions do not fit is split across several calls (core/token_budget.py)
+TOKEN_SAFETY_FACTOR = 1.25 # headroom on estimated output tokens
+TOKEN_CONTEXT_MARGIN = 256 # context tokens kept free beyond prompt + output
+TOPIC_TREE_OUTPUT_TOKENS = 1500 # up to 12 topics x 10 subtopics
+
+
+# --- Planning ---
+# Each job first estimates its LLM calls, tokens, cost and time (pipeline/planner.py)
+PLANNER_HISTORY_JOBS = 20 # recent job reports used for latency estimates
+PLANNER_DEFAULT_CALL_S = 8.0 # assumed QnA call latency before any history exists
+PLANNER_DEFAULT_TTS_CHARS_PER_S = 400.0 # likewise for TTS, per worker
+PLANNER_DEFAULT_REPAIR_RATE = 0.1 # follow-up calls per QnA call, likewise
+# model → (input, output) USD per million tokens, e.g. {"llama-3.3-70b-versatile": (0.59, 0.79)};
+# models without a price are left out of the cost estimate
+LLM_PRICES_PER_M_TOKENS = {}
+
+# --- Concurrency / rate limits ---
+# Parallel subtopic generations in save_all_qna
+QNA_MAX_WORKERS = 4
+# Provider quotas shared by every LLM call in the process (None to disable)
+LLM_RPM_LIMIT = 30
+LLM_TPM_LIMIT = 60000
 
 
 # Whether to also ask the LLM to propose extra subtopics if missing
 ALLOW_LLM_SUBTOPIC_AUGMENT = True
 
 
+# --- Topic extraction ---
+# Long resumes are split on paragraph/section boundaries and chunks are sent in parallel
+TOPIC_CHUNK_CHARS = 12000
+TOPIC_CHUNK_OVERLAP = 500
+TOPIC_MAX_WORKERS = 4
+
+
+# --- Subtopic dedup ---
+# Subtopics whose normalized names have at least this character 3-gram Jaccard
+# similarity (and the same numbers / parenthetical qualifiers) share one QnA generation
+DEDUP_ENABLED = True
+DEDUP_THRESHOLD = 0.8
+
+
+# --- Question bank ---
+# Subtopics asked for by several resumes get most of their items from a shared bank
+# of generic (resume-free) questions; only the personal share uses this resume
+QUESTION_BANK_ENABLED = True
+QUESTION_BANK_PATH = BASE_DIR / ".cache" / "question_bank.sqlite3"
+QUESTION_BANK_THRESHOLD = 0.7 # subtopic-name similarity (character 3-gram Jaccard)
+QUESTION_BANK_MIN_RESUMES = 2 # other resumes that asked for a subtopic before it counts as generic
+QUESTION_BANK_PERSONAL_SHARE = 0.3 # share of each section always generated for this resume
+QUESTION_BANK_MAX_PER_SUBTOPIC = 100 # stored items per subtopic and section
+
+
+# --- Incremental regeneration ---
+# A re-uploaded (edited) resume reuses the user's previous job: only units whose
+# subtopic appears in an added, edited or removed resume section are regenerated and re-voiced
+INCREMENTAL_ENABLED = True
+INCREMENTAL_MAX_CHANGED = 0.5 # changed share of the resume above which a full run is done
+INCREMENTAL_TOPIC_MIN_CHARS = 1500 # added text that is also mined for new subtopics
+
+
+# --- Resume retrieval ---
+# Each QnA prompt gets only the resume passages relevant to its subtopic (local BM25)
+RETRIEVAL_ENABLED = True
+RETRIEVAL_TOP_K = 6
+# Context budget per prompt; resumes shorter than this are sent whole
+RETRIEVAL_MAX_CHARS = 4000
+RETRIEVAL_PASSAGE_CHARS = 600
+
+
 # --- Text extraction ---
 # Max pages to read in PDFs (None for all). Keep small for speed if needed.
 PDF_MAX_PAGES = None
+# PDFs with at least this many pages are extracted on a process pool
+EXTRACT_PARALLEL_MIN_PAGES = 20
+EXTRACT_WORKERS = None # None = one per CPU
+# Extracted PDF/DOCX text is cached here by file content hash (None to disable)
+EXTRACT_CACHE_DIR = BASE_DIR / ".cache" / "extract"
 
 
 # --- TTS ---
-TTS_VOICE = None # keep None to use system default
-TTS_RATE_DELTA = 0 # e.g., +10 faster, -10 slower
\ No newline at end of file
+TTS_BACKEND = "gtts" # "gtts" (network), "pyttsx3" (offline system voices) or "fake"
+TTS_VOICE = None # keep None to use system default (gtts: accent TLD such as "co.uk"; pyttsx3: voice id)
+TTS_RATE_DELTA = 0 # e.g., +10 faster, -10 slower (gtts: any negative value = slow mode)
+TTS_MAX_WORKERS = 4
+TTS_SEGMENT_CHARS = 1000
+# Synthesized segments are cached here by (backend, voice, rate, text) (None to disable)
+TTS_CACHE_DIR = BASE_DIR / ".cache" / "tts"
+
+
+# --- Stage overlap ---
+# Saved units flow straight into TTS and the archives instead of waiting for every unit
+PIPELINE_OVERLAP = True
+PIPELINE_QUEUE_DEPTH = 8 # saved units waiting for TTS before generation is held back
+PIPELINE_TTS_CONSUMERS = 2 # units voiced at once (their segments share the TTS pool)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class FakeLLMError(RuntimeError):
+    """Simulated provider failure."""
+
+
+class _FakeResponse:
+    def __init__(self, content: str, completion_tokens: int, prompt_tokens: int):
+        self.content = content
+        self.response_metadata = {
+            "token_usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        }
+
+
+class FakeChatModel:
+    """
+    Network-free stand-in for ChatGroq with canned topic trees and QnA, for
+    benchmarks and offline runs. Select it with LLM_PROVIDER = "fake", or pass
+    it (or a `functools.partial` of it) as `DynamicLLMClient(client_factory=...)`.
+
+    Latency is log-normal around `latency_median` seconds (spread `latency_sigma`)
+    plus `per_token` seconds per completion token. A call fails with
+    `error_rate` probability and returns truncated JSON with `malformed_rate`
+    probability. Output longer than max_tokens (per call or from the
+    constructor) is cut off, as a real provider would. Outcomes are seeded by
+    (seed, model, prompt, attempt number), so a run is reproducible regardless
+    of thread scheduling.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake",
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        latency_median: float = 0.0,
+        latency_sigma: float = 0.0,
+        per_token: float = 0.0,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: int = 0,
+        **kwargs,
+    ):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.per_token = per_token
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self._attempts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _rng(self, system: str, user: str) -> random.Random:
+        key = f"{system}\x00{user}"
+        with self._lock:
+            self._attempts[key] += 1
+            attempt = self._attempts[key]
+        return random.Random(zlib.crc32(f"{self.seed}|{self.model}|{attempt}|{key}".encode("utf-8")))
+
+    def _complete(self, messages, max_tokens: Optional[int] = None) -> Tuple[str, int, int, float]:
+        system, user = _text(messages[0]), _text(messages[-1])
+        rng = self._rng(system, user)
+        if rng.random() < self.error_rate:
+            raise FakeLLMError(f"Simulated provider error from {self.model}")
+
+        content = _canned_response(system, user, rng)
+        if rng.random() < self.malformed_rate:
+            content = content[: max(1, len(content) // 2)]
+        limit = (max_tokens or self.max_tokens) * 4  # ~4 characters per token
+        if len(content) > limit:
+            content = content[:limit]
+        completion_tokens = len(content) // 4 + 1
+        delay = self.per_token * completion_tokens
+        if self.latency_median:
+            delay += self.latency_median * math.exp(self.latency_sigma * rng.gauss(0, 1))
+        return content, completion_tokens, (len(system) + len(user)) // 4 + 1, delay
+
+    def invoke(self, messages, max_tokens: Optional[int] = None, **kwargs) -> _FakeResponse:
+        content, completion_tokens, prompt_tokens, delay = self._complete(messages, max_tokens)
+        if delay:
+            time.sleep(delay)
+        return _FakeResponse(content, completion_tokens, prompt_tokens)
+
+    def stream(self, messages, max_tokens: Optional[int] = None, chunk_chars: int = 64, **kwargs) -> Iterator[_FakeResponse]:
+        content, completion_tokens, prompt_tokens, delay = self._complete(messages, max_tokens)
+        n_chunks = max(1, math.ceil(len(content) / chunk_chars))
+        for i in range(n_chunks):
+            if delay:
+                time.sleep(delay / n_chunks)
+            yield _FakeResponse(content[i * chunk_chars:(i + 1) * chunk_chars], 0, prompt_tokens)
+
+
+def _text(message) -> str:
+    # (role, text) pairs or LangChain message objects
+    return message[1] if isinstance(message, tuple) else message.content
+
+
+def _canned_response(system: str, user: str, rng: random.Random) -> str:
+    if "structure topics" in system:
+        return json.dumps(_topic_tree(user))
+    n_long = _int_after(r"Generate (\d+) LONG", user, 10)
+    n_short = _int_after(r"Generate (\d+) SHORT", user, 10)
+    units = re.search(r"EACH of these units:\n((?:- .*\n)+)", user)
+    if units:
+        names = [line[2:].strip() for line in units.group(1).splitlines()]
+        return json.dumps({"units": [_qna(name, n_long, n_short, rng) for name in names]})
+    unit = re.search(r"for the unit: (.+?)\.\n", user)
+    return json.dumps(_qna(unit.group(1) if unit else "General", n_long, n_short, rng))
+
+
+def _int_after(pattern: str, text: str, default: int) -> int:
+    m = re.search(pattern, text)
+    return int(m.group(1)) if m else default
+
+
+def _topic_tree(user: str, max_topics: int = 12, per_topic: int = 5) -> Dict:
+    """Topics from the most frequent capitalized terms in the resume chunk."""
+    chunk = user.split("):\n", 1)[-1]
+    terms = Counter(re.findall(r"\b[A-Z][A-Za-z+#]{2,}\b", chunk))
+    ranked: List[str] = [t for t, _ in terms.most_common(max_topics * per_topic)]
+    topics = []
+    for i in range(0, len(ranked), per_topic):
+        group = ranked[i:i + per_topic]
+        topics.append({"topic": f"{group[0]} Ecosystem", "subtopics": group})
+    return {"topics": topics or [{"topic": "General", "subtopics": ["Career Overview"]}]}
+
+
+def _qna(unit: str, n_long: int, n_short: int, rng: random.Random) -> Dict:
+    def answer(sentences: int) -> str:
+        return " ".join(
+            f"In {unit}, point {rng.randint(1, 999)} covers a practical trade-off seen in production."
+            for _ in range(sentences)
+        )
+
+    return {
+        "unit": unit,
+        "long": [{"q": f"Explain aspect {i} of {unit} with an example.", "a": answer(5)} for i in range(1, n_long + 1)],
+        "short": [{"q": f"What is key fact {i} about {unit}?", "a": answer(1)} for i in range(1, n_short + 1)],
+    }
@@ -0,0 +1,275 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import JOB_STORE_PATH
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def resume_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """
+    SQLite-backed record of generation jobs and the state of every unit
+    (pending / running / done / failed, with last error and attempt count),
+    so an interrupted job can be restarted and only redo what is missing.
+    """
+
+    def __init__(self, path: Path = JOB_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Several worker processes share this file, so wait on locks instead of failing
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                resume_hash TEXT,
+                mode TEXT,
+                topic_tree TEXT,
+                status TEXT,
+                created REAL,
+                updated REAL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                job_id TEXT,
+                topic TEXT,
+                subtopic TEXT,
+                state TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                updated REAL,
+                PRIMARY KEY (job_id, topic, subtopic)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_resume ON jobs(resume_hash, mode);
+            """
+        )
+        # Columns added for background jobs, metrics and incremental runs; older stores are migrated in place
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("user_id", "progress", "result", "error", "metrics", "resume_text", "base_job"):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+            return rows
+
+    def _one(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        rows = self._execute(sql, params)
+        return rows[0] if rows else None
+
+    def create_job(
+        self,
+        resume_hash: str,
+        mode: str,
+        user_id: Optional[str] = None,
+        status: str = "extracting",
+        resume_text: Optional[str] = None,
+        base_job: Optional[str] = None,
+    ) -> str:
+        """
+        `resume_text` is kept so a later upload can be diffed against it;
+        `base_job` is an earlier job whose unchanged units this one reuses.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (job_id, resume_hash, mode, topic_tree, status, created, updated, user_id, progress,"
+            " resume_text, base_job)"
+            " VALUES (?, ?, ?, NULL, ?, ?, ?, ?, '{}', ?, ?)",
+            (job_id, resume_hash, mode, status, now, now, user_id, resume_text, base_job),
+        )
+        return job_id
+
+    def start_run(self, job_id: str) -> None:
+        """Mark a (new or resumed) job as queued and clear the previous run's outcome."""
+        self._execute(
+            "UPDATE jobs SET status = 'queued', progress = '{}', result = NULL, error = NULL, updated = ?"
+            " WHERE job_id = ?",
+            (time.time(), job_id),
+        )
+
+    def set_progress(self, job_id: str, step: str, status: str, pct: int) -> None:
+        """Record per-step progress ({step: [status, pct]}) for pollers in other processes."""
+        with self._lock:
+            row = self._conn.execute("SELECT progress FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            steps = json.loads(row[0]) if row and row[0] else {}
+            steps[step] = [status, pct]
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, updated = ? WHERE job_id = ?",
+                (json.dumps(steps), time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def set_result(self, job_id: str, result: Dict) -> None:
+        self._execute(
+            "UPDATE jobs SET result = ?, error = NULL, updated = ? WHERE job_id = ?",
+            (json.dumps(result), time.time(), job_id),
+        )
+
+    def set_error(self, job_id: str, error: str) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE job_id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def set_metrics(self, job_id: str, metrics: Dict) -> None:
+        """Store the job's instrumentation report (see core.metrics.JobTrace.to_dict)."""
+        self._execute(
+            "UPDATE jobs SET metrics = ?, updated = ? WHERE job_id = ?",
+            (json.dumps(metrics), time.time(), job_id),
+        )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        row = self._one(
+            "SELECT job_id, resume_hash, mode, status, user_id, progress, result, error, metrics, created, updated"
+            " FROM jobs WHERE job_id = ?",
+            (job_id,),
+        )
+        if row is None:
+            return None
+        keys = ("job_id", "resume_hash", "mode", "status", "user_id", "progress", "result", "error", "metrics",
+                "created", "updated")
+        job = dict(zip(keys, row))
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["metrics"] = json.loads(job["metrics"]) if job["metrics"] else None
+        return job
+
+    def recent_metrics(self, limit: int = 20) -> List[Dict]:
+        """Instrumentation reports of the latest jobs that have one, newest first."""
+        rows = self._execute(
+            "SELECT metrics FROM jobs WHERE metrics IS NOT NULL ORDER BY updated DESC LIMIT ?", (limit,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def find_resumable(self, resume_hash: str, mode: str) -> Optional[str]:
+        """Latest unfinished job for the same resume and mode, if any."""
+        row = self._one(
+            "SELECT job_id FROM jobs WHERE resume_hash = ? AND mode = ? AND status != 'done'"
+            " ORDER BY created DESC LIMIT 1",
+            (resume_hash, mode),
+        )
+        return row[0] if row else None
+
+    def find_topic_tree(self, resume_hash: str, mode: str) -> Optional[Dict]:
+        """Topic tree of the latest job for the same resume and mode, if one got that far."""
+        row = self._one(
+            "SELECT topic_tree FROM jobs WHERE resume_hash = ? AND mode = ? AND topic_tree IS NOT NULL"
+            " ORDER BY created DESC LIMIT 1",
+            (resume_hash, mode),
+        )
+        return json.loads(row[0]) if row else None
+
+    def find_previous(self, user_id: str, mode: str, exclude_hash: str) -> Optional[str]:
+        """Latest finished job of `user_id` in `mode` for a different resume, with its text stored."""
+        row = self._one(
+            "SELECT job_id FROM jobs WHERE user_id = ? AND mode = ? AND resume_hash != ?"
+            " AND status IN ('done', 'incomplete') AND resume_text IS NOT NULL AND topic_tree IS NOT NULL"
+            " ORDER BY created DESC LIMIT 1",
+            (user_id, mode, exclude_hash),
+        )
+        return row[0] if row else None
+
+    def get_resume_text(self, job_id: str) -> Optional[str]:
+        row = self._one("SELECT resume_text FROM jobs WHERE job_id = ?", (job_id,))
+        return row[0] if row else None
+
+    def get_base_job(self, job_id: str) -> Optional[str]:
+        row = self._one("SELECT base_job FROM jobs WHERE job_id = ?", (job_id,))
+        return row[0] if row else None
+
+    def set_status(self, job_id: str, status: str) -> None:
+        self._execute("UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?", (status, time.time(), job_id))
+
+    def get_status(self, job_id: str) -> Optional[str]:
+        row = self._one("SELECT status FROM jobs WHERE job_id = ?", (job_id,))
+        return row[0] if row else None
+
+    def set_topic_tree(self, job_id: str, topic_tree: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET topic_tree = ?, status = 'generating', updated = ? WHERE job_id = ?",
+                (json.dumps(topic_tree), now, job_id),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (job_id, topic, subtopic, state, attempts, updated)"
+                " VALUES (?, ?, ?, 'pending', 0, ?)",
+                [
+                    (job_id, t.get("topic", "General"), sub, now)
+                    for t in topic_tree.get("topics", [])
+                    for sub in t.get("subtopics", [])
+                ],
+            )
+            self._conn.commit()
+
+    def get_topic_tree(self, job_id: str) -> Optional[Dict]:
+        row = self._one("SELECT topic_tree FROM jobs WHERE job_id = ?", (job_id,))
+        return json.loads(row[0]) if row and row[0] else None
+
+    def mark_unit(self, job_id: str, topic: str, subtopic: str, state: str, error: Optional[str] = None) -> None:
+        bump = 1 if state == RUNNING else 0
+        self._execute(
+            "UPDATE units SET state = ?, error = ?, attempts = attempts + ?, updated = ?"
+            " WHERE job_id = ? AND topic = ? AND subtopic = ?",
+            (state, error, bump, time.time(), job_id, topic, subtopic),
+        )
+
+    def unit_callback(self, job_id: str) -> Callable[[str, str, str, Optional[str]], None]:
+        """`on_unit` hook for save_all_qna that records unit states for `job_id`."""
+        return lambda topic, subtopic, state, error=None: self.mark_unit(job_id, topic, subtopic, state, error)
+
+    def reset_missing(self, job_id: str, exists: Callable[[str, str], bool]) -> int:
+        """Send 'done' units whose output no longer exists back to pending."""
+        rows = self._execute(
+            "SELECT topic, subtopic FROM units WHERE job_id = ? AND state = 'done'", (job_id,)
+        )
+        missing = [(t, s) for t, s in rows if not exists(t, s)]
+        for t, s in missing:
+            self.mark_unit(job_id, t, s, PENDING)
+        return len(missing)
+
+    def done_units(self, job_id: str) -> List[Tuple[str, str]]:
+        rows = self._execute(
+            "SELECT topic, subtopic FROM units WHERE job_id = ? AND state = 'done'", (job_id,)
+        )
+        return [(t, s) for t, s in rows]
+
+    def pending_tree(self, job_id: str) -> Dict:
+        """Topic tree of every unit that is not done (pending, failed or left running)."""
+        tree = self.get_topic_tree(job_id) or {"topics": []}
+        done = set(self.done_units(job_id))
+        topics = []
+        for t in tree.get("topics", []):
+            name = t.get("topic", "General")
+            subs = [s for s in t.get("subtopics", []) if (name, s) not in done]
+            if subs:
+                topics.append({"topic": name, "subtopics": subs})
+        return {"topics": topics}
+
+    def summary(self, job_id: str) -> Dict[str, int]:
+        rows = self._execute(
+            "SELECT state, COUNT(*) FROM units WHERE job_id = ? GROUP BY state", (job_id,)
+        )
+        return {state: count for state, count in rows}
+
+    def failures(self, job_id: str) -> Dict[Tuple[str, str], str]:
+        rows = self._execute(
+            "SELECT topic, subtopic, error FROM units WHERE job_id = ? AND state = 'failed'", (job_id,)
+        )
+        return {(t, s): e for t, s, e in rows}
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import json
+from typing import Dict, List, Optional, Tuple
+
+QNA_SECTIONS = ("long", "short")
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start", "pending_key", "unit", "held")
+
+    def __init__(self, kind: str, key: Optional[str], start: int):
+        self.kind = kind  # "{" or "["
+        self.key = key  # key this container is the value of (arrays pass theirs to items)
+        self.start = start
+        self.pending_key: Optional[str] = None
+        self.unit: Optional[str] = None  # this object's "unit" value, once seen
+        self.held: List[Tuple[str, Dict]] = []  # items waiting for a later "unit" key
+
+
+class QnAStreamParser:
+    """
+    Incremental parser for the QnA JSON schema.
+
+    Feed it raw completion text as it streams in; every `{"q": ..., "a": ...}`
+    object inside a "long" or "short" array is returned as soon as its closing
+    brace arrives. Text before the first "{" (e.g. a ```json fence) is ignored,
+    and a truncated tail never loses items that were already complete.
+    `feed_units` also says which "unit" object (batch completions) each item is
+    in; items that arrive before their object's "unit" key are held back until
+    the key (or the object's closing brace) arrives.
+    """
+
+    def __init__(self, sections: Tuple[str, ...] = QNA_SECTIONS):
+        self.sections = sections
+        self.buf = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string: Optional[str] = None
+        self.started = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict]]:
+        return [(section, item) for _, section, item in self._scan(chunk, hold=False)]
+
+    def feed_units(self, chunk: str) -> List[Tuple[Optional[str], str, Dict]]:
+        """Like `feed`, as (unit, section, item); unit is None outside a {"unit": ...} object."""
+        return self._scan(chunk, hold=True)
+
+    def _scan(self, chunk: str, hold: bool) -> List[Tuple[Optional[str], str, Dict]]:
+        self.buf += chunk
+        items: List[Tuple[Optional[str], str, Dict]] = []
+        buf = self.buf
+        i = self.pos
+        while i < len(buf):
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    try:
+                        self.last_string = json.loads(buf[self.string_start:i + 1])
+                    except ValueError:
+                        self.last_string = None
+                    top = self.stack[-1] if self.stack else None
+                    if top is not None and top.kind == "{" and top.pending_key == "unit":
+                        top.unit = self.last_string
+                        items.extend((top.unit, section, item) for section, item in top.held)
+                        top.held = []
+            elif not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append(_Frame("{", None, i))
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = i
+            elif ch == ":" and self.stack and self.stack[-1].kind == "{":
+                self.stack[-1].pending_key = self.last_string
+            elif ch in "{[":
+                parent = self.stack[-1] if self.stack else None
+                key = None
+                if parent is not None:
+                    key = parent.pending_key if parent.kind == "{" else parent.key
+                self.stack.append(_Frame(ch, key, i))
+            elif ch in "}]":
+                if not self.stack:
+                    break
+                frame = self.stack.pop()
+                parent = self.stack[-1] if self.stack else None
+                if (
+                    ch == "}"
+                    and parent is not None
+                    and parent.kind == "["
+                    and parent.key in self.sections
+                ):
+                    item = self._load(buf[frame.start:i + 1])
+                    if item is not None:
+                        owner = self.stack[-2] if len(self.stack) > 1 else None
+                        if hold and owner is not None and owner.unit is None:
+                            owner.held.append((parent.key, item))
+                        else:
+                            items.append((owner.unit if owner else None, parent.key, item))
+                if frame.held:
+                    items.extend((None, section, item) for section, item in frame.held)
+                if not self.stack:
+                    self.started = False
+            elif ch == "," and self.stack and self.stack[-1].kind == "{":
+                self.stack[-1].pending_key = None
+            i += 1
+        self.pos = i
+        return items
+
+    @staticmethod
+    def _load(text: str) -> Optional[Dict]:
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(obj, dict) and obj.get("q"):
+            return obj
+        return None
+
+
+def valid_item(item) -> bool:
+    """A QnA item is a dict with non-empty string "q" and "a"."""
+    return (
+        isinstance(item, dict)
+        and isinstance(item.get("q"), str)
+        and isinstance(item.get("a"), str)
+        and bool(item["q"].strip())
+        and bool(item["a"].strip())
+    )
+
+
+def salvage_qna(text: str, sections: Tuple[str, ...] = QNA_SECTIONS) -> Dict[str, List[Dict]]:
+    """
+    Every complete, valid q/a item in `text`, per section, even when the JSON
+    around them is malformed or truncated. Always returns all `sections`.
+    """
+    out: Dict[str, List[Dict]] = {section: [] for section in sections}
+    for section, item in QnAStreamParser(sections).feed(text or ""):
+        if valid_item(item):
+            out[section].append({"q": item["q"], "a": item["a"]})
+    return out
+
+
+def salvage_batch(text: str, sections: Tuple[str, ...] = QNA_SECTIONS) -> Dict[str, Dict[str, List[Dict]]]:
+    """
+    `salvage_qna` for a batch completion ({"units": [{"unit", "long", "short"}, ...]}):
+    unit name → its complete, valid items per section.
+    """
+    out: Dict[str, Dict[str, List[Dict]]] = {}
+    for unit, section, item in QnAStreamParser(sections).feed_units(text or ""):
+        if isinstance(unit, str) and valid_item(item):
+            out.setdefault(unit, {s: [] for s in sections})[section].append({"q": item["q"], "a": item["a"]})
+    return out
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class LLMCache:
+    """
+    Disk-backed, content-addressed cache for LLM responses (SQLite).
+
+    Entries are keyed by a hash of (model, temperature, system prompt, user prompt)
+    and evicted least-recently-used once the entry count or total size goes over
+    its bound; entries older than the TTL are never served.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 5000,
+        max_bytes: int = 200 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, user_prompt: str) -> str:
+        payload = json.dumps([model, temperature, system_prompt, user_prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, value TEXT,"
+                " size INTEGER, created REAL, accessed REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                row = None
+            if row is None:
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            db.commit()
+            return row[0]
+
+    def put(self, key: str, model: str, value: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds:
+            db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            row = db.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 1").fetchone()
+            if row is None:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            count -= 1
+            total -= row[1]
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM responses")
+            self._db().commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, total = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
@@ -1,69 +1,333 @@
 import json
-import os
-from typing import Any, Dict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
-from langchain_groq import ChatGroq
-from langchain.schema import HumanMessage, SystemMessage
-from dotenv import load_dotenv
-
-load_dotenv()  # loads variables from .env
-
-from config import TEMPERATURE, MAX_TOKENS
-
-# Top ~10 useful models for this project (ordered by preference)
-CANDIDATE_MODELS = [
-    "gemma2-9b-it",
-    "llama-3.1-8b-instant",
-    "llama3-8b-8192",
-    "llama3-70b-8192",
-    "llama-3.3-70b-versatile",
-    "allam-2-7b",
-    "qwen/qwen3-32b",
-    "deepseek-r1-distill-llama-70b",
-    "openai/gpt-oss-20b",
-    "openai/gpt-oss-120b",
-]
+from config import (
+    LLM_PROVIDER,
+    TEMPERATURE,
+    MAX_TOKENS,
+    LLM_RPM_LIMIT,
+    LLM_TPM_LIMIT,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_TTL_HOURS,
+    ROUTER_WINDOW,
+    ROUTER_FAILURE_THRESHOLD,
+    ROUTER_ERROR_RATE_THRESHOLD,
+    ROUTER_COOLDOWN_S,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY_S,
+    LLM_HEDGE_MAX_DELAY_S,
+    LLM_HEDGE_POOL_SIZE,
+)
+from core import metrics, token_budget
+from core.llm_cache import LLMCache
+from core.model_router import ModelRouter
+from core.providers import get_llm_provider
+from core.rate_limit import RateLimiter, estimate_tokens
 
 
 class DynamicLLMClient:
-    def __init__(self, api_key: str = None, temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS):
-        self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise RuntimeError("GROQ_API_KEY is not set in environment.")
+    def __init__(
+        self,
+        api_key: str = None,
+        temperature: float = TEMPERATURE,
+        max_tokens: int = MAX_TOKENS,
+        hedge: bool = LLM_HEDGE_ENABLED,
+        client_factory: Optional[Callable[..., Any]] = None,
+        provider: str = LLM_PROVIDER,
+    ):
+        # `client_factory(model=, temperature=, max_tokens=)` builds one chat model;
+        # anything with LangChain's invoke/stream works (e.g. core.fake_llm.FakeChatModel).
+        # Without one, the provider's SDK is imported here (see core.providers).
+        spec = get_llm_provider(provider)
+        self.provider = provider
+        self.client_factory = client_factory or spec.connect(api_key)
 
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.models = CANDIDATE_MODELS
-        self.current_index = 0  # start with first model
-
-    def _get_client(self, model_name: str) -> ChatGroq:
-        return ChatGroq(
-            model=model_name,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
+        self.models = spec.models
+        self.router = ModelRouter(
+            self.models,
+            window=ROUTER_WINDOW,
+            failure_threshold=ROUTER_FAILURE_THRESHOLD,
+            error_rate_threshold=ROUTER_ERROR_RATE_THRESHOLD,
+            cooldown=ROUTER_COOLDOWN_S,
+        )
+        self._clients: Dict[str, Any] = {}
+        self._clients_lock = threading.Lock()
+        self.hedge = hedge
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0, "abandoned": 0}
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self.rate_limiter = RateLimiter(rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT)
+        self.cache = LLMCache(
+            LLM_CACHE_PATH,
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+            max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=LLM_CACHE_TTL_HOURS * 3600 if LLM_CACHE_TTL_HOURS else None,
+            enabled=LLM_CACHE_ENABLED,
         )
 
-    def run_prompt(self, system_prompt: str, user_prompt: str) -> str:
-        """Try multiple models dynamically until success."""
+    def _get_client(self, model_name: str) -> Any:
+        """One pooled client (and HTTP session) per model, shared across threads."""
+        with self._clients_lock:
+            client = self._clients.get(model_name)
+            if client is None:
+                client = self.client_factory(
+                    model=model_name,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                )
+                self._clients[model_name] = client
+            return client
+
+    def _call_kwargs(self, model_name: str, max_tokens: Optional[int]) -> Dict[str, Any]:
+        if not max_tokens:
+            return {}
+        return {"max_tokens": token_budget.max_tokens_for(model_name, max_tokens)}
+
+    def _candidates(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int]) -> list:
+        """Router order, limited to models whose context fits the prompt plus `max_tokens`."""
+        models = self.router.candidates()
+        if not max_tokens:
+            return models
+        prompt_tokens = token_budget.count_tokens(system_prompt) + token_budget.count_tokens(user_prompt)
+        fitting = [m for m in models if token_budget.fits(m, prompt_tokens, max_tokens)]
+        if len(fitting) < len(models):
+            metrics.inc("llm_models_skipped_total", len(models) - len(fitting), reason="token_budget")
+        return fitting or models  # nothing fits: let the provider decide
+
+    def _invoke(self, model_name: str, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Single call to one model; outcome and latency are reported to the router."""
+        llm = self._get_client(model_name)
+        messages = _messages(system_prompt, user_prompt)
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        self.rate_limiter.acquire(prompt_tokens)
+        started = time.monotonic()
+        try:
+            resp = llm.invoke(messages, **self._call_kwargs(model_name, max_tokens))
+        except Exception as e:
+            latency = time.monotonic() - started
+            self.router.record_failure(model_name)
+            metrics.record_llm_call(model_name, latency, prompt_tokens, 0, ok=False, error=type(e).__name__)
+            raise
+        latency = time.monotonic() - started
+        self.router.record_success(model_name, latency)
+        usage = (getattr(resp, "response_metadata", None) or {}).get("token_usage") or {}
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(resp.content)
+        self.rate_limiter.record(completion_tokens)
+        metrics.record_llm_call(
+            model_name, latency, usage.get("prompt_tokens") or prompt_tokens, completion_tokens, ok=True,
+        )
+        return resp.content
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.hedge_stats[name] += n
+        metrics.inc("llm_hedge_events_total", n, event=name)
+
+    def _hedge_delay(self, model_name: str) -> float:
+        p = self.router.latency_percentile(model_name, LLM_HEDGE_PERCENTILE)
+        if p is None:
+            return LLM_HEDGE_MAX_DELAY_S
+        return min(max(p, LLM_HEDGE_MIN_DELAY_S), LLM_HEDGE_MAX_DELAY_S)
+
+    def _run_hedged(
+        self,
+        primary: str,
+        secondary: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: Optional[int] = None,
+    ) -> Tuple[str, str]:
+        """
+        Send to `primary`; if it has not answered within its adaptive deadline (or
+        failed), also send to `secondary`. The first response that parses as JSON
+        wins. The loser is cancelled if it has not started yet; a call already on
+        the wire cannot be interrupted, so it is abandoned and its result dropped.
+        """
+        with self._clients_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=LLM_HEDGE_POOL_SIZE)
+        pool = self._hedge_pool
+
+        futures: Dict[Future, str] = {
+            pool.submit(self._invoke, primary, system_prompt, user_prompt, max_tokens): primary
+        }
+        delay = self._hedge_delay(primary)
+        hedged = False  # secondary sent
+        raced = False  # ...while the primary was still in flight (a real hedge, not a failover)
+        fallback: Optional[Tuple[str, str]] = None
+        last_error: Optional[Exception] = None
+
+        while futures:
+            done, _ = wait(futures, timeout=None if hedged else delay, return_when=FIRST_COMPLETED)
+            for fut in done:
+                model_name = futures.pop(fut)
+                try:
+                    content = fut.result()
+                except Exception as e:
+                    print(f"[WARN] Model {model_name} failed: {e}")
+                    last_error = e
+                    continue
+                if _parses_as_json(content):
+                    for other in futures:
+                        if not other.cancel():
+                            self._count("abandoned")
+                    if model_name == secondary and raced:
+                        self._count("hedge_wins")
+                    return model_name, content
+                fallback = fallback or (model_name, content)
+
+            if not hedged:
+                hedged = True
+                raced = bool(futures)
+                if raced:  # primary still running past its deadline
+                    print(f"[INFO] Hedging {primary} with {secondary}")
+                    self._count("hedged")
+                futures[pool.submit(self._invoke, secondary, system_prompt, user_prompt, max_tokens)] = secondary
+
+        if fallback:
+            return fallback
+        raise RuntimeError(f"Hedged call failed. Last error: {last_error}")
+
+    def _cache_key(self, model_name: str, system_prompt: str, user_prompt: str) -> str:
+        return LLMCache.make_key(model_name, self.temperature, system_prompt.strip(), user_prompt.strip())
+
+    def _cached(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        # Any candidate model's answer to the same prompt is acceptable
+        for model_name in self.models:
+            raw = self.cache.get(self._cache_key(model_name, system_prompt, user_prompt))
+            if raw is not None:
+                return raw
+        return None
+
+    def run_prompt(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Try models in router order (fastest healthy first) until success.
+
+        Responses that parse as JSON are cached on disk; pass `use_cache=False`
+        (or set LLM_CACHE_ENABLED = False) to always hit the network. With
+        hedging on, the first two candidates are raced (see `_run_hedged`).
+        `max_tokens` (expected visible output, see core.token_budget) is sent
+        per call and skips models whose context cannot hold prompt + output.
+        """
+        use_cache = use_cache and self.cache.enabled
+        if use_cache:
+            raw = self._cached(system_prompt, user_prompt)
+            self.cache.record(hit=raw is not None)
+            metrics.inc("llm_cache_requests_total", result="miss" if raw is None else "hit")
+            if raw is not None:
+                return raw
+
         last_error = None
-        for _ in range(len(self.models)):
-            model_name = self.models[self.current_index]
+        candidates = self._candidates(system_prompt, user_prompt, max_tokens)
+        if self.hedge and len(candidates) >= 2:
+            primary, secondary = candidates[0], candidates[1]
+            candidates = candidates[2:]
+            try:
+                print(f"[INFO] Using model: {primary} (hedge: {secondary})")
+                model_name, content = self._run_hedged(primary, secondary, system_prompt, user_prompt, max_tokens)
+                if use_cache and _parses_as_json(content):
+                    self.cache.put(self._cache_key(model_name, system_prompt, user_prompt), model_name, content)
+                return content
+            except Exception as e:
+                metrics.inc("llm_fallbacks_total", reason="hedge_failed")
+                last_error = e
+
+        for model_name in candidates:
             try:
                 print(f"[INFO] Using model: {model_name}")
-                llm = self._get_client(model_name)
-                messages = [
-                    SystemMessage(content=system_prompt.strip()),
-                    HumanMessage(content=user_prompt.strip()),
-                ]
-                resp = llm.invoke(messages)
-                return resp.content  # success
+                content = self._invoke(model_name, system_prompt, user_prompt, max_tokens)
+                if use_cache and _parses_as_json(content):
+                    self.cache.put(self._cache_key(model_name, system_prompt, user_prompt), model_name, content)
+                return content  # success
             except Exception as e:
                 print(f"[WARN] Model {model_name} failed: {e}")
+                metrics.inc("llm_fallbacks_total", reason="model_failed")
                 last_error = e
-                self.current_index = (self.current_index + 1) % len(self.models)
 
         raise RuntimeError(f"All models failed. Last error: {last_error}")
 
+    def stream_prompt(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Stream the completion as text chunks.
+
+        Falls back to the next model only while nothing has been yielded yet;
+        a failure mid-stream is raised so the caller can keep what it already
+        has. Cache hits are yielded as a single chunk.
+        """
+        use_cache = use_cache and self.cache.enabled
+        if use_cache:
+            raw = self._cached(system_prompt, user_prompt)
+            self.cache.record(hit=raw is not None)
+            metrics.inc("llm_cache_requests_total", result="miss" if raw is None else "hit")
+            if raw is not None:
+                yield raw
+                return
+
+        messages = _messages(system_prompt, user_prompt)
+        last_error = None
+        for model_name in self._candidates(system_prompt, user_prompt, max_tokens):
+            print(f"[INFO] Streaming from model: {model_name}")
+            llm = self._get_client(model_name)
+            prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            self.rate_limiter.acquire(prompt_tokens)
+            started = time.monotonic()
+            parts = []
+            try:
+                for chunk in llm.stream(messages, **self._call_kwargs(model_name, max_tokens)):
+                    text = chunk.content or ""
+                    if text:
+                        parts.append(text)
+                        yield text
+            except Exception as e:
+                self.router.record_failure(model_name)
+                metrics.record_llm_call(
+                    model_name, time.monotonic() - started, prompt_tokens, estimate_tokens("".join(parts)),
+                    ok=False, kind="stream", error=type(e).__name__,
+                )
+                if parts:
+                    raise
+                print(f"[WARN] Model {model_name} failed: {e}")
+                metrics.inc("llm_fallbacks_total", reason="model_failed")
+                last_error = e
+                continue
+
+            latency = time.monotonic() - started
+            self.router.record_success(model_name, latency)
+            content = "".join(parts)
+            self.rate_limiter.record(estimate_tokens(content))
+            metrics.record_llm_call(model_name, latency, prompt_tokens, estimate_tokens(content), ok=True, kind="stream")
+            if use_cache and _parses_as_json(content):
+                self.cache.put(self._cache_key(model_name, system_prompt, user_prompt), model_name, content)
+            return
+
+        raise RuntimeError(f"All models failed. Last error: {last_error}")
+
+
+def _messages(system_prompt: str, user_prompt: str) -> list:
+    # (role, text) pairs: every LangChain chat model accepts them without importing its message classes
+    return [("system", system_prompt.strip()), ("human", user_prompt.strip())]
+
 
 def parse_json_safely(text: str) -> Dict[str, Any]:
     """Attempt to extract JSON from the LLM output robustly."""
@@ -78,5 +342,57 @@ def parse_json_safely(text: str) -> Dict[str, Any]:
         raise
 
 
+def _parses_as_json(text: str) -> bool:
+    try:
+        parse_json_safely(text)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+_client: Optional[DynamicLLMClient] = None
+_client_lock = threading.Lock()
+_quota_share = 1  # this process gets 1/_quota_share of the provider's RPM / TPM
+
+
+def set_quota_share(n: int) -> None:
+    """
+    Give this process 1/n of the provider quotas (one of n worker processes).
+    Applied when the client is created, so calling it builds nothing.
+    """
+    global _quota_share
+    with _client_lock:
+        _quota_share = max(1, n)
+
+
+def get_llm_client() -> DynamicLLMClient:
+    """The process-wide client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            client = DynamicLLMClient()
+            limiter = client.rate_limiter
+            if limiter.rpm:
+                limiter.rpm = max(1, limiter.rpm // _quota_share)
+            if limiter.tpm:
+                limiter.tpm = max(1, limiter.tpm // _quota_share)
+            _client = client
+        return _client
+
+
+def set_llm_client(client: DynamicLLMClient) -> None:
+    """Replace the process-wide client, e.g. with one backed by a fake model."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+class _LazyClient:
+    """Forwards to get_llm_client(), so importing `llm_client` builds nothing."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_llm_client(), name)
+
+
 # Singleton client for easy importing
-llm_client = DynamicLLMClient()
+llm_client = _LazyClient()
@@ -0,0 +1,373 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_ENABLED, METRICS_DIR, METRICS_MAX_EVENTS, METRICS_SNAPSHOT_TTL_HOURS
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer  # imported by serve_metrics; it costs ~30 ms at startup
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Histogram upper bounds in seconds; spans range from cache hits to whole stages
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_labels(key: LabelKey, extra: LabelKey = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """
+    Process-local counters and histograms. Updates are a dict lookup under one
+    lock, cheap enough to leave on for every LLM call and TTS segment.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # Per series: cumulative bucket counts, then sum and count
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = [0.0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable copy of every series (see `merge`)."""
+        with self._lock:
+            return {
+                "counters": {n: [[list(k), v] for k, v in s.items()] for n, s in self._counters.items()},
+                "histograms": {n: [[list(k), list(h)] for k, h in s.items()] for n, s in self._histograms.items()},
+            }
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add another registry's snapshot (e.g. a worker process) into this one."""
+        with self._lock:
+            for name, series in snapshot.get("counters", {}).items():
+                target = self._counters.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    target[key] = target.get(key, 0.0) + value
+            for name, series in snapshot.get("histograms", {}).items():
+                target = self._histograms.setdefault(name, {})
+                for key, h in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    current = target.setdefault(key, [0.0] * (len(BUCKETS) + 2))
+                    for i, v in enumerate(h):
+                        current[i] += v
+
+    def to_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_render_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(self._histograms[name].items()):
+                    for bound, n in zip(BUCKETS, h):
+                        lines.append(f"{name}_bucket{_render_labels(key, (('le', f'{bound:g}'),))} {n:g}")
+                    lines.append(f"{name}_bucket{_render_labels(key, (('le', '+Inf'),))} {h[-1]:g}")
+                    lines.append(f"{name}_sum{_render_labels(key)} {h[-2]:.6f}")
+                    lines.append(f"{name}_count{_render_labels(key)} {h[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+class JobTrace:
+    """Spans, LLM calls and counters recorded while one job runs."""
+
+    def __init__(self, job_id: str, max_events: int = METRICS_MAX_EVENTS):
+        self.job_id = job_id
+        self.started = time.time()
+        self.max_events = max_events
+        self.spans: List[Dict] = []
+        self.llm_calls: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _append(self, events: List[Dict], event: Dict) -> None:
+        with self._lock:
+            if len(events) < self.max_events:
+                events.append(event)
+            else:
+                self.dropped += 1
+
+    def add_span(self, event: Dict) -> None:
+        self._append(self.spans, event)
+
+    def add_llm_call(self, event: Dict) -> None:
+        self._append(self.llm_calls, event)
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def to_dict(self) -> Dict:
+        """Per-job report: raw events plus per-stage and per-model totals."""
+        with self._lock:
+            spans, calls = list(self.spans), list(self.llm_calls)
+            counters = dict(self.counters)
+
+        stages: Dict[str, float] = {}
+        for s in spans:
+            stages[s["name"]] = round(stages.get(s["name"], 0.0) + s["duration_s"], 4)
+
+        models: Dict[str, Dict[str, float]] = {}
+        for c in calls:
+            m = models.setdefault(c["model"], {"calls": 0, "failures": 0, "latency_s": 0.0,
+                                               "prompt_tokens": 0, "completion_tokens": 0})
+            m["calls"] += 1
+            m["failures"] += 0 if c["ok"] else 1
+            m["latency_s"] = round(m["latency_s"] + c["latency_s"], 4)
+            m["prompt_tokens"] += c["prompt_tokens"]
+            m["completion_tokens"] += c["completion_tokens"]
+
+        return {
+            "job_id": self.job_id,
+            "started": self.started,
+            "duration_s": round(time.time() - self.started, 4),
+            "span_totals_s": stages,
+            "models": models,
+            "counters": counters,
+            "spans": spans,
+            "llm_calls": calls,
+            "dropped_events": self.dropped,
+        }
+
+
+registry = Registry()
+
+# Worker processes run one job at a time, so the active trace is process-wide
+_trace: Optional[JobTrace] = None
+
+
+def start_trace(job_id: str) -> JobTrace:
+    global _trace
+    _trace = JobTrace(job_id)
+    return _trace
+
+
+def end_trace() -> Optional[JobTrace]:
+    global _trace
+    trace, _trace = _trace, None
+    return trace
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    if not METRICS_ENABLED:
+        return
+    registry.inc(name, value, **labels)
+    trace = _trace
+    if trace is not None:
+        trace.inc(name, value)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if METRICS_ENABLED:
+        registry.observe(name, value, **labels)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block as `pipeline_span_seconds{span=name}` and add it to the active
+    job trace. The yielded dict can be filled with extra attributes (counts,
+    bytes) before the block ends.
+    """
+    if not METRICS_ENABLED:
+        yield attrs
+        return
+    started = time.time()
+    t0 = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - t0
+        registry.observe("pipeline_span_seconds", duration, span=name, status=status)
+        trace = _trace
+        if trace is not None:
+            trace.add_span({
+                "name": name,
+                "start": round(started - trace.started, 4),
+                "duration_s": round(duration, 4),
+                "status": status,
+                "thread": threading.current_thread().name,
+                **attrs,
+            })
+
+
+def record_llm_call(
+    model: str,
+    latency: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    ok: bool,
+    kind: str = "invoke",
+    error: Optional[str] = None,
+) -> None:
+    """Record one provider call (successful or not)."""
+    if not METRICS_ENABLED:
+        return
+    status = "ok" if ok else "error"
+    registry.inc("llm_calls_total", model=model, kind=kind, status=status)
+    registry.observe("llm_call_seconds", latency, model=model, kind=kind, status=status)
+    registry.inc("llm_prompt_tokens_total", prompt_tokens, model=model)
+    registry.inc("llm_completion_tokens_total", completion_tokens, model=model)
+    trace = _trace
+    if trace is not None:
+        trace.add_llm_call({
+            "model": model,
+            "kind": kind,
+            "ok": ok,
+            "error": error,
+            "start": round(time.time() - latency - trace.started, 4),
+            "latency_s": round(latency, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        })
+
+
+def write_snapshot(directory: Path = METRICS_DIR) -> Path:
+    """
+    Save this process's registry and refresh the merged `metrics.prom` in
+    `directory` (usable with a node_exporter textfile collector).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"process-{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(registry.snapshot()), encoding="utf-8")
+    tmp.replace(path)
+
+    prom = directory / "metrics.prom"
+    tmp = directory / f"metrics.prom.{os.getpid()}.tmp"
+    tmp.write_text(merged_prometheus(directory), encoding="utf-8")
+    tmp.replace(prom)
+    return prom
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # os.kill would terminate the process on Windows; rely on the TTL
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def _stale(path: Path) -> bool:
+    """Snapshot of a process that has exited, or that has not written one for the TTL."""
+    try:
+        if not _pid_alive(int(path.stem.split("-", 1)[1])):
+            return True
+        return time.time() - path.stat().st_mtime > METRICS_SNAPSHOT_TTL_HOURS * 3600
+    except (OSError, ValueError):
+        return False
+
+
+def merged_prometheus(directory: Path = METRICS_DIR) -> str:
+    """
+    Prometheus text for the current process plus every saved worker snapshot.
+    Stale snapshots (see `_stale`) are deleted instead of merged.
+    """
+    merged = Registry()
+    own = Path(directory) / f"process-{os.getpid()}.json"
+    for path in sorted(Path(directory).glob("process-*.json")):
+        if path == own:
+            continue
+        if _stale(path):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            merged.merge(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue  # being rewritten by its process
+    merged.merge(registry.snapshot())
+    return merged.to_prometheus()
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve `/metrics` (Prometheus text) and `/jobs/<job_id>` (the job's JSON
+    report from the job store) on a daemon thread.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from core.job_store import JobStore
+
+    store = JobStore()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = merged_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4"
+            elif self.path.startswith("/jobs/"):
+                job = store.get_job(self.path[len("/jobs/"):])
+                if job is None or job.get("metrics") is None:
+                    self.send_error(404)
+                    return
+                body = json.dumps(job["metrics"]).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class ModelHealth:
+    """Rolling latency / outcome window and circuit-breaker state for one model."""
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class ModelRouter:
+    """
+    Thread-safe latency-aware model selection with per-model circuit breakers.
+
+    A model's circuit opens after `failure_threshold` consecutive failures or when
+    its rolling error rate reaches `error_rate_threshold`. After `cooldown` seconds
+    it is offered again (half-open); one success closes it, one failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        window: int = 20,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        min_samples: int = 4,
+        cooldown: float = 30.0,
+        default_latency: float = 5.0,
+    ):
+        self.models = list(models)
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.default_latency = default_latency
+        self._health: Dict[str, ModelHealth] = {m: ModelHealth(window) for m in self.models}
+        self._lock = threading.Lock()
+
+    def _expected_latency(self, model: str) -> float:
+        latencies = self._health[model].latencies
+        return statistics.median(latencies) if latencies else self.default_latency
+
+    def _is_open(self, model: str, now: float) -> bool:
+        opened_at = self._health[model].opened_at
+        return opened_at is not None and now - opened_at < self.cooldown
+
+    def candidates(self) -> List[str]:
+        """Models to try, fastest healthy first; open circuits only as a last resort."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [m for m in self.models if not self._is_open(m, now)]
+            tripped = [m for m in self.models if self._is_open(m, now)]
+            healthy.sort(key=lambda m: (self._expected_latency(m), self.models.index(m)))
+            tripped.sort(key=lambda m: self._health[m].opened_at)
+        return healthy + tripped
+
+    def latency_percentile(self, model: str, pct: float) -> Optional[float]:
+        """Rolling latency percentile, or None until `min_samples` calls have succeeded."""
+        with self._lock:
+            latencies = sorted(self._health[model].latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        idx = max(0, math.ceil(pct / 100 * len(latencies)) - 1)
+        return latencies[idx]
+
+    def record_success(self, model: str, latency: float) -> None:
+        with self._lock:
+            health = self._health[model]
+            health.latencies.append(latency)
+            health.outcomes.append(True)
+            health.consecutive_failures = 0
+            health.opened_at = None
+
+    def record_failure(self, model: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            health = self._health[model]
+            health.outcomes.append(False)
+            health.consecutive_failures += 1
+            half_open = health.opened_at is not None
+            if (
+                half_open
+                or health.consecutive_failures >= self.failure_threshold
+                or (len(health.outcomes) >= self.min_samples and health.error_rate >= self.error_rate_threshold)
+            ):
+                health.opened_at = now
+
+    def snapshot(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                m: {
+                    "expected_latency": round(self._expected_latency(m), 3),
+                    "samples": len(h.latencies),
+                    "error_rate": round(h.error_rate, 3),
+                    "open": self._is_open(m, now),
+                }
+                for m, h in self._health.items()
+            }
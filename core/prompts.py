@@ -50,3 +50,64 @@ Return JSON with this schema:
 }}
 """
 )
+
+
+QNA_GENERIC_PROMPT_TEMPLATE = (
+"""
+You are creating interview questions and concise reference answers for the unit: {unit_name}.
+These questions are shared by many candidates: do not assume or mention any
+specific candidate, employer, project or resume detail.
+
+Requirements:
+- Generate {n_long} LONG-answer questions with answers ~5–6 lines each.
+- Generate {n_short} SHORT-answer questions with answers ~1–3 lines each.
+- Mix conceptual, practical and scenario-based items.
+- Be specific; avoid fluff.
+
+Return JSON with this schema:
+{{
+    "unit": "{unit_name}",
+    "long": [
+        {{"q": "...", "a": "..."}},
+        ...
+    ],
+    "short": [
+        {{"q": "...", "a": "..."}},
+        ...
+    ]
+}}
+"""
+)
+
+
+QNA_BATCH_PROMPT_TEMPLATE = (
+"""
+You are creating interview questions and concise reference answers for EACH of these units:
+{unit_list}
+Use the provided resume/profile context to stay personalized.
+
+Requirements (apply to every unit separately):
+- Generate {n_long} LONG-answer questions with answers ~5–6 lines each.
+- Generate {n_short} SHORT-answer questions with answers ~1–3 lines each.
+- Mix conceptual, practical, scenario-based, and resume-grounded items.
+- Be specific; avoid fluff.
+
+Return JSON with this schema, one entry per unit, using the unit names exactly as given:
+{{
+    "units": [
+        {{
+            "unit": "<unit name>",
+            "long": [
+                {{"q": "...", "a": "..."}},
+                ...
+            ],
+            "short": [
+                {{"q": "...", "a": "..."}},
+                ...
+            ]
+        }},
+        ...
+    ]
+}}
+"""
+)
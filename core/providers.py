@@ -0,0 +1,87 @@
+from __future__ import annotations
+import functools
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from config import OPENAI_COMPAT_API_KEY_ENV, OPENAI_COMPAT_BASE_URL, OPENAI_COMPAT_MODELS
+
+# Top ~10 useful Groq models for this project (ordered by preference)
+GROQ_MODELS = [
+    "gemma2-9b-it",
+    "llama-3.1-8b-instant",
+    "llama3-8b-8192",
+    "llama3-70b-8192",
+    "llama-3.3-70b-versatile",
+    "allam-2-7b",
+    "qwen/qwen3-32b",
+    "deepseek-r1-distill-llama-70b",
+    "openai/gpt-oss-20b",
+    "openai/gpt-oss-120b",
+]
+
+ChatFactory = Callable[..., Any]  # (model=, temperature=, max_tokens=) -> chat model
+
+
+@dataclass(frozen=True)
+class LLMProvider:
+    """
+    One LLM backend. `connect(api_key)` checks credentials, imports the SDK
+    and returns the factory DynamicLLMClient builds its per-model clients
+    with; it only runs when a client is first created, so importing the
+    pipeline never loads an SDK or needs a key. `models` are tried in order.
+    """
+
+    connect: Callable[[Optional[str]], ChatFactory]
+    models: List[str]
+
+
+def _connect_groq(api_key: Optional[str]) -> ChatFactory:
+    from dotenv import load_dotenv
+
+    load_dotenv()  # loads variables from .env
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY is not set in environment.")
+    from langchain_groq import ChatGroq
+
+    return functools.partial(ChatGroq, api_key=api_key)
+
+
+def _connect_openai(api_key: Optional[str]) -> ChatFactory:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError:
+        raise RuntimeError('LLM_PROVIDER = "openai" needs the langchain-openai package: pip install langchain-openai') from None
+
+    # Local servers (vLLM, llama.cpp, Ollama, ...) usually accept any key
+    api_key = api_key or os.getenv(OPENAI_COMPAT_API_KEY_ENV) or "not-needed"
+    return functools.partial(ChatOpenAI, base_url=OPENAI_COMPAT_BASE_URL, api_key=api_key)
+
+
+def _connect_fake(api_key: Optional[str]) -> ChatFactory:
+    from core.fake_llm import FakeChatModel
+
+    return FakeChatModel
+
+
+LLM_PROVIDERS: Dict[str, LLMProvider] = {
+    "groq": LLMProvider(_connect_groq, GROQ_MODELS),
+    "openai": LLMProvider(_connect_openai, OPENAI_COMPAT_MODELS),
+    # Stands in for Groq offline, so it answers to the same model names and limits
+    "fake": LLMProvider(_connect_fake, GROQ_MODELS),
+}
+
+
+def register_llm_provider(name: str, provider: LLMProvider) -> None:
+    LLM_PROVIDERS[name] = provider
+
+
+def get_llm_provider(name: str) -> LLMProvider:
+    try:
+        return LLM_PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider: {name!r} (known: {', '.join(LLM_PROVIDERS)})") from None
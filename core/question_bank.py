@@ -0,0 +1,249 @@
+from __future__ import annotations
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import (
+    QUESTION_BANK_ENABLED,
+    QUESTION_BANK_MAX_PER_SUBTOPIC,
+    QUESTION_BANK_MIN_RESUMES,
+    QUESTION_BANK_PATH,
+    QUESTION_BANK_THRESHOLD,
+)
+from core import metrics
+from core.json_stream import valid_item
+from core.similarity import LSHIndex, MinHasher, char_ngrams, jaccard, normalize_name
+
+SECTIONS = ("long", "short")
+
+
+class QuestionBank:
+    """
+    Generic QnA items shared across resumes, keyed by subtopic (SQLite).
+
+    `record` notes which resumes asked for a subtopic; once at least
+    `min_resumes` *other* resumes have, it counts as generic for the next one
+    and `take` serves stored items for it. Only items generated without any
+    resume context may be stored with `add`: a resume-grounded answer would
+    leak one candidate's employers and projects to another.
+    Subtopic names are matched exactly first, then by character 3-gram
+    Jaccard over an in-memory MinHash/LSH index, so "Python OOP" and
+    "Python OOPs" share one entry; items are read through an index on
+    (subtopic, section). Near-duplicate questions within a subtopic are
+    stored once, and each section keeps at most `max_per_subtopic` items.
+    """
+
+    def __init__(
+        self,
+        path: Path = QUESTION_BANK_PATH,
+        threshold: float = QUESTION_BANK_THRESHOLD,
+        min_resumes: int = QUESTION_BANK_MIN_RESUMES,
+        max_per_subtopic: int = QUESTION_BANK_MAX_PER_SUBTOPIC,
+        enabled: bool = QUESTION_BANK_ENABLED,
+    ):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.min_resumes = min_resumes
+        self.max_per_subtopic = max_per_subtopic
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._hasher = MinHasher()
+        # Short names give few shingles, so use many narrow bands (as in pipeline.dedup)
+        self._index = LSHIndex(num_perm=self._hasher.num_perm, bands=32)
+        self._ids: Dict[str, int] = {}  # normalized name → subtopic id
+        self._shingles: Dict[int, Set[str]] = {}
+        self._loaded_id = 0  # highest subtopic id in the in-memory index
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS subtopics ("
+                " id INTEGER PRIMARY KEY, name TEXT UNIQUE, display TEXT, created REAL);"
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " subtopic_id INTEGER, resume_hash TEXT, PRIMARY KEY (subtopic_id, resume_hash));"
+                # Earlier versions banked resume-grounded items; never serve those
+                "DROP TABLE IF EXISTS items;"
+                "CREATE TABLE IF NOT EXISTS generic_items ("
+                " id INTEGER PRIMARY KEY, subtopic_id INTEGER, section TEXT,"
+                " q TEXT, a TEXT, q_norm TEXT, created REAL,"
+                " UNIQUE (subtopic_id, section, q_norm));"
+                "CREATE INDEX IF NOT EXISTS idx_generic_items_subtopic ON generic_items(subtopic_id, section);"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _refresh(self, db: sqlite3.Connection) -> None:
+        """Index subtopics added since the last refresh (possibly by other processes)."""
+        rows = db.execute(
+            "SELECT id, name FROM subtopics WHERE id > ? ORDER BY id", (self._loaded_id,)
+        ).fetchall()
+        for sid, name in rows:
+            grams = char_ngrams(name)
+            self._ids[name] = sid
+            self._shingles[sid] = grams
+            self._index.add(sid, self._hasher.signature(grams))
+            self._loaded_id = sid
+
+    def _find(self, db: sqlite3.Connection, name: str) -> Optional[int]:
+        sid = self._ids.get(name)
+        if sid is not None:
+            return sid
+        self._refresh(db)
+        sid = self._ids.get(name)
+        if sid is not None:
+            return sid
+        grams = char_ngrams(name)
+        best, best_sim = None, self.threshold
+        for cand in self._index.candidates(self._hasher.signature(grams)):
+            sim = jaccard(grams, self._shingles[cand])
+            if sim >= best_sim:
+                best, best_sim = cand, sim
+        return best
+
+    def _subtopic_id(self, db: sqlite3.Connection, unit_name: str) -> int:
+        name = normalize_name(unit_name)
+        sid = self._find(db, name)
+        if sid is None:
+            db.execute(
+                "INSERT OR IGNORE INTO subtopics (name, display, created) VALUES (?, ?, ?)",
+                (name, unit_name, time.time()),
+            )
+            sid = db.execute("SELECT id FROM subtopics WHERE name = ?", (name,)).fetchone()[0]
+            self._refresh(db)
+        return sid
+
+    def _generic(self, db: sqlite3.Connection, sid: int, resume_hash: str) -> bool:
+        others = db.execute(
+            "SELECT COUNT(*) FROM sources WHERE subtopic_id = ? AND resume_hash != ?",
+            (sid, resume_hash),
+        ).fetchone()[0]
+        return others >= self.min_resumes
+
+    def is_generic(self, unit_name: str, resume_hash: str) -> bool:
+        """Whether `take` would serve items for this subtopic to the resume `resume_hash`."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            db = self._db()
+            sid = self._find(db, normalize_name(unit_name))
+            return sid is not None and self._generic(db, sid, resume_hash)
+
+    def take(self, unit_name: str, resume_hash: str, n_long: int, n_short: int) -> Dict[str, List[Dict]]:
+        """
+        Up to `n_long` / `n_short` stored items for a generic subtopic (randomly
+        chosen, so resumes get different mixes). Empty lists when the bank is
+        off, the subtopic is unknown or it is not yet generic.
+        """
+        out: Dict[str, List[Dict]] = {section: [] for section in SECTIONS}
+        if not self.enabled or (n_long <= 0 and n_short <= 0):
+            return out
+        with self._lock:
+            db = self._db()
+            sid = self._find(db, normalize_name(unit_name))
+            if sid is None:
+                metrics.inc("question_bank_lookups_total", result="miss")
+                return out
+            if not self._generic(db, sid, resume_hash):
+                metrics.inc("question_bank_lookups_total", result="not_generic")
+                return out
+            for section, n in zip(SECTIONS, (n_long, n_short)):
+                if n <= 0:
+                    continue
+                rows = db.execute(
+                    "SELECT q, a FROM generic_items WHERE subtopic_id = ? AND section = ?", (sid, section)
+                ).fetchall()
+                out[section] = [{"q": q, "a": a} for q, a in random.sample(rows, min(n, len(rows)))]
+        served = len(out["long"]) + len(out["short"])
+        metrics.inc("question_bank_lookups_total", result="hit" if served else "empty")
+        metrics.inc("question_bank_items_served_total", served)
+        return out
+
+    def record(self, unit_name: str, resume_hash: str) -> None:
+        """Note that the resume `resume_hash` asked for this subtopic."""
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._db()
+            sid = self._subtopic_id(db, unit_name)
+            db.execute("INSERT OR IGNORE INTO sources VALUES (?, ?)", (sid, resume_hash))
+            db.commit()
+
+    def add(self, unit_name: str, qna: Dict) -> int:
+        """
+        Store new generic items (generated without resume context) for this
+        subtopic; returns how many. Invalid items are skipped.
+        """
+        if not self.enabled:
+            return 0
+        added = 0
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            sid = self._subtopic_id(db, unit_name)
+            for section in SECTIONS:
+                stored = db.execute(
+                    "SELECT q_norm FROM generic_items WHERE subtopic_id = ? AND section = ?", (sid, section)
+                ).fetchall()
+                room = self.max_per_subtopic - len(stored)
+                seen = [char_ngrams(q) for (q,) in stored]
+                for item in qna.get(section, []):
+                    if room <= 0:
+                        break
+                    if not valid_item(item):
+                        continue
+                    q_norm = normalize_name(item["q"])
+                    grams = char_ngrams(q_norm)
+                    if not q_norm or any(jaccard(grams, g) >= 0.9 for g in seen):
+                        continue
+                    db.execute(
+                        "INSERT OR IGNORE INTO generic_items (subtopic_id, section, q, a, q_norm, created)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (sid, section, item["q"], item["a"], q_norm, now),
+                    )
+                    seen.append(grams)
+                    room -= 1
+                    added += 1
+            db.commit()
+        return added
+
+    def stock(self, unit_name: str) -> Dict[str, int]:
+        """Stored items per section for this subtopic (0 when unknown or the bank is off)."""
+        out = {section: 0 for section in SECTIONS}
+        if not self.enabled:
+            return out
+        with self._lock:
+            db = self._db()
+            sid = self._find(db, normalize_name(unit_name))
+            if sid is not None:
+                for section, n in db.execute(
+                    "SELECT section, COUNT(*) FROM generic_items WHERE subtopic_id = ? GROUP BY section", (sid,)
+                ):
+                    out[section] = n
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            db = self._db()
+            subtopics = db.execute("SELECT COUNT(*) FROM subtopics").fetchone()[0]
+            items = db.execute("SELECT COUNT(*) FROM generic_items").fetchone()[0]
+        return {"subtopics": subtopics, "items": items}
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """The process-wide question bank (created on first use)."""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+        return _bank
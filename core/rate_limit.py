@@ -0,0 +1,67 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for TPM accounting."""
+    return len(text or "") // 4 + 1
+
+
+class RateLimiter:
+    """
+    Thread-safe sliding-window limiter for requests-per-minute and tokens-per-minute.
+
+    `acquire` blocks until one more request of `tokens` fits inside the window.
+    Tokens that are only known after the call (completion tokens) can be
+    added with `record`.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._token_events: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._requests and now - self._requests[0] >= self.window:
+            self._requests.popleft()
+        while self._token_events and now - self._token_events[0][0] >= self.window:
+            _, tokens = self._token_events.popleft()
+            self._tokens -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        if self.rpm and len(self._requests) >= self.rpm:
+            return self.window - (now - self._requests[0])
+        # A single request larger than the whole budget is let through on an empty window
+        if self.tpm and self._token_events and self._tokens + tokens > self.tpm:
+            return self.window - (now - self._token_events[0][0])
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        if not self.rpm and not self.tpm:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._requests.append(now)
+                    if tokens > 0:
+                        self._token_events.append((now, tokens))
+                        self._tokens += tokens
+                    return
+            time.sleep(min(max(wait, 0.01), 1.0))
+
+    def record(self, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._token_events.append((time.monotonic(), tokens))
+            self._tokens += tokens
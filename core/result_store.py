@@ -0,0 +1,180 @@
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SECTIONS = ("long", "short")
+
+
+class ResultStore:
+    """
+    One job's generated QnA, item by item (SQLite).
+
+    Every unit (topic, subtopic) is a row with its items in generation order;
+    text files, audio and archives are rendered from here, so nothing has to
+    be parsed back out of the .txt files. `put` replaces a unit's items in one
+    transaction and `append` adds a single item, so a streamed unit is
+    queryable while it is being written. Questions and answers are indexed
+    for full-text search (FTS5, or a LIKE scan where SQLite lacks it).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.fts = True
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS units ("
+                " id INTEGER PRIMARY KEY, topic TEXT, subtopic TEXT, unit TEXT,"
+                " complete INTEGER DEFAULT 0, meta TEXT, updated REAL, UNIQUE (topic, subtopic));"
+                "CREATE TABLE IF NOT EXISTS items ("
+                " id INTEGER PRIMARY KEY, unit_id INTEGER, section TEXT, pos INTEGER, q TEXT, a TEXT);"
+                "CREATE INDEX IF NOT EXISTS idx_items_unit ON items(unit_id, section, pos);"
+            )
+            try:
+                self._conn.executescript(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+                    " q, a, content='items', content_rowid='id');"
+                    "CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN"
+                    " INSERT INTO items_fts(rowid, q, a) VALUES (new.id, new.q, new.a); END;"
+                    "CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN"
+                    " INSERT INTO items_fts(items_fts, rowid, q, a) VALUES ('delete', old.id, old.q, old.a); END;"
+                )
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5
+            self._conn.commit()
+        return self._conn
+
+    def _unit_id(self, db: sqlite3.Connection, topic: str, subtopic: str, unit: str, meta: Dict) -> int:
+        db.execute(
+            "INSERT INTO units (topic, subtopic, unit, meta, updated) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (topic, subtopic) DO UPDATE SET unit = excluded.unit, updated = excluded.updated",
+            (topic, subtopic, unit, json.dumps(meta), time.time()),
+        )
+        return db.execute(
+            "SELECT id FROM units WHERE topic = ? AND subtopic = ?", (topic, subtopic)
+        ).fetchone()[0]
+
+    def put(self, topic: str, subtopic: str, qna: Dict, **meta) -> None:
+        """Store a finished unit, replacing whatever was stored for it before."""
+        with self._lock:
+            db = self._db()
+            uid = self._unit_id(db, topic, subtopic, qna.get("unit") or subtopic, meta)
+            db.execute("DELETE FROM items WHERE unit_id = ?", (uid,))
+            db.executemany(
+                "INSERT INTO items (unit_id, section, pos, q, a) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (uid, section, pos, item.get("q", ""), item.get("a", ""))
+                    for section in SECTIONS
+                    for pos, item in enumerate(qna.get(section, []))
+                ],
+            )
+            db.execute("UPDATE units SET complete = 1, meta = ? WHERE id = ?", (json.dumps(meta), uid))
+            db.commit()
+
+    def begin(self, topic: str, subtopic: str) -> None:
+        """Start (re)generating a unit: drop its items and mark it incomplete."""
+        with self._lock:
+            db = self._db()
+            uid = self._unit_id(db, topic, subtopic, subtopic, {})
+            db.execute("DELETE FROM items WHERE unit_id = ?", (uid,))
+            db.execute("UPDATE units SET complete = 0 WHERE id = ?", (uid,))
+            db.commit()
+
+    def append(self, topic: str, subtopic: str, section: str, item: Dict) -> None:
+        """Add one item to a unit started with `begin` (`put` completes it)."""
+        with self._lock:
+            db = self._db()
+            uid = self._unit_id(db, topic, subtopic, subtopic, {})
+            db.execute(
+                "INSERT INTO items (unit_id, section, pos, q, a) SELECT ?, ?, COUNT(*), ?, ?"
+                " FROM items WHERE unit_id = ? AND section = ?",
+                (uid, section, item.get("q", ""), item.get("a", ""), uid, section),
+            )
+            db.commit()
+
+    def get(self, topic: str, subtopic: str) -> Optional[Dict]:
+        """The unit's QnA ({"unit", "long", "short"}), or None if it is not stored complete."""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT id, unit FROM units WHERE topic = ? AND subtopic = ? AND complete = 1", (topic, subtopic)
+            ).fetchone()
+            if row is None:
+                return None
+            items = db.execute(
+                "SELECT section, q, a FROM items WHERE unit_id = ? ORDER BY section, pos", (row[0],)
+            ).fetchall()
+        qna: Dict = {"unit": row[1], "long": [], "short": []}
+        for section, q, a in items:
+            qna.setdefault(section, []).append({"q": q, "a": a})
+        return qna
+
+    def has(self, topic: str, subtopic: str) -> bool:
+        with self._lock:
+            return self._db().execute(
+                "SELECT 1 FROM units WHERE topic = ? AND subtopic = ? AND complete = 1", (topic, subtopic)
+            ).fetchone() is not None
+
+    def units(self) -> List[Tuple[str, str]]:
+        """Every complete unit, in the order first stored."""
+        with self._lock:
+            rows = self._db().execute("SELECT topic, subtopic FROM units WHERE complete = 1 ORDER BY id").fetchall()
+        return [(t, s) for t, s in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Items whose question or answer contains every word of `query`, best
+        match first: [{"topic", "subtopic", "section", "q", "a"}, ...].
+        """
+        words = query.split()
+        if not words:
+            return []
+        with self._lock:
+            db = self._db()
+            if self.fts:
+                # Quote each word so user input is never parsed as FTS syntax
+                match = " ".join('"' + w.replace('"', '""') + '"' for w in words)
+                rows = db.execute(
+                    "SELECT u.topic, u.subtopic, i.section, i.q, i.a FROM items_fts"
+                    " JOIN items i ON i.id = items_fts.rowid JOIN units u ON u.id = i.unit_id"
+                    " WHERE items_fts MATCH ? AND u.complete = 1 ORDER BY bm25(items_fts) LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            else:
+                where = " AND ".join("(i.q || ' ' || i.a) LIKE ?" for _ in words)
+                rows = db.execute(
+                    "SELECT u.topic, u.subtopic, i.section, i.q, i.a FROM items i"
+                    f" JOIN units u ON u.id = i.unit_id WHERE u.complete = 1 AND {where} LIMIT ?",
+                    [f"%{w}%" for w in words] + [limit],
+                ).fetchall()
+        return [{"topic": t, "subtopic": s, "section": sec, "q": q, "a": a} for t, s, sec, q, a in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM items")
+            db.execute("DELETE FROM units")
+            db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            db = self._db()
+            units = db.execute("SELECT COUNT(*) FROM units WHERE complete = 1").fetchone()[0]
+            items = db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        return {"units": units, "items": items}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional
+
+from config import (
+    RETRIEVAL_ENABLED,
+    RETRIEVAL_TOP_K,
+    RETRIEVAL_MAX_CHARS,
+    RETRIEVAL_PASSAGE_CHARS,
+)
+from core.splitter import split_passages
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[+#.][a-z0-9+#]*)?")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall((text or "").lower())
+
+
+class ResumeIndex:
+    """In-memory BM25 index over resume passages (no network, built once per resume)."""
+
+    def __init__(self, text: str, passage_chars: int = RETRIEVAL_PASSAGE_CHARS, k1: float = 1.5, b: float = 0.75):
+        self.passages = split_passages(text, max_chars=passage_chars)
+        self.k1 = k1
+        self.b = b
+        self._tfs = [Counter(tokenize(p)) for p in self.passages]
+        self._lens = [sum(tf.values()) for tf in self._tfs]
+        self._avg_len = (sum(self._lens) / len(self._lens)) if self._lens else 0.0
+        df: Counter = Counter()
+        for tf in self._tfs:
+            df.update(tf.keys())
+        n = len(self.passages)
+        self._idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = set(tokenize(query))
+        out = []
+        for tf, length in zip(self._tfs, self._lens):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_len or 1))
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    score += self._idf[t] * f * (self.k1 + 1) / (f + norm)
+            out.append(score)
+        return out
+
+    def top_passages(self, query: str, k: int = RETRIEVAL_TOP_K, max_chars: int = RETRIEVAL_MAX_CHARS) -> List[int]:
+        """Indices of the best-matching passages that fit in `max_chars`, in document order."""
+        scores = self.scores(query)
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i])
+        # The opening passage (name / summary) keeps answers personalized
+        picked = [0] if self.passages else []
+        used = len(self.passages[0]) if self.passages else 0
+        for i in ranked:
+            if len(picked) >= k + 1:
+                break
+            if i in picked or used + len(self.passages[i]) > max_chars:
+                continue
+            picked.append(i)
+            used += len(self.passages[i])
+        return sorted(picked)
+
+    def context_for(self, query: str, k: int = RETRIEVAL_TOP_K, max_chars: int = RETRIEVAL_MAX_CHARS) -> str:
+        return "\n...\n".join(self.passages[i] for i in self.top_passages(query, k, max_chars))
+
+
+@lru_cache(maxsize=8)
+def get_resume_index(resume_text: str) -> ResumeIndex:
+    return ResumeIndex(resume_text)
+
+
+def resume_context(resume_text: str, query: str, k: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """Resume passages relevant to `query`, or the whole resume when it already fits."""
+    max_chars = max_chars or RETRIEVAL_MAX_CHARS
+    if not RETRIEVAL_ENABLED or len(resume_text or "") <= max_chars:
+        return resume_text
+    return get_resume_index(resume_text).context_for(query, k or RETRIEVAL_TOP_K, max_chars)
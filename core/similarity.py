@@ -0,0 +1,68 @@
+from __future__ import annotations
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set
+
+_MERSENNE = (1 << 61) - 1
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, spell out '&', drop punctuation and collapse whitespace."""
+    name = (name or "").lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^a-z0-9+#]+", " ", name).split())
+
+
+def char_ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of `text` with spaces removed ("ML Ops" == "MLOps")."""
+    compact = text.replace(" ", "")
+    if len(compact) <= n:
+        return {compact} if compact else set()
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+
+def jaccard(a: Set, b: Set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures with stable (process-independent) hashing."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, shingles: Iterable[str]) -> List[int]:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        if not hashes:
+            return [0] * self.num_perm
+        return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._params]
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures for sub-linear candidate lookup."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[tuple, List[Hashable]]] = [defaultdict(list) for _ in range(bands)]
+
+    def _band_keys(self, sig: List[int]):
+        for i in range(self.bands):
+            yield i, tuple(sig[i * self.rows:(i + 1) * self.rows])
+
+    def add(self, key: Hashable, sig: List[int]) -> None:
+        for i, band in self._band_keys(sig):
+            self._buckets[i][band].append(key)
+
+    def candidates(self, sig: List[int]) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        for i, band in self._band_keys(sig):
+            found.update(self._buckets[i].get(band, ()))
+        return found
@@ -1,16 +1,84 @@
+import re
 from typing import List
 
 
 
 
-def chunk_text(text: str, max_chars: int = 12000) -> List[str]:
-    """Lightweight text chunker by character length to keep prompts manageable."""
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """Cut a block longer than `max_chars` on line, then sentence, then hard boundaries."""
+    pieces: List[str] = []
+    while len(block) > max_chars:
+        cut = block.rfind("\n", 0, max_chars)
+        if cut <= max_chars // 2:
+            cut = block.rfind(". ", 0, max_chars)
+            cut = cut + 1 if cut > max_chars // 2 else max_chars
+        pieces.append(block[:cut].strip())
+        block = block[cut:].strip()
+    if block:
+        pieces.append(block)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = 12000, overlap: int = 0) -> List[str]:
+    """
+    Structure-aware chunker: packs whole paragraphs/sections into chunks of at
+    most `max_chars`, only cutting inside a paragraph when it is too long on its
+    own. Each chunk after the first repeats up to `overlap` characters of
+    trailing paragraphs from the previous one so boundary context is not lost.
+    """
     text = text or ""
     if len(text) <= max_chars:
         return [text]
-    chunks = []
-    i = 0
-    while i < len(text):
-        chunks.append(text[i:i+max_chars])
-        i += max_chars
-    return chunks
\ No newline at end of file
+    overlap = min(overlap, max_chars // 2)
+
+    blocks: List[str] = []
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if para:
+            blocks.extend(_split_oversized(para, max_chars - overlap))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for block in blocks:
+        if current and size + len(block) + 2 > max_chars:
+            chunks.append("\n\n".join(current))
+            # Carry trailing paragraphs forward as overlap
+            carried: List[str] = []
+            carried_size = 0
+            for prev in reversed(current):
+                if carried_size + len(prev) + 2 > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_size += len(prev) + 2
+            current, size = carried, carried_size
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def split_blocks(text: str, max_chars: int = 600) -> List[str]:
+    """Paragraphs and bullet items of `text`, each cut to at most `max_chars`."""
+    blocks: List[str] = []
+    for para in re.split(r"\n\s*\n|\n(?=\s*[*\-•]\s)", text or ""):
+        para = para.strip()
+        if not para or set(para) <= set("_-=*"):  # skip separator lines
+            continue
+        blocks.extend(_split_oversized(para, max_chars))
+    return blocks
+
+
+def split_passages(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Split text into retrieval passages on blank lines / bullets, then pack
+    neighbouring short blocks together up to `max_chars`.
+    """
+    passages: List[str] = []
+    for block in split_blocks(text, max_chars):
+        if passages and len(passages[-1]) + len(block) + 1 <= max_chars:
+            passages[-1] += "\n" + block
+        else:
+            passages.append(block)
+    return passages
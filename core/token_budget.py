@@ -0,0 +1,126 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from config import (
+    QNA_TOKENS_PER_LONG,
+    QNA_TOKENS_PER_SHORT,
+    TOKEN_CONTEXT_MARGIN,
+    TOKEN_SAFETY_FACTOR,
+)
+from core.rate_limit import estimate_tokens
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    context: int  # prompt + completion tokens
+    max_output: int  # largest max_tokens the provider accepts
+    reasoning: int = 0  # hidden "thinking" tokens that also count against max_tokens
+
+
+# Provider limits for the Groq models (see core.providers)
+MODEL_LIMITS = {
+    "gemma2-9b-it": ModelLimits(8192, 8192),
+    "llama-3.1-8b-instant": ModelLimits(131072, 131072),
+    "llama3-8b-8192": ModelLimits(8192, 8192),
+    "llama3-70b-8192": ModelLimits(8192, 8192),
+    "llama-3.3-70b-versatile": ModelLimits(131072, 32768),
+    "allam-2-7b": ModelLimits(4096, 4096),
+    "qwen/qwen3-32b": ModelLimits(131072, 40960, reasoning=2048),
+    "deepseek-r1-distill-llama-70b": ModelLimits(131072, 131072, reasoning=2048),
+    "openai/gpt-oss-20b": ModelLimits(131072, 65536, reasoning=1024),
+    "openai/gpt-oss-120b": ModelLimits(131072, 65536, reasoning=1024),
+}
+DEFAULT_LIMITS = ModelLimits(8192, 4096)
+
+# JSON framing per unit ({"unit": ..., "long": [...], "short": [...]})
+UNIT_OVERHEAD_TOKENS = 40
+
+
+def limits_for(model: str) -> ModelLimits:
+    return MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken  # optional: a closer count than the character estimate
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text or "", disallowed_special=()))
+
+
+def output_budget(model: str, prompt_tokens: int) -> int:
+    """Visible completion tokens `model` can return after a prompt of `prompt_tokens`."""
+    lim = limits_for(model)
+    room = min(lim.max_output, lim.context - prompt_tokens - TOKEN_CONTEXT_MARGIN)
+    return max(0, room - lim.reasoning)
+
+
+def fits(model: str, prompt_tokens: int, output_tokens: int) -> bool:
+    return output_tokens <= output_budget(model, prompt_tokens)
+
+
+def max_tokens_for(model: str, output_tokens: int) -> int:
+    """The max_tokens to send `model` for `output_tokens` of visible output."""
+    lim = limits_for(model)
+    return min(lim.max_output, output_tokens + lim.reasoning)
+
+
+def qna_output_tokens(n_long: int, n_short: int, units: int = 1, safety: float = TOKEN_SAFETY_FACTOR) -> int:
+    """Expected completion size (with `safety` headroom) for a QnA response."""
+    raw = n_long * QNA_TOKENS_PER_LONG + n_short * QNA_TOKENS_PER_SHORT + UNIT_OVERHEAD_TOKENS
+    return math.ceil(raw * units * safety)
+
+
+def best_budget(models: Iterable[str], prompt_tokens: int) -> int:
+    return max((output_budget(m, prompt_tokens) for m in models), default=0)
+
+
+def _split(n: int, parts: int) -> List[int]:
+    base, extra = divmod(n, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def plan_qna(prompt_tokens: int, n_long: int, n_short: int, models: Iterable[str]) -> List[Tuple[int, int]]:
+    """
+    Split a unit's question quota into (n_long, n_short) parts so each part's
+    output fits at least one of `models` after the prompt. One part when some
+    model can take the whole unit.
+
+    Raises:
+        ValueError: If not even a single question fits any model
+    """
+    models = list(models)
+    budget = best_budget(models, prompt_tokens)
+    if qna_output_tokens(n_long, n_short) <= budget:
+        return [(n_long, n_short)]
+    if qna_output_tokens(1 if n_long else 0, 0 if n_long else 1) > budget:
+        raise ValueError(f"Prompt of {prompt_tokens} tokens leaves no room for output on any model")
+
+    parts = math.ceil(qna_output_tokens(n_long, n_short) / max(1, budget))
+    while True:
+        plan = [
+            (lo, sh)
+            for lo, sh in zip(_split(n_long, parts), _split(n_short, parts))
+            if lo or sh
+        ]
+        if all(qna_output_tokens(lo, sh) <= budget for lo, sh in plan):
+            return plan
+        parts += 1
+
+
+def plan_batch_size(prompt_tokens: int, n_long: int, n_short: int, models: Iterable[str], cap: int) -> int:
+    """How many units one batched call can return without truncation (at least 1)."""
+    budget = best_budget(models, prompt_tokens)
+    per_unit = qna_output_tokens(n_long, n_short)
+    return max(1, min(cap, budget // per_unit))
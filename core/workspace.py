@@ -0,0 +1,137 @@
+from __future__ import annotations
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from config import WORKSPACE_ROOT, WORKSPACE_TTL_HOURS, WORKSPACE_QUOTA_MB, WORKSPACE_GC_INTERVAL_S
+from core.result_store import ResultStore
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_MARKER = ".last_used"
+
+
+class WorkspaceQuotaError(RuntimeError):
+    """Raised when a workspace grows past its disk quota."""
+
+
+class Workspace:
+    """One job's private directory tree: text/, audio/, bundles/ and the result store."""
+
+    def __init__(self, root: Path, quota_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self._results: Optional[ResultStore] = None
+
+    @property
+    def text_dir(self) -> Path:
+        return self.root / "text"
+
+    @property
+    def audio_dir(self) -> Path:
+        return self.root / "audio"
+
+    @property
+    def bundle_dir(self) -> Path:
+        return self.root / "bundles"
+
+    @property
+    def results_path(self) -> Path:
+        return self.root / "results.sqlite3"
+
+    @property
+    def results(self) -> ResultStore:
+        """The job's structured QnA (opened on first use); text and audio are rendered from it."""
+        if self._results is None:
+            self._results = ResultStore(self.results_path)
+        return self._results
+
+    def create(self) -> "Workspace":
+        for d in (self.text_dir, self.audio_dir, self.bundle_dir):
+            d.mkdir(parents=True, exist_ok=True)
+        self.touch()
+        return self
+
+    def touch(self) -> None:
+        """Mark the workspace as in use (resets its TTL)."""
+        (self.root / _MARKER).touch()
+
+    def usage_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.root.rglob("*") if p.is_file())
+
+    def check_quota(self) -> None:
+        self.touch()
+        if self.quota_bytes and self.usage_bytes() > self.quota_bytes:
+            raise WorkspaceQuotaError(
+                f"Workspace {self.root.name} exceeds its {self.quota_bytes // (1024 * 1024)} MB quota."
+            )
+
+
+class WorkspaceManager:
+    """Hands out per-job workspaces and deletes ones unused for longer than the TTL."""
+
+    def __init__(
+        self,
+        base: Path = WORKSPACE_ROOT,
+        ttl_seconds: float = WORKSPACE_TTL_HOURS * 3600,
+        quota_bytes: Optional[int] = WORKSPACE_QUOTA_MB * 1024 * 1024 if WORKSPACE_QUOTA_MB else None,
+    ):
+        self.base = Path(base)
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self._gc_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, job_id: str) -> Workspace:
+        if not _SAFE_ID.match(job_id):
+            raise ValueError(f"Invalid workspace id: {job_id!r}")
+        return Workspace(self.base / job_id, self.quota_bytes).create()
+
+    def collect_garbage(self, now: Optional[float] = None) -> List[Path]:
+        """Delete workspaces whose last use is older than the TTL; returns removed roots."""
+        now = now or time.time()
+        removed = []
+        if not self.base.exists():
+            return removed
+        for root in self.base.iterdir():
+            if not root.is_dir():
+                continue
+            marker = root / _MARKER
+            last_used = marker.stat().st_mtime if marker.exists() else root.stat().st_mtime
+            if now - last_used > self.ttl_seconds:
+                shutil.rmtree(root, ignore_errors=True)
+                removed.append(root)
+        return removed
+
+    def start_gc(self, interval: float = WORKSPACE_GC_INTERVAL_S) -> None:
+        """Run `collect_garbage` every `interval` seconds on a daemon thread."""
+        if self._gc_thread is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.collect_garbage()
+                except OSError as e:
+                    print(f"[WARN] Workspace cleanup failed: {e}")
+
+        self._gc_thread = threading.Thread(target=loop, name="workspace-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stop_gc(self) -> None:
+        self._stop.set()
+
+
+_manager: Optional[WorkspaceManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """Process-wide workspace manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = WorkspaceManager()
+        return _manager
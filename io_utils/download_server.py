@@ -0,0 +1,74 @@
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from io_utils.zipping import AUDIO_BUNDLE, COMBINED_BUNDLE, TEXT_BUNDLE, stream_bundle
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# kind → (file name, (workspace subdirectory, prefix in the archive) ...)
+KINDS = {
+    "text": (TEXT_BUNDLE, (("text", ""),)),
+    "audio": (AUDIO_BUNDLE, (("audio", ""),)),
+    "both": (COMBINED_BUNDLE, (("text", "texts"), ("audio", "audio"))),
+}
+
+_server: Optional["ThreadingHTTPServer"] = None
+
+
+def download_path(job_id: str, kind: str) -> str:
+    return f"/jobs/{job_id}/{kind}.zip"
+
+
+def serve_downloads(port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """
+    Serve `/jobs/<job_id>/<text|audio|both>.zip` on a daemon thread: the
+    archive is zipped on the fly from the job's workspace and streamed in
+    chunks (see io_utils.zipping.stream_bundle), so neither this process nor
+    the browser session holds a whole archive in memory. Only finished jobs
+    whose workspace still exists are served.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from core.job_store import JobStore
+    from core.workspace import get_workspace_manager
+
+    store = JobStore()
+    manager = get_workspace_manager()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 3 or parts[0] != "jobs" or not parts[2].endswith(".zip"):
+                self.send_error(404)
+                return
+            job_id, kind = parts[1], parts[2][: -len(".zip")]
+            job = store.get_job(job_id) if kind in KINDS else None
+            if job is None or job["result"] is None or not (manager.base / job_id).is_dir():
+                self.send_error(404)
+                return
+            workspace = manager.get(job_id)
+            workspace.touch()
+            file_name, sources = KINDS[kind]
+            dirs = {"text": workspace.text_dir, "audio": workspace.audio_dir}
+
+            # HTTP/1.0 without Content-Length: the body ends when the connection closes
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+            self.end_headers()
+            try:
+                for chunk in stream_bundle((dirs[sub], prefix) for sub, prefix in sources):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # download cancelled
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="download-http", daemon=True).start()
+    return _server
@@ -1,35 +1,96 @@
 from __future__ import annotations
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional
 
 
-from config import PDF_MAX_PAGES
+from config import (
+    PDF_MAX_PAGES,
+    EXTRACT_CACHE_DIR,
+    EXTRACT_PARALLEL_MIN_PAGES,
+    EXTRACT_WORKERS,
+)
+from io_utils.file_io import write_text
 
 
 
 
-def extract_text_any(path: Path) -> str:
+def extract_text_any(path: Path, use_cache: bool = True) -> str:
     ext = path.suffix.lower()
     if ext in {".txt", ".md"}:
         return path.read_text(encoding="utf-8", errors="ignore")
-    if ext == ".pdf":
-        return _extract_pdf(path)
-    if ext in {".docx"}:
-        return _extract_docx(path)
-    # Fallback: try reading as text
-    return path.read_text(encoding="utf-8", errors="ignore")
+    if ext not in {".pdf", ".docx"}:
+        # Fallback: try reading as text
+        return path.read_text(encoding="utf-8", errors="ignore")
+
+    # PDF / DOCX extraction is cached by file content, so re-uploads are free
+    cache_path = _cache_path(path) if use_cache and EXTRACT_CACHE_DIR else None
+    if cache_path and cache_path.exists():
+        return cache_path.read_text(encoding="utf-8")
+    text = _extract_pdf(path) if ext == ".pdf" else _extract_docx(path)
+    if cache_path:
+        write_text(cache_path, text)
+    return text
+
+
+
+
+def _cache_path(path: Path) -> Path:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    h.update(f"|{path.suffix.lower()}|{PDF_MAX_PAGES}".encode())
+    return Path(EXTRACT_CACHE_DIR) / f"{h.hexdigest()}.txt"
 
 
 
 
 def _extract_pdf(path: Path) -> str:
+    return "\n".join(iter_pdf_pages(path))
+
+
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    # Runs in a worker process: each worker opens its own reader
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+
+
+def iter_pdf_pages(path: Path, max_pages: Optional[int] = PDF_MAX_PAGES, workers: Optional[int] = EXTRACT_WORKERS) -> Iterator[str]:
+    """
+    Yield the text of each PDF page, in order.
+
+    Large documents (>= EXTRACT_PARALLEL_MIN_PAGES pages) are split into page
+    ranges that are extracted on a process pool; results still arrive in page
+    order, so callers can start consuming early pages while later ones run.
+    """
     from PyPDF2 import PdfReader
     reader = PdfReader(str(path))
-    text_parts = []
-    max_pages = PDF_MAX_PAGES or len(reader.pages)
-    for i in range(min(len(reader.pages), max_pages)):
-        text_parts.append(reader.pages[i].extract_text() or "")
-    return "\n".join(text_parts)
+    n_pages = min(len(reader.pages), max_pages or len(reader.pages))
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1 or n_pages < EXTRACT_PARALLEL_MIN_PAGES:
+        for i in range(n_pages):
+            yield reader.pages[i].extract_text() or ""
+        return
+
+    # A few ranges per worker keeps the pool busy when page costs are uneven
+    step = max(1, math.ceil(n_pages / (workers * 4)))
+    ranges = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    # "spawn", as in the job queue: a forked child would inherit the server's threads and held locks
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(_extract_page_range, str(path), start, end) for start, end in ranges]
+        for fut in futures:
+            yield from fut.result()
 
 
 
@@ -37,4 +98,4 @@ def _extract_pdf(path: Path) -> str:
 def _extract_docx(path: Path) -> str:
     import docx
     doc = docx.Document(str(path))
-    return "\n".join(p.text for p in doc.paragraphs)
\ No newline at end of file
+    return "\n".join(p.text for p in doc.paragraphs)
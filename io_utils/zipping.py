@@ -1,6 +1,20 @@
 from __future__ import annotations
+import io
+import threading
+import time
 from pathlib import Path
-from zipfile import ZipFile, ZIP_DEFLATED
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+from core import metrics
+
+
+# Already-compressed formats gain nothing from DEFLATE
+STORED_SUFFIXES = {".mp3", ".wav", ".ogg", ".zip", ".png", ".jpg", ".jpeg"}
+
+TEXT_BUNDLE = "interview_qna_texts.zip"
+AUDIO_BUNDLE = "interview_qna_audio.zip"
+COMBINED_BUNDLE = "interview_qna_texts+audio.zip"
 
 
 
@@ -10,5 +24,148 @@ def zip_dir(dir_path: Path, zip_path: Path) -> Path:
     with ZipFile(zip_path, "w", compression=ZIP_DEFLATED) as zf:
         for p in dir_path.rglob("*"):
             if p.is_file():
-                zf.write(p, p.relative_to(dir_path))
-    return zip_path
\ No newline at end of file
+                zf.write(p, p.relative_to(dir_path), compress_type=_compression_for(p))
+    return zip_path
+
+
+
+
+def _compression_for(path: Path) -> int:
+    return ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else ZIP_DEFLATED
+
+
+
+
+def _zip_info(arcname: str, path: Path, mtime: Optional[float] = None) -> ZipInfo:
+    info = ZipInfo(arcname, date_time=time.localtime(path.stat().st_mtime if mtime is None else mtime)[:6])
+    info.compress_type = _compression_for(path)
+    if mtime is None:
+        info.file_size = path.stat().st_size
+    return info
+
+
+
+
+def _walk(root: Path) -> List[Tuple[Path, str]]:
+    if not root.exists():
+        return []
+    return [(p, p.relative_to(root).as_posix()) for p in sorted(root.rglob("*")) if p.is_file()]
+
+
+
+
+class BundleWriter:
+    """
+    The text, audio and combined archives, open for appending while files are
+    still being produced. Each added file goes to its own archive and to the
+    combined one (under texts/ or audio/). Safe to call from several threads.
+    """
+
+    PREFIXES = {"text": "texts", "audio": "audio"}
+
+    def __init__(self, out_dir: Path):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.paths = {
+            "text": out_dir / TEXT_BUNDLE,
+            "audio": out_dir / AUDIO_BUNDLE,
+            "both": out_dir / COMBINED_BUNDLE,
+        }
+        self._zips = {kind: ZipFile(path, "w") for kind, path in self.paths.items()}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.bytes_in = 0
+
+    def add(self, kind: str, rel: str, data: bytes, mtime: Optional[float] = None) -> None:
+        """Add `data` as `rel` to the "text" or "audio" archive and to the combined one."""
+        mtime = time.time() if mtime is None else mtime
+        rel_path = Path(rel)
+        with self._lock:
+            self._zips[kind].writestr(_zip_info(rel, rel_path, mtime), data)
+            self._zips["both"].writestr(_zip_info(f"{self.PREFIXES[kind]}/{rel}", rel_path, mtime), data)
+            self.bytes_in += len(data)
+
+    def add_file(self, kind: str, path: Path, rel: str) -> None:
+        self.add(kind, rel, path.read_bytes(), mtime=path.stat().st_mtime)
+
+    def close(self) -> Dict[str, Path]:
+        with self._lock:
+            for zf in self._zips.values():
+                zf.close()
+        metrics.observe("zip_build_seconds", time.perf_counter() - self._started)
+        metrics.inc("zip_input_bytes_total", self.bytes_in)
+        metrics.inc("zip_output_bytes_total", sum(p.stat().st_size for p in self.paths.values()))
+        return dict(self.paths)
+
+
+
+
+def build_bundles(
+    text_root: Path, audio_root: Path, out_dir: Path, texts: Optional[Iterable[Tuple[str, str]]] = None
+) -> Dict[str, Path]:
+    """
+    Write the text, audio and combined archives in a single pass over both trees.
+
+    Each file is read once and written to its own archive and to the combined
+    one (under texts/ or audio/), so the combined archive holds the files
+    directly rather than nested zips. MP3s are STORED, text is DEFLATEd.
+    With `texts` ((relative path, text) pairs, e.g. rendered from the result
+    store) the text files are taken from there instead of `text_root`.
+
+    Returns:
+        Dict: "text" / "audio" / "both" → archive path
+    """
+    writer = BundleWriter(out_dir)
+    try:
+        roots = [("audio", audio_root)]
+        if texts is None:
+            roots.insert(0, ("text", text_root))
+        else:
+            for rel, text in texts:
+                writer.add("text", rel, text.encode("utf-8"))
+        for kind, root in roots:
+            for path, rel in _walk(root):
+                writer.add_file(kind, path, rel)
+    finally:
+        paths = writer.close()
+    return paths
+
+
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+
+
+def stream_bundle(sources: Iterable[Tuple[Path, str]], block_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Yield a zip archive of every file under each (root, prefix) source as bytes
+    chunks, without building the archive in memory or on disk. Used by the
+    streamed download route (io_utils/download_server.py).
+    """
+    sink = _ChunkSink()
+    with ZipFile(sink, "w") as zf:
+        for root, prefix in sources:
+            for path, rel in _walk(root):
+                arcname = f"{prefix}/{rel}" if prefix else rel
+                with zf.open(_zip_info(arcname, path), "w") as dst, open(path, "rb") as src:
+                    for block in iter(lambda: src.read(block_size), b""):
+                        dst.write(block)
+                        yield from sink.drain()
+                yield from sink.drain()
+    yield from sink.drain()  # central directory
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Tuple
+
+from config import DEDUP_THRESHOLD
+from core.similarity import LSHIndex, MinHasher, char_ngrams, jaccard, normalize_name
+
+Unit = Tuple[str, str]  # (topic, subtopic)
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)*")
+_QUALIFIER = re.compile(r"\(([^)]*)\)|\[([^\]]*)\]")
+
+
+def _qualifiers(name: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Numbers and parenthetical qualifiers of a name: "Python 3", "Data Scientist (Acme)"."""
+    quals = tuple(sorted(normalize_name(a or b) for a, b in _QUALIFIER.findall(name)))
+    return tuple(_NUMBER.findall(_QUALIFIER.sub(" ", name))), quals
+
+
+def collapse_subtopics(
+    topic_tree: Dict,
+    threshold: float = DEDUP_THRESHOLD,
+) -> Tuple[Dict, Dict[Unit, List[Unit]], Dict[str, int]]:
+    """
+    Collapse near-duplicate subtopics across the whole tree.
+
+    Subtopics are compared by character 3-gram Jaccard similarity of their
+    normalized names (MinHash/LSH for candidates, exact Jaccard to confirm),
+    so "ML Ops" / "MLOps" / "mlops" or the same subtopic under two topics
+    become one cluster. Names whose numbers or parenthetical qualifiers
+    differ ("Python 2" / "Python 3", "Data Scientist (Acme)" / "Data
+    Scientist") are different units and never merge. The first occurrence
+    represents the cluster.
+
+    Returns:
+        Tuple: (tree with only representatives,
+                representative unit → other units that should get the same QnA,
+                stats with "units", "clusters" and "calls_saved")
+    """
+    units: List[Unit] = [
+        (t.get("topic", "General"), sub)
+        for t in topic_tree.get("topics", [])
+        for sub in t.get("subtopics", [])
+    ]
+    hasher = MinHasher()
+    # Short names give few shingles, so use many narrow bands to keep recall high
+    index = LSHIndex(num_perm=hasher.num_perm, bands=32)
+    shingles = [char_ngrams(normalize_name(sub)) for _, sub in units]
+    qualifiers = [_qualifiers(sub) for _, sub in units]
+
+    parent = list(range(len(units)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, grams in enumerate(shingles):
+        sig = hasher.signature(grams)
+        for j in index.candidates(sig):
+            if qualifiers[i] == qualifiers[j] and jaccard(grams, shingles[j]) >= threshold:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)  # earliest unit stays the root
+        index.add(i, sig)
+
+    aliases: Dict[Unit, List[Unit]] = {}
+    kept: Dict[str, List[str]] = {}
+    for i, unit in enumerate(units):
+        root = find(i)
+        if root == i:
+            kept.setdefault(unit[0], []).append(unit[1])
+        elif units[root] != unit:
+            aliases.setdefault(units[root], []).append(unit)
+
+    deduped = {"topics": [{"topic": t, "subtopics": subs} for t, subs in kept.items()]}
+    clusters = sum(len(subs) for subs in kept.values())
+    stats = {"units": len(units), "clusters": clusters, "calls_saved": len(units) - clusters}
+    return deduped, aliases, stats
@@ -0,0 +1,135 @@
+# pipeline/incremental.py
+from __future__ import annotations
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import INCREMENTAL_MAX_CHANGED, INCREMENTAL_TOPIC_MIN_CHARS, RETRIEVAL_PASSAGE_CHARS
+from core.job_store import JobStore
+from core.retrieval import tokenize
+from core.splitter import split_blocks
+from core.workspace import Workspace
+from pipeline.save_outputs import qna_path, render_units
+from pipeline.topic_extraction import get_topic_tree, merge_topic_trees
+
+Unit = Tuple[str, str]  # (topic, subtopic)
+
+# Words that say nothing about which resume section a subtopic draws on
+_STOPWORDS = {"a", "an", "and", "for", "in", "of", "on", "or", "the", "to", "vs", "with", "using"}
+
+
+def section_diff(old_text: str, new_text: str) -> Tuple[List[str], List[str]]:
+    """
+    (added, removed) resume sections: paragraphs and bullet items present in
+    only one version, compared with whitespace normalized. An edited line
+    shows up as one removed and one added section.
+    """
+    def sections(text: str) -> Counter:
+        return Counter(" ".join(b.split()) for b in split_blocks(text, RETRIEVAL_PASSAGE_CHARS))
+
+    old, new = sections(old_text), sections(new_text)
+    return list((new - old).elements()), list((old - new).elements())
+
+
+def _terms(text: str) -> Set[str]:
+    return {t for t in tokenize(text) if t not in _STOPWORDS}
+
+
+def dirty_units(topic_tree: Dict, added: List[str], removed: List[str]) -> Set[Unit]:
+    """
+    Units touched by the edit: those whose subtopic terms appear in an added
+    or removed section (see section_diff), i.e. the sections BM25 retrieval
+    would match for the subtopic. Edits elsewhere (a new job title line, an
+    unrelated bullet) leave the unit clean, even though a resume short enough
+    to be sent whole, or a shift in passage packing, changes its prompt text.
+    """
+    changed = [_terms(section) for section in added + removed]
+    dirty: Set[Unit] = set()
+    for t in topic_tree.get("topics", []):
+        topic = t.get("topic", "General")
+        for sub in t.get("subtopics", []):
+            terms = _terms(sub)
+            if any(terms & section for section in changed):
+                dirty.add((topic, sub))
+    return dirty
+
+
+def _copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)  # same filesystem: no data copied
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def prepare_incremental(
+    store: JobStore,
+    job_id: str,
+    base_job: str,
+    resume_text: str,
+    workspace: Workspace,
+    base_workspace: Workspace,
+    audio_ext: str,
+) -> Optional[str]:
+    """
+    Set up `job_id` as an update of `base_job`: the base topic tree is reused
+    (plus subtopics mined from substantial new text), unchanged units are copied
+    from the base workspace's result store (text rendered, audio linked) and
+    marked done, and every other unit is left pending for the normal run.
+
+    Returns:
+        A note describing the update, or None when a full run is needed
+        (no usable base, or too much of the resume changed)
+    """
+    old_text = store.get_resume_text(base_job)
+    topic_tree = store.get_topic_tree(base_job)
+    if not old_text or not topic_tree or not base_workspace.results_path.exists():
+        return None
+
+    added, removed = section_diff(old_text, resume_text)
+    changed_chars = sum(map(len, added)) + sum(map(len, removed))
+    total_chars = max(1, len(old_text) + len(resume_text))
+    if changed_chars / total_chars > INCREMENTAL_MAX_CHANGED:
+        return None
+
+    new_subtopics = 0
+    added_text = "\n\n".join(added)
+    if len(added_text) >= INCREMENTAL_TOPIC_MIN_CHARS:
+        # Only subtopics grounded in the new text; the rest of the tree still fits the resume
+        added_terms = _terms(added_text)
+        mined = get_topic_tree(added_text)
+        grounded = {"topics": []}
+        for t in mined.get("topics", []):
+            subs = [s for s in t.get("subtopics", []) if _terms(s) & added_terms]
+            if subs:
+                grounded["topics"].append({"topic": t.get("topic", "General"), "subtopics": subs})
+        before = sum(len(t.get("subtopics", [])) for t in topic_tree.get("topics", []))
+        topic_tree = merge_topic_trees([topic_tree, grounded])
+        new_subtopics = sum(len(t.get("subtopics", [])) for t in topic_tree.get("topics", [])) - before
+
+    store.set_topic_tree(job_id, topic_tree)
+    dirty = dirty_units(topic_tree, added, removed)
+    kept = 0
+    for topic, sub in store.done_units(base_job):
+        qna = None if (topic, sub) in dirty else base_workspace.results.get(topic, sub)
+        if qna is None:
+            continue
+        workspace.results.put(topic, sub, qna, reused_from=base_job)
+        render_units(workspace.results, [(topic, sub)], workspace.text_dir)
+        rel = qna_path(topic, sub, workspace.text_dir).relative_to(workspace.text_dir)
+        audio = base_workspace.audio_dir / rel.with_suffix(f".{audio_ext}")
+        if audio.exists():
+            _copy(audio, workspace.audio_dir / rel.with_suffix(f".{audio_ext}"))
+        store.mark_unit(job_id, topic, sub, "done")
+        kept += 1
+    base_workspace.touch()
+
+    total = sum(len(t.get("subtopics", [])) for t in topic_tree.get("topics", []))
+    return (
+        f"Updated from your previous upload: {len(added)} section(s) added or edited, {len(removed)} removed; "
+        f"reused {kept} of {total} units"
+        + (f", {new_subtopics} new subtopic(s)" if new_subtopics else "")
+        + "."
+    )
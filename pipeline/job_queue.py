@@ -0,0 +1,187 @@
+# pipeline/job_queue.py
+from __future__ import annotations
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    DOWNLOAD_PORT,
+    INCREMENTAL_ENABLED,
+    JOB_MAX_PER_USER,
+    JOB_QUEUE_DEPTH,
+    JOB_WORKERS,
+    METRICS_ENABLED,
+    METRICS_PORT,
+)
+from core import metrics
+from core.job_store import JobStore, resume_hash
+from core.workspace import get_workspace_manager
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue or a user's share of it is full."""
+
+
+def _init_worker(n_workers: int) -> None:
+    # Provider quotas are per account: split them across worker processes. The
+    # client itself is only built by the first job, so a missing API key fails
+    # that job with its real error instead of breaking the pool.
+    from core.llm_client import set_quota_share
+
+    set_quota_share(n_workers)
+
+
+def _run_job(job_id: str, resume_text: str, mode: str) -> None:
+    """Worker-process entry point; all state goes through the job store."""
+    from pipeline.runner import run_pipeline
+
+    store = JobStore()
+    store.set_status(job_id, "running")
+    trace = metrics.start_trace(job_id)
+    try:
+        result = run_pipeline(
+            store,
+            job_id,
+            resume_text,
+            mode,
+            progress=lambda step, status, pct: store.set_progress(job_id, step, status, pct),
+        )
+        store.set_result(job_id, result)
+    except Exception as e:
+        traceback.print_exc()
+        store.set_error(job_id, f"{type(e).__name__}: {e}")
+    finally:
+        metrics.end_trace()
+        if METRICS_ENABLED:
+            store.set_metrics(job_id, trace.to_dict())
+            try:
+                metrics.write_snapshot()
+            except OSError as e:
+                print(f"[WARN] Could not write metrics: {e}")
+
+
+class JobQueue:
+    """
+    Local job queue: pipeline runs execute on a pool of worker processes and
+    report progress into the SQLite job store, so any script run (or a
+    refreshed browser tab) can poll a job by its ID.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_active: int = JOB_QUEUE_DEPTH,
+        max_per_user: int = JOB_MAX_PER_USER,
+    ):
+        self.workers = max(1, workers)
+        self.max_active = max_active
+        self.max_per_user = max_per_user
+        self.store = JobStore()
+        self._pool = self._new_pool()
+        self._active: Dict[str, Tuple[Optional[str], Future]] = {}
+        self._lock = threading.Lock()
+        # Expired job workspaces are removed in the background
+        get_workspace_manager().start_gc()
+        if METRICS_ENABLED and METRICS_PORT:
+            metrics.serve_metrics(METRICS_PORT)
+        if DOWNLOAD_PORT:
+            from io_utils.download_server import serve_downloads
+
+            serve_downloads(DOWNLOAD_PORT)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # "spawn" keeps workers independent of the server's threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.workers,),
+        )
+
+    def _on_done(self, job_id: str, fut: Future) -> None:
+        """
+        Fail the job if its worker never reported an outcome: a killed worker
+        process breaks the pool and every job on it ends with an exception
+        here instead of a result or error in the job store.
+        """
+        if fut.cancelled():
+            self.store.set_error(job_id, "Job was cancelled")
+            return
+        exc = fut.exception()
+        if exc is None:
+            return
+        if isinstance(exc, BrokenProcessPool):
+            self.store.set_error(job_id, f"Worker process died ({exc})")
+        else:
+            self.store.set_error(job_id, f"{type(exc).__name__}: {exc}")
+
+    def _prune(self) -> None:
+        for job_id in [j for j, (_, fut) in self._active.items() if fut.done()]:
+            del self._active[job_id]
+
+    def active_jobs(self, user_id: Optional[str] = None) -> List[str]:
+        with self._lock:
+            self._prune()
+            return [j for j, (owner, _) in self._active.items() if user_id is None or owner == user_id]
+
+    def submit(self, resume_text: str, mode: str, user_id: Optional[str] = None) -> str:
+        """
+        Queue a pipeline run and return its job ID. An unfinished job for the
+        same resume and mode is resumed (or returned as-is if already queued).
+        A new job for an edited resume builds on the user's previous job (see
+        pipeline.incremental).
+
+        Raises:
+            QueueFullError: If the queue or this user's limit is full
+        """
+        r_hash = resume_hash(resume_text)
+        with self._lock:
+            self._prune()
+            job_id = self.store.find_resumable(r_hash, mode)
+            if job_id in self._active:
+                return job_id
+            if len(self._active) >= self.max_active:
+                raise QueueFullError(f"Job queue is full ({self.max_active} jobs); try again shortly.")
+            if user_id is not None and sum(owner == user_id for owner, _ in self._active.values()) >= self.max_per_user:
+                raise QueueFullError(f"You already have {self.max_per_user} job(s) running.")
+
+            if job_id is None:
+                base_job = None
+                if INCREMENTAL_ENABLED and user_id is not None:
+                    base_job = self.store.find_previous(user_id, mode, r_hash)
+                job_id = self.store.create_job(
+                    r_hash, mode, user_id=user_id, status="queued", resume_text=resume_text, base_job=base_job
+                )
+            else:
+                self.store.start_run(job_id)
+            try:
+                fut = self._pool.submit(_run_job, job_id, resume_text, mode)
+            except BrokenProcessPool:
+                # A worker died earlier; its jobs already failed in _on_done
+                self._pool = self._new_pool()
+                fut = self._pool.submit(_run_job, job_id, resume_text, mode)
+            fut.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+            self._active[job_id] = (user_id, fut)
+            return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get_job(job_id)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue shared by every Streamlit session."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
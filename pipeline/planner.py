@@ -0,0 +1,277 @@
+# pipeline/planner.py
+from __future__ import annotations
+import math
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    DEDUP_ENABLED,
+    LLM_PRICES_PER_M_TOKENS,
+    LLM_PROVIDER,
+    LLM_RPM_LIMIT,
+    LLM_TPM_LIMIT,
+    N_LONG_Q,
+    N_SHORT_Q,
+    PIPELINE_OVERLAP,
+    PLANNER_DEFAULT_CALL_S,
+    PLANNER_DEFAULT_REPAIR_RATE,
+    PLANNER_DEFAULT_TTS_CHARS_PER_S,
+    PLANNER_HISTORY_JOBS,
+    QNA_BATCH_MODE,
+    QNA_MAX_WORKERS,
+    QUESTION_BANK_PERSONAL_SHARE,
+    RETRIEVAL_MAX_CHARS,
+    TOPIC_CHUNK_CHARS,
+    TOPIC_CHUNK_OVERLAP,
+    TOPIC_MAX_WORKERS,
+    TOPIC_TREE_OUTPUT_TOKENS,
+    TTS_MAX_WORKERS,
+)
+from core import token_budget
+from core.job_store import JobStore, resume_hash
+from core.prompts import QNA_BATCH_PROMPT_TEMPLATE
+from core.providers import get_llm_provider
+from core.question_bank import get_question_bank
+from core.splitter import chunk_text
+from pipeline.dedup import collapse_subtopics
+from pipeline.qna_generation import SYSTEM_PROMPT, _qna_prompt, generic_share, qna_batch_size
+from pipeline.topic_extraction import TOPIC_SYSTEM_PROMPT, _chunk_prompt
+
+CHARS_PER_TOKEN = 4  # generated text → characters to voice
+# TOPIC_TREE_PROMPT's limits, planned for when the topic tree is not known yet
+MAX_TOPICS, MAX_SUBTOPICS = 12, 10
+
+
+def history(store: Optional[JobStore] = None, limit: int = PLANNER_HISTORY_JOBS) -> Dict[str, Dict]:
+    """
+    Rates observed in recent job reports: seconds per completion token for
+    each model, TTS characters per second (per TTS worker) and follow-up
+    (repair) calls per successful LLM call. Only calls that succeeded count,
+    for both the latency and the tokens.
+    """
+    rates: Dict[str, Dict] = {"llm_s_per_token": {}, "tts_chars_per_s": None, "repair_rate": None}
+    if store is None:
+        return rates
+    per_model: Dict[str, List[float]] = {}
+    tts: List[float] = []
+    ok_calls = repairs = 0
+    for report in store.recent_metrics(limit):
+        totals: Dict[str, List[float]] = {}  # model -> [latency_s, completion_tokens] of ok calls
+        for c in report.get("llm_calls", []):
+            if c.get("ok") and c.get("completion_tokens"):
+                t = totals.setdefault(c["model"], [0.0, 0])
+                t[0] += c["latency_s"]
+                t[1] += c["completion_tokens"]
+                ok_calls += 1
+        for model, (latency, tokens) in totals.items():
+            per_model.setdefault(model, []).append(latency / tokens)
+        counters = report.get("counters", {})
+        if counters.get("tts_seconds_total"):
+            tts.append(counters.get("tts_chars_total", 0.0) / counters["tts_seconds_total"])
+        repairs += counters.get("qna_repair_calls_total", 0)
+    rates["llm_s_per_token"] = {m: statistics.median(v) for m, v in per_model.items()}
+    rates["tts_chars_per_s"] = statistics.median(tts) if tts else None
+    rates["repair_rate"] = repairs / ok_calls if ok_calls else None
+    return rates
+
+
+def _pick_model(models: List[str], prompt_tokens: int, output_tokens: int) -> str:
+    """The model a healthy client would try first (see DynamicLLMClient._candidates)."""
+    fitting = [m for m in models if token_budget.fits(m, prompt_tokens, output_tokens)]
+    return (fitting or models)[0]
+
+
+def _call_seconds(model: str, output_tokens: int, rates: Dict[str, Dict]) -> Tuple[float, str]:
+    per_token = rates["llm_s_per_token"].get(model)
+    if per_token:
+        return per_token * output_tokens, "history"
+    return PLANNER_DEFAULT_CALL_S, "default"
+
+
+def plan_job(
+    topic_tree: Dict, resume_text: str, store: Optional[JobStore] = None, extract_topics: bool = False
+) -> Dict:
+    """
+    Dry run of QnA generation, TTS and packaging for `topic_tree` (the units
+    still to generate): nothing is sent to a model or synthesized. With
+    `extract_topics`, the topic-extraction calls that produce the tree
+    (one per resume chunk, at TOPIC_TREE_OUTPUT_TOKENS) are planned too.
+
+    Calls are counted the way the run would make them (dedup, question bank,
+    batching, token-budget splits), each assigned to the first of the
+    provider's models it fits. Follow-up calls for items a completion missed
+    are added at the repair rate of recent jobs (else
+    PLANNER_DEFAULT_REPAIR_RATE), each costed as an average QnA call. Only
+    token counts are needed, so no LLM client (or rate limiter) is created.
+    Wall time uses recent per-model latencies and TTS rates from the job
+    store (else defaults), TOPIC_MAX_WORKERS / QNA_MAX_WORKERS /
+    TTS_MAX_WORKERS and the account's LLM_RPM_LIMIT / LLM_TPM_LIMIT.
+
+    Returns:
+        Dict: {"units", "generated_units", "llm_calls", "topic_calls", "repair_calls",
+               "prompt_tokens", "completion_tokens",
+               "models": {model: {"calls", "prompt_tokens", "completion_tokens"}}, "tts_chars",
+               "cost_usd" (None without prices), "estimated_s": {"topics", "qna", "tts", "total"},
+               "latency_source", "limits"}
+    """
+    units = [(t.get("topic", "General"), s) for t in topic_tree.get("topics", []) for s in t.get("subtopics", [])]
+    gen_tree = collapse_subtopics(topic_tree)[0] if DEDUP_ENABLED else topic_tree
+    candidates = list(get_llm_provider(LLM_PROVIDER).models)
+    rates = history(store)
+    bank, key = get_question_bank(), resume_hash(resume_text)
+
+    models: Dict[str, Dict[str, int]] = {}
+    sources = set()
+    call_seconds = 0.0
+    generated = set()  # subtopics that get a QnA file (from the model, the bank or both)
+
+    def add_call(prompt_tokens: int, output_tokens: int) -> None:
+        nonlocal call_seconds
+        model = _pick_model(candidates, prompt_tokens, output_tokens)
+        m = models.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        m["calls"] += 1
+        m["prompt_tokens"] += prompt_tokens
+        m["completion_tokens"] += output_tokens
+        seconds, source = _call_seconds(model, output_tokens, rates)
+        call_seconds += seconds
+        sources.add(source)
+
+    batch = qna_batch_size(models=candidates) if QNA_BATCH_MODE else 1
+    full_chars = token_budget.qna_output_tokens(N_LONG_Q, N_SHORT_Q, safety=1.0) * CHARS_PER_TOKEN
+    for t in gen_tree.get("topics", []):
+        singles = []
+        subs = t.get("subtopics", [])
+        generic = [s for s in subs if bank.is_generic(s, key)]
+        batched = [s for s in subs if s not in generic] if batch > 1 else []
+        for i in range(0, len(batched), batch):
+            group = batched[i:i + batch]
+            if len(group) == 1:
+                singles.extend(group)
+                continue
+            template = QNA_BATCH_PROMPT_TEMPLATE.format(
+                unit_list="\n".join(f"- {u}" for u in group), n_long=N_LONG_Q, n_short=N_SHORT_Q
+            )
+            prompt_tokens = token_budget.count_tokens(SYSTEM_PROMPT + template) + token_budget.count_tokens(
+                resume_text[:RETRIEVAL_MAX_CHARS * 2]
+            )
+            add_call(prompt_tokens, token_budget.qna_output_tokens(N_LONG_Q, N_SHORT_Q, units=len(group), safety=1.0))
+            generated.update(group)
+        singles.extend(s for s in subs if s not in batched)
+
+        for sub in singles:
+            n_long, n_short = N_LONG_Q, N_SHORT_Q
+            if sub in generic:  # mirrors qna_generation._from_bank
+                stock = bank.stock(sub)
+                g_long = max(0, generic_share(N_LONG_Q) - stock["long"])
+                g_short = max(0, generic_share(N_SHORT_Q) - stock["short"])
+                if g_long or g_short:  # the bank is short: generic items are generated first
+                    add_call(
+                        token_budget.count_tokens(SYSTEM_PROMPT)
+                        + token_budget.count_tokens(_qna_prompt(None, sub, g_long, g_short)),
+                        token_budget.qna_output_tokens(g_long, g_short, safety=1.0),
+                    )
+                n_long = math.ceil(N_LONG_Q * QUESTION_BANK_PERSONAL_SHARE)
+                n_short = math.ceil(N_SHORT_Q * QUESTION_BANK_PERSONAL_SHARE)
+            prompt_tokens = token_budget.count_tokens(SYSTEM_PROMPT) + token_budget.count_tokens(
+                _qna_prompt(resume_text, sub, n_long, n_short)
+            )
+            try:
+                parts = token_budget.plan_qna(prompt_tokens, n_long, n_short, candidates)
+            except ValueError:
+                parts = [(n_long, n_short)]  # the run will fail this unit; count the attempt
+            for lo, sh in parts:
+                add_call(prompt_tokens, token_budget.qna_output_tokens(lo, sh, safety=1.0))
+            generated.add(sub)
+
+    qna_calls = sum(m["calls"] for m in models.values())
+    repair_rate = rates["repair_rate"] if rates["repair_rate"] is not None else PLANNER_DEFAULT_REPAIR_RATE
+    repair_calls = math.ceil(qna_calls * repair_rate)
+    if repair_calls:
+        # A repair asks for a unit's missing items only, so an average QnA call is a safe margin
+        avg_prompt = sum(m["prompt_tokens"] for m in models.values()) // qna_calls
+        avg_output = sum(m["completion_tokens"] for m in models.values()) // qna_calls
+        for _ in range(repair_calls):
+            add_call(avg_prompt, avg_output)
+
+    topic_calls, topic_s = 0, 0.0
+    if extract_topics:  # mirrors topic_extraction.get_topic_tree; runs before any QnA call
+        qna_seconds = call_seconds
+        chunks = chunk_text(resume_text, max_chars=TOPIC_CHUNK_CHARS, overlap=TOPIC_CHUNK_OVERLAP)
+        for idx, chunk in enumerate(chunks, start=1):
+            add_call(
+                token_budget.count_tokens(TOPIC_SYSTEM_PROMPT)
+                + token_budget.count_tokens(_chunk_prompt(chunk, idx, len(chunks))),
+                TOPIC_TREE_OUTPUT_TOKENS,
+            )
+        topic_calls = len(chunks)
+        topic_s = (call_seconds - qna_seconds) / max(1, min(TOPIC_MAX_WORKERS, topic_calls))
+        call_seconds = qna_seconds
+
+    llm_calls = sum(m["calls"] for m in models.values())
+    prompt_tokens = sum(m["prompt_tokens"] for m in models.values())
+    completion_tokens = sum(m["completion_tokens"] for m in models.values())
+    tts_chars = len(units) * full_chars  # aliases of a deduplicated subtopic are voiced too
+
+    workers = max(1, QNA_MAX_WORKERS)
+    rpm, tpm = LLM_RPM_LIMIT, LLM_TPM_LIMIT
+    qna_s = call_seconds / workers
+    # Quotas bound topic extraction and QnA together
+    if rpm:
+        qna_s = max(qna_s, llm_calls / rpm * 60 - topic_s)
+    if tpm:
+        qna_s = max(qna_s, (prompt_tokens + completion_tokens) / tpm * 60 - topic_s)
+    tts_rate = rates["tts_chars_per_s"] or PLANNER_DEFAULT_TTS_CHARS_PER_S
+    tts_s = tts_chars / (tts_rate * max(1, TTS_MAX_WORKERS))
+    if PIPELINE_OVERLAP:
+        # TTS runs behind generation; only the last unit's audio is left at the end
+        total_s = topic_s + max(qna_s, tts_s) + (tts_s / len(units) if units else 0.0)
+    else:
+        total_s = topic_s + qna_s + tts_s
+
+    cost = None
+    priced = [m for m in models if m in LLM_PRICES_PER_M_TOKENS]
+    if priced:
+        cost = sum(
+            models[m]["prompt_tokens"] / 1e6 * LLM_PRICES_PER_M_TOKENS[m][0]
+            + models[m]["completion_tokens"] / 1e6 * LLM_PRICES_PER_M_TOKENS[m][1]
+            for m in priced
+        )
+
+    return {
+        "units": len(units),
+        "generated_units": len(generated),
+        "llm_calls": llm_calls,
+        "topic_calls": topic_calls,
+        "repair_calls": repair_calls,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "models": models,
+        "tts_chars": tts_chars,
+        "cost_usd": round(cost, 4) if cost is not None else None,
+        "estimated_s": {
+            "topics": round(topic_s, 1), "qna": round(qna_s, 1), "tts": round(tts_s, 1), "total": round(total_s, 1),
+        },
+        "latency_source": "+".join(sorted(sources)) or "none",
+        "limits": {"qna_workers": workers, "tts_workers": TTS_MAX_WORKERS, "rpm": rpm, "tpm": tpm},
+    }
+
+
+def assumed_topic_tree(max_topics: int = MAX_TOPICS, max_subtopics: int = MAX_SUBTOPICS) -> Dict:
+    """The largest tree topic extraction may return, with placeholder names that never dedup."""
+    return {
+        "topics": [
+            {"topic": f"Topic {t}", "subtopics": [f"Subtopic {t}.{s}" for s in range(1, max_subtopics + 1)]}
+            for t in range(1, max_topics + 1)
+        ]
+    }
+
+
+def describe_plan(plan: Dict) -> str:
+    """One line for the UI / job notes."""
+    minutes, seconds = divmod(int(round(plan["estimated_s"]["total"])), 60)
+    cost = f", ~${plan['cost_usd']:.2f}" if plan.get("cost_usd") is not None else ""
+    return (
+        f"Plan: {'up to ' if plan.get('assumed_tree') else ''}{plan['units']} units, {plan['llm_calls']} LLM calls, "
+        f"~{plan['prompt_tokens'] + plan['completion_tokens']:,} tokens{cost}, "
+        f"{plan['tts_chars']:,} characters of audio, ~{minutes}m {seconds:02d}s"
+    )
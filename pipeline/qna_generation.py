@@ -1,41 +1,348 @@
 from __future__ import annotations
 import json
-from typing import Dict
+import math
+from typing import Dict, Iterator, List, Tuple
 
-from config import N_LONG_Q, N_SHORT_Q
+from config import (
+    N_LONG_Q,
+    N_SHORT_Q,
+    QNA_MAX_BATCH_SIZE,
+    QNA_REPAIR_ATTEMPTS,
+    QUESTION_BANK_PERSONAL_SHARE,
+    RETRIEVAL_MAX_CHARS,
+    RETRIEVAL_TOP_K,
+)
+from core import metrics, token_budget
+from core.job_store import resume_hash
+from core.json_stream import QnAStreamParser, salvage_batch, salvage_qna, valid_item
 from core.llm_client import llm_client, parse_json_safely
-from core.prompts import QNA_PROMPT_TEMPLATE
+from core.prompts import QNA_BATCH_PROMPT_TEMPLATE, QNA_GENERIC_PROMPT_TEMPLATE, QNA_PROMPT_TEMPLATE
+from core.question_bank import get_question_bank
+from core.retrieval import resume_context
 
 
-def build_qna_json(resume_text: str, unit_name: str) -> Dict:
-    print(f"unit_name:{unit_name}\nn_long:{N_LONG_Q}\nn_short:{N_SHORT_Q}")
+SYSTEM_PROMPT = "You generate interview QnA."
 
-    prompt = QNA_PROMPT_TEMPLATE.format(
+
+def _qna_prompt(
+    resume_text: str | None,
+    unit_name: str,
+    n_long: int = N_LONG_Q,
+    n_short: int = N_SHORT_Q,
+    avoid: List[str] | None = None,
+) -> str:
+    """The QnA prompt for one unit; `resume_text=None` asks for generic, resume-free items."""
+    template = QNA_PROMPT_TEMPLATE if resume_text is not None else QNA_GENERIC_PROMPT_TEMPLATE
+    prompt = template.format(
         unit_name=unit_name,
-        n_long=N_LONG_Q,
-        n_short=N_SHORT_Q,
+        n_long=n_long,
+        n_short=n_short,
     )
-    print("Prompt is ready......")
+    if resume_text is None:
+        user = f"Task: Create questions for: {unit_name}"
+    else:
+        context = resume_context(resume_text, unit_name)
+        user = f"Resume/Profile Context:\n{context}\n\nTask: Create questions for: {unit_name}"
+    if avoid:
+        asked = "\n".join(f"- {q}" for q in avoid)
+        user += f"\n\nThese questions were already asked; do not repeat them:\n{asked}"
+    return prompt + "\n\n" + user
 
-    user = f"Resume/Profile Context:\n{resume_text}\n\nTask: Create questions for: {unit_name}"
-    raw = llm_client.run_prompt("You generate interview QnA.", prompt + "\n\n" + user)
 
-    for retry in range(5):
-        try:
-            data = parse_json_safely(raw)
+def plan_unit(
+    resume_text: str, unit_name: str, n_long: int = N_LONG_Q, n_short: int = N_SHORT_Q
+) -> List[Tuple[int, int]]:
+    """
+    (n_long, n_short) per call for one unit: a single call when the whole
+    quota fits some model's output budget, otherwise several smaller ones.
+    """
+    if n_long <= 0 and n_short <= 0:
+        return []
+    prompt_tokens = token_budget.count_tokens(SYSTEM_PROMPT) + token_budget.count_tokens(
+        _qna_prompt(resume_text, unit_name, n_long, n_short)
+    )
+    plan = token_budget.plan_qna(prompt_tokens, n_long, n_short, llm_client.router.candidates())
+    if len(plan) > 1:
+        metrics.inc("qna_split_units_total")
+        print(f"[INFO] {unit_name}: output too large for one call, split into {len(plan)} parts")
+    return plan
+
+
+def _asked(data: Dict) -> List[str]:
+    return [item.get("q", "") for item in data["long"] + data["short"] if isinstance(item, dict)]
+
+
+def _request_items(resume_text: str | None, unit_name: str, n_long: int, n_short: int, avoid: List[str]) -> Dict[str, List[Dict]]:
+    """
+    One QnA call; returns its valid "long" / "short" items. A completion that
+    is not valid JSON keeps every complete item it does contain.
+    """
+    prompt = _qna_prompt(resume_text, unit_name, n_long, n_short, avoid)
+    raw = llm_client.run_prompt(SYSTEM_PROMPT, prompt, max_tokens=token_budget.qna_output_tokens(n_long, n_short))
+    try:
+        data = parse_json_safely(raw)
+    except ValueError:
+        metrics.inc("qna_parse_failures_total", mode="single")
+        return salvage_qna(raw)
+    if not isinstance(data, dict):
+        return salvage_qna(raw)
+    return _valid_items(data)
+
+
+def _valid_items(entry: Dict) -> Dict[str, List[Dict]]:
+    """The "long" / "short" items of a parsed unit object that have string "q" and "a"."""
+    return {
+        section: [
+            {"q": item["q"], "a": item["a"]}
+            for item in (entry.get(section) if isinstance(entry.get(section), list) else [])
+            if valid_item(item)
+        ]
+        for section in ("long", "short")
+    }
+
+
+def _fill(data: Dict, items: Dict[str, List[Dict]], n_long: int, n_short: int) -> None:
+    """Append `items` to `data`, never past the requested counts."""
+    for section, quota in (("long", n_long), ("short", n_short)):
+        room = quota - len(data[section])
+        data[section].extend(items[section][:max(0, room)])
+
+
+def _build_part(resume_text: str | None, unit_name: str, n_long: int, n_short: int, avoid: List[str]) -> Dict:
+    """
+    Up to `n_long` / `n_short` items for one planned call. Items missing after
+    the first completion (truncated, malformed or simply short) are requested
+    in up to QNA_REPAIR_ATTEMPTS small follow-up calls.
+    """
+    data: Dict = {"unit": unit_name, "long": [], "short": []}
+    _fill(data, _request_items(resume_text, unit_name, n_long, n_short, avoid), n_long, n_short)
+
+    for attempt in range(QNA_REPAIR_ATTEMPTS):
+        missing_long = n_long - len(data["long"])
+        missing_short = n_short - len(data["short"])
+        if missing_long <= 0 and missing_short <= 0:
             break
-        except Exception:
-            raw = llm_client.run_prompt("You generate interview QnA.", prompt + "\n\n" + user)
-            print(f"Retry No : {retry}")
+        print(f"[INFO] {unit_name}: requesting {missing_long} long / {missing_short} short missing items")
+        metrics.inc("qna_repair_calls_total")
+        try:
+            items = _request_items(
+                resume_text, unit_name, max(0, missing_long), max(0, missing_short), avoid + _asked(data)
+            )
+        except Exception as e:
+            print(f"[WARN] Follow-up {attempt + 1} for {unit_name} failed: {e}")
             continue
+        _fill(data, items, n_long, n_short)
+    return data
+
 
-    # Minimal schema guardrails
-    data.setdefault("unit", unit_name)
-    data.setdefault("long", [])
-    data.setdefault("short", [])
+def generic_share(n: int) -> int:
+    """Items of a section that a generic subtopic takes from the question bank."""
+    return n - math.ceil(n * QUESTION_BANK_PERSONAL_SHARE)
+
+
+def _from_bank(resume_text: str, unit_name: str) -> Dict:
+    """
+    Unit dict pre-filled with generic items. A generic subtopic gets all but
+    QUESTION_BANK_PERSONAL_SHARE of each section from the bank; when the bank
+    is short, the missing generic items are generated without any resume
+    context and banked. The rest is left for a resume-specific generation,
+    which never enters the bank.
+    """
+    key = resume_hash(resume_text)
+    bank = get_question_bank()
+    data: Dict = {"unit": unit_name, "long": [], "short": []}
+    try:
+        if bank.is_generic(unit_name, key):
+            want_long, want_short = generic_share(N_LONG_Q), generic_share(N_SHORT_Q)
+            data.update(bank.take(unit_name, key, want_long, want_short))
+            missing_long, missing_short = want_long - len(data["long"]), want_short - len(data["short"])
+            if missing_long > 0 or missing_short > 0:
+                metrics.inc("question_bank_generic_calls_total")
+                try:
+                    part = _build_part(None, unit_name, max(0, missing_long), max(0, missing_short), _asked(data))
+                except Exception as e:  # the resume-specific generation covers the gap
+                    print(f"[WARN] Generic items for {unit_name} failed: {e}")
+                    part = {"long": [], "short": []}
+                bank.add(unit_name, part)
+                data["long"].extend(part["long"])
+                data["short"].extend(part["short"])
+            print(f"[INFO] {unit_name}: {len(data['long'])} long / {len(data['short'])} short generic items")
+        # Recorded after the check, so a resume never counts toward its own threshold
+        bank.record(unit_name, key)
+    except Exception as e:  # the bank is an optimization, never a reason to fail a unit
+        print(f"[WARN] Question bank unavailable for {unit_name}: {e}")
     return data
 
 
+def _record_request(resume_text: str, unit_name: str) -> None:
+    try:
+        get_question_bank().record(unit_name, resume_hash(resume_text))
+    except Exception as e:
+        print(f"[WARN] Question bank update failed for {unit_name}: {e}")
+
+
+def build_qna_json(resume_text: str, unit_name: str) -> Dict:
+    """
+    QnA dict {"unit", "long", "short"} for one unit; every item has string
+    "q" and "a". Generic subtopics start from generic question-bank items
+    and only the remainder is generated from the resume.
+
+    Raises:
+        ValueError: If no valid item could be generated
+    """
+    print(f"unit_name:{unit_name}\nn_long:{N_LONG_Q}\nn_short:{N_SHORT_Q}")
+
+    data = _from_bank(resume_text, unit_name)
+    plan = plan_unit(resume_text, unit_name, N_LONG_Q - len(data["long"]), N_SHORT_Q - len(data["short"]))
+    for n_long, n_short in plan:
+        part = _build_part(resume_text, unit_name, n_long, n_short, _asked(data))
+        data["long"].extend(part["long"])
+        data["short"].extend(part["short"])
+    if not data["long"] and not data["short"]:
+        raise ValueError(f"No valid QnA items generated for {unit_name}")
+    if len(data["long"]) < N_LONG_Q or len(data["short"]) < N_SHORT_Q:
+        metrics.inc("qna_incomplete_units_total")
+        print(f"[WARN] {unit_name}: {len(data['long'])}/{N_LONG_Q} long, {len(data['short'])}/{N_SHORT_Q} short")
+    return data
+
+
+def _stream_part(resume_text: str, unit_name: str, n_long: int, n_short: int, avoid: List[str]) -> Iterator[Tuple[str, Dict]]:
+    parser = QnAStreamParser()
+    prompt = _qna_prompt(resume_text, unit_name, n_long, n_short, avoid)
+    max_tokens = token_budget.qna_output_tokens(n_long, n_short)
+    for chunk in llm_client.stream_prompt(SYSTEM_PROMPT, prompt, max_tokens=max_tokens):
+        for section, item in parser.feed(chunk):
+            if valid_item(item):
+                yield section, {"q": item["q"], "a": item["a"]}
+
+
+def stream_qna_items(resume_text: str, unit_name: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield ("long" | "short", {"q", "a"}) items as soon as each one is complete
+    in the streamed completion. If the stream breaks or comes up short, the
+    items already yielded are kept and only the missing ones are requested
+    (see `_build_part`). Question-bank items for generic subtopics come first.
+    """
+    data = _from_bank(resume_text, unit_name)
+    for section in ("long", "short"):
+        for item in data[section]:
+            yield section, item
+    asked: List[str] = _asked(data)
+    plan = plan_unit(resume_text, unit_name, N_LONG_Q - len(data["long"]), N_SHORT_Q - len(data["short"]))
+    for n_long, n_short in plan:
+        part: Dict = {"unit": unit_name, "long": [], "short": []}
+        try:
+            for section, item in _stream_part(resume_text, unit_name, n_long, n_short, asked):
+                if len(part[section]) >= (n_long if section == "long" else n_short):
+                    continue
+                part[section].append(item)
+                yield section, item
+        except Exception as e:
+            if not asked and not part["long"] and not part["short"]:
+                raise
+            metrics.inc("qna_stream_truncated_total")
+            print(f"[WARN] Stream for {unit_name} ended early: {e}")
+        asked.extend(_asked(part))
+        data["long"].extend(part["long"])
+        data["short"].extend(part["short"])
+
+        missing_long, missing_short = n_long - len(part["long"]), n_short - len(part["short"])
+        if missing_long > 0 or missing_short > 0:
+            metrics.inc("qna_repair_calls_total")
+            try:
+                rest = _build_part(resume_text, unit_name, max(0, missing_long), max(0, missing_short), asked)
+            except Exception as e:
+                print(f"[WARN] Follow-up for {unit_name} failed: {e}")
+                continue
+            for section in ("long", "short"):
+                for item in rest[section]:
+                    yield section, item
+                data[section].extend(rest[section])
+            asked.extend(_asked(rest))
+
+
+def qna_batch_size(prompt_tokens: int | None = None, models: List[str] | None = None) -> int:
+    """How many units fit in one completion without risking truncation (on `models`, default the client's)."""
+    if prompt_tokens is None:
+        # Template plus the widened retrieval context a batch gets
+        template = QNA_BATCH_PROMPT_TEMPLATE.format(unit_list="", n_long=N_LONG_Q, n_short=N_SHORT_Q)
+        prompt_tokens = token_budget.count_tokens(SYSTEM_PROMPT + template) + RETRIEVAL_MAX_CHARS * 2 // 4
+    return token_budget.plan_batch_size(
+        prompt_tokens, N_LONG_Q, N_SHORT_Q, models or llm_client.router.candidates(), QNA_MAX_BATCH_SIZE
+    )
+
+
+def _unit_key(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+
+def build_qna_batch(resume_text: str, unit_names: List[str]) -> Dict[str, Dict]:
+    """
+    Generate QnA for several units in one call.
+
+    Returns unit name → QnA dict (same shape as `build_qna_json`). Items are
+    validated like `_request_items` (complete items of malformed JSON are
+    salvaged) and a unit that came back short gets the usual follow-up calls
+    for its missing items. Units the model skipped are left out so the caller
+    can generate them individually; so are generic subtopics, which
+    build_qna_json starts from the question bank.
+    """
+    key = resume_hash(resume_text)
+    bank = get_question_bank()
+    unit_names = [u for u in unit_names if not bank.is_generic(u, key)]
+    if not unit_names:
+        return {}
+    unit_list = "\n".join(f"- {u}" for u in unit_names)
+    prompt = QNA_BATCH_PROMPT_TEMPLATE.format(
+        unit_list=unit_list,
+        n_long=N_LONG_Q,
+        n_short=N_SHORT_Q,
+    )
+    context = resume_context(
+        resume_text,
+        " ".join(unit_names),
+        k=RETRIEVAL_TOP_K * len(unit_names),
+        max_chars=RETRIEVAL_MAX_CHARS * 2,
+    )
+    user = f"Resume/Profile Context:\n{context}\n\nTask: Create questions for each unit listed above."
+    max_tokens = token_budget.qna_output_tokens(N_LONG_Q, N_SHORT_Q, units=len(unit_names))
+    raw = llm_client.run_prompt(SYSTEM_PROMPT, prompt + "\n\n" + user, max_tokens=max_tokens)
+    try:
+        data = parse_json_safely(raw)
+        entries = data.get("units") if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("batch completion has no \"units\" list")
+        entries = [(e.get("unit", ""), _valid_items(e)) for e in entries if isinstance(e, dict)]
+    except ValueError:
+        metrics.inc("qna_parse_failures_total", mode="batch")
+        entries = list(salvage_batch(raw).items())
+        if not entries:
+            raise
+
+    wanted = {_unit_key(u): u for u in unit_names}
+    results: Dict[str, Dict] = {}
+    for unit, items in entries:
+        name = wanted.get(_unit_key(unit))
+        if name is None or name in results:
+            continue
+        if not items["long"] and not items["short"]:
+            continue
+        qna: Dict = {"unit": name, "long": [], "short": []}
+        _fill(qna, items, N_LONG_Q, N_SHORT_Q)
+        missing_long, missing_short = N_LONG_Q - len(qna["long"]), N_SHORT_Q - len(qna["short"])
+        if missing_long > 0 or missing_short > 0:
+            metrics.inc("qna_repair_calls_total")
+            try:
+                rest = _build_part(resume_text, name, max(0, missing_long), max(0, missing_short), _asked(qna))
+                qna["long"].extend(rest["long"])
+                qna["short"].extend(rest["short"])
+            except Exception as e:
+                print(f"[WARN] Follow-up for {name} failed: {e}")
+        results[name] = qna
+        _record_request(resume_text, name)
+    return results
+
+
 def qna_to_text(qna: Dict) -> str:
     lines = [f"Unit: {qna.get('unit', '')}", "", "LONG-ANSWER:"]
     for i, item in enumerate(qna.get("long", []), 1):
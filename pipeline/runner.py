@@ -0,0 +1,283 @@
+# pipeline/runner.py
+from __future__ import annotations
+import shutil
+from typing import Callable, Dict, List, Optional
+
+from config import QNA_BATCH_MODE, QNA_STREAMING, DEDUP_ENABLED, PIPELINE_OVERLAP, TTS_BACKEND
+from core import metrics
+from core.job_store import JobStore, resume_hash
+from core.workspace import Workspace, get_workspace_manager
+from io_utils.zipping import build_bundles
+from pipeline.dedup import collapse_subtopics
+from pipeline.incremental import prepare_incremental
+from pipeline.planner import assumed_topic_tree, describe_plan, plan_job
+from pipeline.qna_generation import build_qna_batch, build_qna_json, qna_batch_size, stream_qna_items
+from pipeline.save_outputs import qna_path, render_units, rendered_units, save_all_qna
+from pipeline.topic_extraction import get_topic_tree
+from pipeline.tts_backends import TTSBackend, get_tts_backend
+from pipeline.tts_convert import txt_to_mp3_tree
+from pipeline.unit_pipeline import UnitPipeline
+
+STEPS = [
+    "Extracting Topics",
+    "Planning Q&A",
+    "Clearing Old Outputs",
+    "Saving Q&A Files",
+    "Generating Audio (MP3s)",
+    "Creating ZIP Bundles",
+]
+
+ProgressFn = Callable[[str, str, int], None]  # (step, "running" | "done", pct)
+
+
+def create_test_topic_tree(original_tree, max_topics=2, max_subtopics=2):
+    test_tree = {'topics': []}
+    limited_topics = original_tree.get('topics', [])[:max_topics]
+    for topic_entry in limited_topics:
+        topic = topic_entry.get('topic')
+        subtopics = topic_entry.get('subtopics', [])[:max_subtopics]
+        test_tree['topics'].append({'topic': topic, 'subtopics': subtopics})
+    return test_tree
+
+
+def run_pipeline(
+    store: JobStore,
+    job_id: str,
+    resume_text: str,
+    mode: str,
+    progress: Optional[ProgressFn] = None,
+    workspace: Optional[Workspace] = None,
+    tts_backend: Optional[TTSBackend] = None,
+) -> Dict:
+    """
+    Run topic → QnA → TTS → zip for one job. A job that already has a topic
+    tree is resumed: only missing or failed units are regenerated. A new job
+    with a base job (an earlier upload of an edited resume) reuses the base's
+    units that no changed resume section affects (see pipeline.incremental).
+
+    All files go to the job's own workspace (by default the one the workspace
+    manager keeps for `job_id`), so concurrent jobs never touch each other's
+    output. Every unit's QnA is stored in the workspace's result store and its
+    text file rendered from there; later steps find units through the store.
+    The workspace quota is checked after every step that writes files.
+    `tts_backend` overrides the configured TTS backend (e.g. a fake for benchmarks).
+
+    Raises:
+        WorkspaceQuotaError: If the job's files exceed the workspace quota
+
+    Returns:
+        Dict: {"bundles": {"text" | "audio" | "both": path}, "failed": [[topic, subtopic], ...],
+               "notes": [str, ...], "plan": see pipeline.planner.plan_job,
+               "results": path of the job's core.result_store.ResultStore}
+    """
+    progress = progress or (lambda step, status, pct: None)
+    notes: List[str] = []
+    workspace = workspace or get_workspace_manager().get(job_id)
+    text_dir, audio_dir, results = workspace.text_dir, workspace.audio_dir, workspace.results
+    tts_backend = tts_backend or get_tts_backend(TTS_BACKEND)
+
+    topic_tree = store.get_topic_tree(job_id)
+    resuming = topic_tree is not None
+    if resuming:
+        notes.append("Resumed the previous unfinished run for this resume.")
+
+    # STEP 1: Extract Topics (or reuse the base job's tree for an edited resume)
+    step = "Extracting Topics"
+    progress(step, "running", 10)
+    with metrics.span(step, resumed=resuming) as attrs:
+        base_job = None if resuming else store.get_base_job(job_id)
+        if base_job:
+            note = prepare_incremental(
+                store, job_id, base_job, resume_text, workspace,
+                get_workspace_manager().get(base_job), tts_backend.ext,
+            )
+            if note:
+                notes.append(note)
+                topic_tree = store.get_topic_tree(job_id)
+                resuming = attrs["incremental"] = True
+        if not resuming:
+            topic_tree = get_topic_tree(
+                resume_text,
+                progress_callback=lambda pct: progress(step, "running", pct),
+            )
+
+            # Limit for test mode
+            if mode == "test":
+                topic_tree = create_test_topic_tree(topic_tree, max_topics=2, max_subtopics=2)
+            store.set_topic_tree(job_id, topic_tree)
+    progress(step, "done", 100)
+
+    # STEP 2: Estimate the remaining work (no model calls)
+    step = "Planning Q&A"
+    progress(step, "running", 50)
+    with metrics.span(step) as attrs:
+        plan = plan_job(store.pending_tree(job_id), resume_text, store)
+        attrs.update(llm_calls=plan["llm_calls"], estimated_s=plan["estimated_s"]["total"])
+        notes.append(describe_plan(plan))
+    progress(step, "done", 100)
+
+    # STEP 3: Clear outputs (a resumed job keeps the units it already stored)
+    step = "Clearing Old Outputs"
+    progress(step, "running", 30)
+    with metrics.span(step) as attrs:
+        if resuming:
+            store.reset_missing(job_id, results.has)
+            # Text files are renderings of the store, so lost ones are simply redrawn
+            lost = [(t, s) for t, s in store.done_units(job_id) if not qna_path(t, s, text_dir).exists()]
+            attrs["rendered"] = len(render_units(results, lost, text_dir))
+        else:
+            if text_dir.exists():
+                shutil.rmtree(text_dir)
+            results.clear()
+        text_dir.mkdir(parents=True, exist_ok=True)
+    progress(step, "done", 100)
+
+    # STEP 4: Save Q&A Files
+    step = "Saving Q&A Files"
+    progress(step, "running", 0)
+    aliases = {}
+    gen_tree = store.pending_tree(job_id)
+    pending = [(t.get("topic", "General"), sub) for t in gen_tree.get("topics", []) for sub in t.get("subtopics", [])]
+    if DEDUP_ENABLED:
+        gen_tree, aliases, dedup_stats = collapse_subtopics(gen_tree)
+        if dedup_stats["calls_saved"]:
+            notes.append(
+                f"Merged near-duplicate subtopics: {dedup_stats['units']} → "
+                f"{dedup_stats['clusters']} ({dedup_stats['calls_saved']} generations saved)"
+            )
+
+    def save_units(on_saved=None) -> Dict:
+        with metrics.span(step) as attrs:
+            failed = save_all_qna(
+                gen_tree,
+                resume_text,
+                build_qna_json,
+                text_dir,
+                progress_callback=lambda pct: progress(step, "running", pct),
+                batch_builder=build_qna_batch if QNA_BATCH_MODE else None,
+                batch_size=qna_batch_size(),
+                stream_builder=stream_qna_items if QNA_STREAMING else None,
+                aliases=aliases,
+                on_unit=store.unit_callback(job_id),
+                on_saved=on_saved,
+                results=results,
+            )
+            attrs["units"] = sum(len(t.get("subtopics", [])) for t in gen_tree.get("topics", []))
+            attrs["failed"] = len(failed)
+            workspace.check_quota()
+        progress(step, "done", 100)
+        return failed
+
+    audio_step, zip_step = "Generating Audio (MP3s)", "Creating ZIP Bundles"
+    # A resumed or incremental job keeps the audio of its done units; audio of units
+    # about to be regenerated is stale
+    if not resuming and audio_dir.exists():
+        shutil.rmtree(audio_dir)
+    audio_dir.mkdir(parents=True, exist_ok=True)
+    for t, s in pending:
+        qna_path(t, s, audio_dir).with_suffix(f".{tts_backend.ext}").unlink(missing_ok=True)
+
+    if PIPELINE_OVERLAP:
+        # STEPS 4-6 overlap: each saved unit goes straight to TTS and into the archives
+        total = max(1, sum(len(t.get("subtopics", [])) for t in store.get_topic_tree(job_id).get("topics", [])))
+        progress(audio_step, "running", 0)
+        progress(zip_step, "running", 0)
+        units = UnitPipeline(
+            text_dir,
+            audio_dir,
+            workspace.bundle_dir,
+            backend=tts_backend,
+            progress_callback=lambda n: progress(audio_step, "running", min(99, int(n / total * 100))),
+        )
+        try:
+            units.submit_existing(rendered_units(results, store.done_units(job_id), text_dir))
+            failed = save_units(on_saved=lambda t, s, path, text: units.submit(path, text))
+        except BaseException:
+            units.close(cancel=True)
+            raise
+
+        # What is left of TTS after the last unit was saved
+        with metrics.span(audio_step, overlapped=True) as attrs:
+            units.drain()
+            attrs["files"] = len(units.audio_files)
+            attrs["reused"] = units.reused
+            attrs["bytes"] = sum(p.stat().st_size for p in units.audio_files)
+            workspace.check_quota()
+        progress(audio_step, "done", 100)
+        if units.errors:
+            notes.append(f"Audio failed for {len(units.errors)} file(s); run the job again to retry them.")
+
+        with metrics.span(zip_step, overlapped=True) as attrs:
+            bundles = units.close()
+            attrs["bytes"] = sum(p.stat().st_size for p in bundles.values())
+            workspace.check_quota()
+        progress(zip_step, "done", 100)
+    else:
+        failed = save_units()
+
+        # STEP 5: Generate Audio (MP3s)
+        progress(audio_step, "running", 0)
+        with metrics.span(audio_step) as attrs:
+            # Texts come from the result store; units whose audio is already there
+            # (kept from an earlier run) are not voiced again
+            texts = dict(rendered_units(results, results.units(), text_dir))
+            txt_files = [
+                p for p in texts
+                if not (audio_dir / p.relative_to(text_dir)).with_suffix(f".{tts_backend.ext}").exists()
+            ]
+            audio_files = txt_to_mp3_tree(
+                txt_files, text_dir, audio_dir,
+                progress_callback=lambda pct: progress(audio_step, "running", pct),
+                backend=tts_backend,
+                texts=texts,
+            )
+            attrs["files"] = len(audio_files)
+            attrs["bytes"] = sum(p.stat().st_size for p in audio_files)
+            workspace.check_quota()
+        progress(audio_step, "done", 100)
+
+        # STEP 6: Create text, audio and combined ZIPs in one pass
+        progress(zip_step, "running", 50)
+        with metrics.span(zip_step) as attrs:
+            bundles = build_bundles(
+                text_dir, audio_dir, workspace.bundle_dir,
+                texts=((p.relative_to(text_dir).as_posix(), text) for p, text in texts.items()),
+            )
+            attrs["bytes"] = sum(p.stat().st_size for p in bundles.values())
+            workspace.check_quota()
+        progress(zip_step, "done", 100)
+
+    # Failed units stay retryable: the next run of this resume resumes the job
+    audio_failed = PIPELINE_OVERLAP and bool(units.errors)
+    store.set_status(job_id, "incomplete" if failed or audio_failed else "done")
+    return {
+        "bundles": {k: str(v) for k, v in bundles.items()},
+        "failed": [list(unit) for unit in failed],
+        "notes": notes,
+        "plan": plan,
+        "results": str(workspace.results_path),
+    }
+
+
+def estimate_job(resume_text: str, store: Optional[JobStore] = None) -> Dict[str, Dict]:
+    """
+    Plans for the "test" and "full" modes of a resume, before any job runs,
+    including the topic-extraction calls a new job starts with. No model is
+    called: the topic tree of an earlier job for this resume is used if there
+    is one, otherwise the largest tree topic extraction may return (the plan
+    then has "assumed_tree" set).
+    """
+    r_hash = resume_hash(resume_text)
+    full_tree = store.find_topic_tree(r_hash, "full") if store else None
+    test_tree = store.find_topic_tree(r_hash, "test") if store else None
+    assumed = {"full": full_tree is None, "test": full_tree is None and test_tree is None}
+    full_tree = full_tree or assumed_topic_tree()
+    test_tree = test_tree or create_test_topic_tree(full_tree, max_topics=2, max_subtopics=2)
+
+    plans = {
+        "test": plan_job(test_tree, resume_text, store, extract_topics=True),
+        "full": plan_job(full_tree, resume_text, store, extract_topics=True),
+    }
+    for mode, plan in plans.items():
+        plan["assumed_tree"] = assumed[mode]
+    return plans
@@ -1,71 +1,358 @@
 # pipeline/save_outputs.py
 from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict
-import time
-import json
-from config import OUTPUT_DIR
-from io_utils.file_io import safe_name, write_text
+import threading
+from config import QNA_MAX_WORKERS, N_LONG_Q, N_SHORT_Q
+from core import metrics
+from core.result_store import ResultStore
+from io_utils.file_io import read_text, safe_name, write_text
 from pipeline.qna_generation import qna_to_text
-from typing import Dict, Callable, Optional, Any
+from typing import Dict, Callable, Iterable, Iterator, List, Optional, Tuple
 
-def save_qna(topic: str, subtopic: str, qna: Dict) -> Path:
+def save_qna(
+    topic: str,
+    subtopic: str,
+    qna: Dict,
+    output_dir: Path,
+    results: Optional[ResultStore] = None,
+) -> Path:
     """
-    Save QnA content into a text file under output/<topic>/<subtopic>.txt
+    Save QnA content into a text file under <output_dir>/<topic>/<subtopic>.txt
 
     Args:
         topic (str): Main topic name
         subtopic (str): Subtopic name
         qna (Dict): Dictionary containing QnA JSON structure
+        output_dir (Path): Text root, e.g. a job workspace's text_dir
+        results (ResultStore, optional): Store the structured QnA here first;
+            the text file is its rendering
 
     Returns:
         Path: The saved file path
     """
-    t_name = safe_name(topic)
-    s_name = safe_name(subtopic)
-    out_dir = OUTPUT_DIR / t_name
-    out_path = out_dir / f"{s_name}.txt"
-
+    if results is not None:
+        results.put(topic, subtopic, qna)
+    out_path = qna_path(topic, subtopic, output_dir)
     content = qna_to_text(qna)
     write_text(out_path, content)
     return out_path
 
 
+def qna_path(topic: str, subtopic: str, output_dir: Path) -> Path:
+    return output_dir / safe_name(topic) / f"{safe_name(subtopic)}.txt"
+
+
+def save_qna_stream(
+    topic: str,
+    subtopic: str,
+    items: Iterable[Tuple[str, Dict]],
+    output_dir: Path,
+    on_item: Callable[[], None] | None = None,
+    results: Optional[ResultStore] = None,
+) -> Path:
+    """
+    Save QnA items to <output_dir>/<topic>/<subtopic>.txt as they arrive.
+
+    Each ("long" | "short", {"q", "a"}) item is appended (to `results` too, when
+    given) and flushed immediately, so partial results are on disk while the
+    model is still writing. Once the stream ends the unit is stored complete
+    and the file is rewritten in the canonical `qna_to_text` layout.
+
+    Raises:
+        ValueError: If the stream produced no items at all
+    """
+    out_path = qna_path(topic, subtopic, output_dir)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    qna: Dict = {"unit": subtopic, "long": [], "short": []}
+    if results is not None:
+        results.begin(topic, subtopic)
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(f"Unit: {subtopic}\n\nLONG-ANSWER:\n")
+        f.flush()
+        section_open = "long"
+        for section, item in items:
+            if section not in ("long", "short"):
+                continue
+            qna[section].append(item)
+            if results is not None:
+                results.append(topic, subtopic, section, item)
+            if section == "short" and section_open == "long":
+                f.write("SHORT-ANSWER:\n")
+                section_open = "short"
+            if section == section_open:
+                f.write(f"{len(qna[section])}. Q: {item.get('q','')}\n A: {item.get('a','')}\n\n")
+                f.flush()
+            if on_item:
+                on_item()
+
+    if not qna["long"] and not qna["short"]:
+        raise ValueError(f"No QnA items received for {subtopic}")
+    if results is not None:
+        results.put(topic, subtopic, qna)
+    write_text(out_path, qna_to_text(qna))
+    return out_path
+
+
+def rendered_units(
+    results: ResultStore, units: Iterable[Tuple[str, str]], output_dir: Path
+) -> Iterator[Tuple[Path, str]]:
+    """(text file path, text) of stored `units`, rendered from `results`; units not in the store are skipped."""
+    for topic, subtopic in units:
+        qna = results.get(topic, subtopic)
+        if qna is not None:
+            yield qna_path(topic, subtopic, output_dir), qna_to_text(qna)
+
+
+def render_units(results: ResultStore, units: Iterable[Tuple[str, str]], output_dir: Path) -> List[Path]:
+    """Write the text files of stored `units` under `output_dir`; units not in the store are skipped."""
+    paths = []
+    for out_path, text in rendered_units(results, units, output_dir):
+        write_text(out_path, text)
+        paths.append(out_path)
+    return paths
+
+
+def alias_text(content: str, alias_subtopic: str) -> str:
+    """A unit's saved text with its "Unit:" header renamed to `alias_subtopic`."""
+    _, _, body = content.partition("\n")
+    return f"Unit: {alias_subtopic}\n{body}"
+
+
+def copy_to_aliases(
+    topic: str,
+    subtopic: str,
+    aliases: List[Tuple[str, str]],
+    output_dir: Path,
+    content: Optional[str] = None,
+    results: Optional[ResultStore] = None,
+) -> List[Path]:
+    """
+    Save an already generated unit's file again under each alias (topic, subtopic).
+    Pass the unit's `content` when it is at hand to skip reading the file back.
+    With `results`, the stored unit is also stored under each alias.
+    """
+    if not aliases:
+        return []
+    qna = results.get(topic, subtopic) if results is not None else None
+    if content is None:
+        content = qna_to_text(qna) if qna is not None else read_text(qna_path(topic, subtopic, output_dir))
+    paths = []
+    for a_topic, a_sub in aliases:
+        if qna is not None:
+            results.put(a_topic, a_sub, {**qna, "unit": a_sub}, alias_of=[topic, subtopic])
+        out_path = qna_path(a_topic, a_sub, output_dir)
+        write_text(out_path, alias_text(content, a_sub))
+        paths.append(out_path)
+    return paths
+
+
+def _generate_units(
+    qna_builder: Callable,
+    batch_builder: Optional[Callable],
+    stream_builder: Optional[Callable],
+    resume_text: str,
+    topic: str,
+    subtopics: List[str],
+    on_item: Callable[[str], None],
+    output_dir: Path,
+    on_unit: Optional[Callable] = None,
+    results: Optional[ResultStore] = None,
+) -> Tuple[Dict[str, Optional[str]], Dict[str, str]]:
+    """
+    Generate and save one work item.
+
+    Returns:
+        Tuple: (subtopic → error (None on success), subtopic → saved text)
+    """
+    with metrics.span("qna_unit", topic=topic, subtopics=list(subtopics)) as attrs:
+        outcome: Dict[str, Optional[str]] = {}
+        texts: Dict[str, str] = {}
+        if on_unit:
+            for sub in subtopics:
+                on_unit(topic, sub, "running")
+        if batch_builder and len(subtopics) > 1:
+            try:
+                for sub, qna in batch_builder(resume_text, subtopics).items():
+                    save_qna(topic, sub, qna, output_dir, results)
+                    texts[sub] = qna_to_text(qna)
+                    outcome[sub] = None
+            except Exception as e:
+                metrics.inc("qna_batch_fallbacks_total")
+                print(f"[WARN] Batched QnA generation failed for {topic}: {e}")
+
+        # Anything the batch skipped (or a non-batched unit) is generated on its own
+        for sub in subtopics:
+            if sub in outcome:
+                continue
+            if stream_builder:
+                # Keep a copy of the items so the final text need not be read back
+                received: Dict = {"unit": sub, "long": [], "short": []}
+
+                def tee(items, received=received):
+                    for section, item in items:
+                        if section in ("long", "short"):
+                            received[section].append(item)
+                        yield section, item
+
+                try:
+                    save_qna_stream(
+                        topic, sub, tee(stream_builder(resume_text, sub)), output_dir,
+                        on_item=lambda: on_item(sub), results=results,
+                    )
+                    texts[sub] = qna_to_text(received)
+                    outcome[sub] = None
+                    continue
+                except Exception as e:
+                    print(f"[WARN] Streamed QnA generation failed for {topic} / {sub}, retrying: {e}")
+            try:
+                qna = qna_builder(resume_text, sub)
+                save_qna(topic, sub, qna, output_dir, results)
+                texts[sub] = qna_to_text(qna)
+                outcome[sub] = None
+            except Exception as e:
+                print(f"[WARN] QnA generation failed for {topic} / {sub}: {e}")
+                outcome[sub] = str(e)
+        attrs["failed"] = sum(err is not None for err in outcome.values())
+    return outcome, texts
+
+
 def save_all_qna(
     topic_tree: Dict,
     resume_text: str,
     qna_builder: Callable,
+    output_dir: Path,
     progress_callback: Callable[[int], None] | None = None,
     stop_flag: Callable[[], bool] | None = None,
-) -> None:
+    max_workers: int = QNA_MAX_WORKERS,
+    batch_builder: Callable | None = None,
+    batch_size: int = 1,
+    stream_builder: Callable | None = None,
+    aliases: Dict[Tuple[str, str], List[Tuple[str, str]]] | None = None,
+    on_unit: Callable[..., None] | None = None,
+    on_saved: Callable[[str, str, Path, str], None] | None = None,
+    results: ResultStore | None = None,
+) -> Dict[Tuple[str, str], str]:
     """
     Save all QnA files for a given topic tree.
 
+    Work items are generated on a bounded thread pool; request/token quotas are
+    enforced by the shared LLM client. Progress and stop checks run on the
+    calling thread so UI callbacks stay on the Streamlit script thread.
+
     Args:
         topic_tree (Dict): The topic → subtopics JSON
         resume_text (str): Resume text context
         qna_builder (Callable): Function that builds QnA JSON from (resume_text, unit_name)
+        output_dir (Path): Text root files are written under, e.g. a job workspace's text_dir
         progress_callback (Callable, optional): Function to update progress %
         stop_flag (Callable, optional): Function returning True if process should stop
-    """
-    topics = topic_tree.get("topics", [])
-    total_subs = sum(len(t.get("subtopics", [])) for t in topics)
-    done = 0
+        max_workers (int): Number of work items generated concurrently
+        batch_builder (Callable, optional): Function that builds {unit: QnA JSON} from
+            (resume_text, unit_names); used to group subtopics of the same topic
+        batch_size (int): Max subtopics per batch_builder call
+        stream_builder (Callable, optional): Generator of ("long" | "short", item) from
+            (resume_text, unit_name); items are written as they arrive and progress
+            is reported per item
+        aliases (Dict, optional): (topic, subtopic) → other (topic, subtopic) paths that
+            get a copy of the same QnA (see pipeline.dedup.collapse_subtopics)
+        on_unit (Callable, optional): Called as (topic, subtopic, state, error=None) with
+            state "running", "done" or "failed", e.g. JobStore.unit_callback(job_id)
+        on_saved (Callable, optional): Called as (topic, subtopic, path, text) for every
+            saved unit and alias as soon as it is on disk, so later stages can start
+            on it without re-reading the file (see pipeline.unit_pipeline)
+        results (ResultStore, optional): Structured store every unit and alias is
+            written to before its text file (e.g. a job workspace's results)
 
-    for topic in topics:
+    Returns:
+        Dict: (topic, subtopic) → error message for every unit that failed
+    """
+    batch_size = max(1, batch_size) if batch_builder else 1
+    work: List[Tuple[str, List[str]]] = []
+    for topic in topic_tree.get("topics", []):
         t_name = topic.get("topic", "General")
-        for sub in topic.get("subtopics", []):
+        subs = topic.get("subtopics", [])
+        for i in range(0, len(subs), batch_size):
+            work.append((t_name, subs[i:i + batch_size]))
+    aliases = aliases or {}
+    total_subs = sum(len(subs) for _, subs in work)
+    errors: Dict[Tuple[str, str], str] = {}
+    if not total_subs:
+        return errors
+
+    pending = iter(work)
+    in_flight: Dict[Future, Tuple[str, List[str]]] = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+
+    # Items streamed so far for units still in flight (item-level progress)
+    items_per_unit = N_LONG_Q + N_SHORT_Q
+    streamed: Dict[Tuple[str, str], int] = {}
+    streamed_lock = threading.Lock()
+
+    def submit_next() -> None:
+        for t_name, subs in pending:
+            def on_item(sub: str, t_name: str = t_name) -> None:
+                with streamed_lock:
+                    streamed[(t_name, sub)] = streamed.get((t_name, sub), 0) + 1
+
+            fut = pool.submit(
+                _generate_units, qna_builder, batch_builder, stream_builder,
+                resume_text, t_name, subs, on_item, output_dir, on_unit, results,
+            )
+            in_flight[fut] = (t_name, subs)
+            return
+
+    def report() -> None:
+        with streamed_lock:
+            partial = sum(min(n, items_per_unit) for n in streamed.values()) / items_per_unit
+        pct = int((done + partial) / total_subs * 100)
+        if pct != last_pct[0]:
+            last_pct[0] = pct
+            progress_callback(pct)
+
+    # Only keep `max_workers` items in flight so a stop request leaves little work behind
+    for _ in range(max(1, max_workers)):
+        submit_next()
+
+    done = 0
+    last_pct = [-1]
+    try:
+        while in_flight:
             if stop_flag and stop_flag():  # Stop requested
-                return
-            try:
-                qna = qna_builder(resume_text, sub)
-            except:
-                continue
-            save_qna(t_name, sub, qna)
+                return errors
+            finished, _ = wait(in_flight, timeout=0.25, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                t_name, subs = in_flight.pop(fut)
+                try:
+                    outcome, texts = fut.result()
+                except Exception as e:
+                    outcome, texts = {sub: str(e) for sub in subs}, {}
+                for sub, err in outcome.items():
+                    unit_aliases = aliases.get((t_name, sub), [])
+                    if err is None:
+                        try:
+                            copy_to_aliases(
+                                t_name, sub, unit_aliases, output_dir, content=texts.get(sub), results=results,
+                            )
+                        except OSError as e:
+                            err = str(e)
+                    for unit in [(t_name, sub)] + unit_aliases:
+                        if err is not None:
+                            errors[unit] = err
+                        if on_unit:
+                            on_unit(*unit, "failed" if err else "done", err)
+                        if err is None and on_saved and sub in texts:
+                            text = texts[sub] if unit == (t_name, sub) else alias_text(texts[sub], unit[1])
+                            on_saved(*unit, qna_path(*unit, output_dir), text)
 
-            done += 1
+                done += len(subs)
+                with streamed_lock:
+                    for sub in subs:
+                        streamed.pop((t_name, sub), None)
+                submit_next()
             if progress_callback:
-                pct = int(done / total_subs * 100)
-                progress_callback(pct)
-
-            time.sleep(0.5)  # Throttle
\ No newline at end of file
+                report()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return errors
@@ -1,41 +1,85 @@
 from __future__ import annotations
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List
 
+from config import TOPIC_CHUNK_CHARS, TOPIC_CHUNK_OVERLAP, TOPIC_MAX_WORKERS, TOPIC_TREE_OUTPUT_TOKENS
 from core.llm_client import llm_client, parse_json_safely
 from core.prompts import TOPIC_TREE_PROMPT
 from core.splitter import chunk_text
 
 
-def get_topic_tree(resume_text: str, progress_callback=None) -> Dict:
-    # If resume is long, split into chunks
-    chunks = chunk_text(resume_text)
-    merged_topics: Dict[str, List[str]] = {}
-    total = len(chunks)
+def _norm_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9+#]+", " ", name.lower()).strip()
 
-    for idx, ch in enumerate(chunks, start=1):
-        user = (
-            TOPIC_TREE_PROMPT
-            + f"\n\nResume chunk (part {idx}/{total}):\n"
-            + ch
-        )
-        raw = llm_client.run_prompt("You structure topics.", user)
-        data = parse_json_safely(raw)
 
-        for t in data.get("topics", []):
-            topic = t.get("topic", "General").strip()
-            subs = [s.strip() for s in t.get("subtopics", []) if isinstance(s, str)]
-            merged_topics.setdefault(topic, [])
-            for s in subs:
-                if s not in merged_topics[topic]:
-                    merged_topics[topic].append(s)
+TOPIC_SYSTEM_PROMPT = "You structure topics."
+
+
+def _chunk_prompt(chunk: str, idx: int, total: int) -> str:
+    return (
+        TOPIC_TREE_PROMPT
+        + f"\n\nResume chunk (part {idx}/{total}):\n"
+        + chunk
+    )
 
-        # Report progress
-        if progress_callback:
-            progress_callback(int(idx / total * 100))
+
+def _extract_chunk(chunk: str, idx: int, total: int) -> Dict:
+    user = _chunk_prompt(chunk, idx, total)
+    raw = llm_client.run_prompt(TOPIC_SYSTEM_PROMPT, user, max_tokens=TOPIC_TREE_OUTPUT_TOKENS)
+    for retry in range(2):
+        try:
+            return parse_json_safely(raw)
+        except ValueError:
+            print(f"[WARN] Topic chunk {idx}/{total} returned invalid JSON, retry {retry + 1}")
+            raw = llm_client.run_prompt(TOPIC_SYSTEM_PROMPT, user, max_tokens=TOPIC_TREE_OUTPUT_TOKENS)
+    return parse_json_safely(raw)
+
+
+def merge_topic_trees(trees: List[Dict]) -> Dict:
+    """
+    Reduce per-chunk topic trees into one, in linear time.
+
+    Topics and subtopics are merged by normalized key (case / punctuation
+    insensitive); the first spelling seen wins and first-seen order is kept.
+    """
+    merged: Dict[str, Dict] = {}
+    for data in trees:
+        for t in data.get("topics", []):
+            topic = (t.get("topic") or "General").strip()
+            entry = merged.setdefault(_norm_key(topic), {"topic": topic, "subtopics": [], "seen": set()})
+            for s in t.get("subtopics", []):
+                if not isinstance(s, str) or not s.strip():
+                    continue
+                key = _norm_key(s)
+                if key not in entry["seen"]:
+                    entry["seen"].add(key)
+                    entry["subtopics"].append(s.strip())
 
     # Convert dict → list schema
     return {
         "topics": [
-            {"topic": k, "subtopics": v} for k, v in merged_topics.items()
+            {"topic": e["topic"], "subtopics": e["subtopics"]} for e in merged.values()
         ]
-    }
\ No newline at end of file
+    }
+
+
+def get_topic_tree(resume_text: str, progress_callback=None, max_workers: int = TOPIC_MAX_WORKERS) -> Dict:
+    # If resume is long, split into chunks and extract topics from them in parallel
+    chunks = chunk_text(resume_text, max_chars=TOPIC_CHUNK_CHARS, overlap=TOPIC_CHUNK_OVERLAP)
+    total = len(chunks)
+    results: List[Dict] = [{} for _ in chunks]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+        futures = {
+            pool.submit(_extract_chunk, ch, idx, total): idx - 1
+            for idx, ch in enumerate(chunks, start=1)
+        }
+        for done, fut in enumerate(as_completed(futures), start=1):
+            results[futures[fut]] = fut.result()
+
+            # Report progress
+            if progress_callback:
+                progress_callback(int(done / total * 100))
+
+    return merge_topic_trees(results)
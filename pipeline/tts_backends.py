@@ -0,0 +1,145 @@
+# pipeline/tts_backends.py
+from __future__ import annotations
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional, Type
+
+
+class TTSBackend:
+    """
+    Text-to-speech backend interface.
+
+    `synthesize` returns encoded audio bytes for one text segment and `join`
+    combines a file's segments (byte concatenation suits MP3 frame streams).
+    `concat_safe` says whether segments can be joined at all; otherwise the
+    engine synthesizes whole files.
+    """
+
+    name = "base"
+    ext = "mp3"
+    concat_safe = True
+
+    def synthesize(self, text: str, lang: str = "en", voice: Optional[str] = None, rate_delta: int = 0) -> bytes:
+        raise NotImplementedError
+
+    def join(self, parts: List[bytes]) -> bytes:
+        return b"".join(parts)
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (network). `voice` is used as the accent TLD, e.g. "co.uk"."""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str = "en", voice: Optional[str] = None, rate_delta: int = 0) -> bytes:
+        from gtts import gTTS
+        import io
+
+        # gTTS only has a normal and a slow speed
+        tts = gTTS(text=text, lang=lang, tld=voice or "com", slow=rate_delta < 0)
+        buf = io.BytesIO()
+        tts.write_to_fp(buf)
+        return buf.getvalue()
+
+
+class Pyttsx3Backend(TTSBackend):
+    """
+    Offline system voices through pyttsx3 (SAPI5 / NSSpeech / eSpeak).
+    Segments are WAV files joined frame by frame, so they are cached like any
+    other backend's; synthesis itself is serialized, since pyttsx3 drives one
+    engine per process.
+    """
+
+    name = "pyttsx3"
+    ext = "wav"
+    _lock = threading.Lock()
+    _base_rate: Optional[int] = None
+
+    def synthesize(self, text: str, lang: str = "en", voice: Optional[str] = None, rate_delta: int = 0) -> bytes:
+        with self._lock:
+            return self._synthesize(text, voice, rate_delta)
+
+    def join(self, parts: List[bytes]) -> bytes:
+        if len(parts) == 1:
+            return parts[0]
+        out = io.BytesIO()
+        with wave.open(out, "wb") as dst:
+            for i, part in enumerate(parts):
+                with wave.open(io.BytesIO(part), "rb") as src:
+                    if i == 0:
+                        dst.setparams(src.getparams())
+                    elif src.getparams()[:3] != dst.getparams()[:3]:
+                        raise ValueError("WAV segments differ in channels, sample width or rate")
+                    dst.writeframes(src.readframes(src.getnframes()))
+        return out.getvalue()
+
+    def _synthesize(self, text: str, voice: Optional[str], rate_delta: int) -> bytes:
+        try:
+            import pyttsx3
+        except ImportError:
+            raise RuntimeError('TTS_BACKEND = "pyttsx3" needs the pyttsx3 package: pip install pyttsx3') from None
+
+        engine = pyttsx3.init()
+        if voice:
+            engine.setProperty("voice", voice)
+        # The engine is shared, so apply the delta to the original rate every time
+        if Pyttsx3Backend._base_rate is None:
+            Pyttsx3Backend._base_rate = engine.getProperty("rate")
+        engine.setProperty("rate", Pyttsx3Backend._base_rate + rate_delta)
+        fd, tmp = tempfile.mkstemp(suffix=f".{self.ext}")
+        os.close(fd)
+        try:
+            engine.save_to_file(text, tmp)
+            engine.runAndWait()
+            return Path(tmp).read_bytes()
+        finally:
+            os.unlink(tmp)
+
+
+class FakeTTSBackend(TTSBackend):
+    """
+    Deterministic, network-free backend for tests and benchmarks: sleeps
+    `latency + per_char * len(text)` seconds and returns bytes derived from the text.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, per_char: float = 0.0):
+        self.latency = latency
+        self.per_char = per_char
+
+    def synthesize(self, text: str, lang: str = "en", voice: Optional[str] = None, rate_delta: int = 0) -> bytes:
+        delay = self.latency + self.per_char * len(text)
+        if delay:
+            time.sleep(delay)
+        digest = hashlib.sha256(f"{lang}|{voice}|{rate_delta}|{text}".encode("utf-8")).digest()
+        return b"FAKEMP3" + digest + len(text).to_bytes(4, "big")
+
+
+TTS_BACKENDS: Dict[str, Type[TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    Pyttsx3Backend.name: Pyttsx3Backend,
+    FakeTTSBackend.name: FakeTTSBackend,
+}
+
+
+_backends: Dict[str, TTSBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_tts_backend(name: str) -> TTSBackend:
+    """The process-wide instance of backend `name` (created on first use; engines load on first synthesis)."""
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            try:
+                backend = _backends[name] = TTS_BACKENDS[name]()
+            except KeyError:
+                raise ValueError(f"Unknown TTS backend: {name!r} (known: {', '.join(TTS_BACKENDS)})") from None
+        return backend
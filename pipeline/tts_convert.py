@@ -1,31 +1,177 @@
 # pipeline/tts_convert.py
 from __future__ import annotations
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional
 
 
+from config import (
+    TTS_VOICE,
+    TTS_RATE_DELTA,
+    TTS_BACKEND,
+    TTS_MAX_WORKERS,
+    TTS_SEGMENT_CHARS,
+    TTS_CACHE_DIR,
+)
+from core import metrics
 from io_utils.file_io import read_text
+from pipeline.tts_backends import TTSBackend, get_tts_backend
+
+
+def split_segments(text: str, max_chars: int = TTS_SEGMENT_CHARS) -> List[str]:
+    """
+    Split text into TTS segments: one per QnA item / paragraph, with long
+    paragraphs cut on sentence boundaries so no segment exceeds `max_chars`.
+    """
+    segments: List[str] = []
+    for para in re.split(r"\n\s*\n", text or ""):
+        para = para.strip()
+        if not para:
+            continue
+        current = ""
+        for sentence in re.split(r"(?<=[^\d][.!?])\s+", para):
+            while len(sentence) > max_chars:
+                segments.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                segments.append(current)
+                current = ""
+            current = f"{current} {sentence}".strip()
+        if current:
+            segments.append(current)
+    return segments
+
+
+def _segment_key(backend: TTSBackend, text: str, lang: str) -> str:
+    payload = json.dumps([backend.name, TTS_VOICE, TTS_RATE_DELTA, lang, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def synthesize_segment(backend: TTSBackend, text: str, lang: str = "en") -> bytes:
+    """Synthesize one segment, served from the on-disk segment cache when possible."""
+    cache_path = None
+    if TTS_CACHE_DIR:
+        key = _segment_key(backend, text, lang)
+        cache_path = Path(TTS_CACHE_DIR) / key[:2] / f"{key}.{backend.ext}"
+        if cache_path.exists():
+            metrics.inc("tts_segment_cache_total", result="hit")
+            return cache_path.read_bytes()
+        metrics.inc("tts_segment_cache_total", result="miss")
+
+    started = time.perf_counter()
+    audio = backend.synthesize(text, lang=lang, voice=TTS_VOICE, rate_delta=TTS_RATE_DELTA)
+    elapsed = time.perf_counter() - started
+    metrics.observe("tts_segment_seconds", elapsed, backend=backend.name)
+    metrics.inc("tts_seconds_total", elapsed, backend=backend.name)  # with tts_chars_total: the planner's TTS rate
+    metrics.inc("tts_chars_total", len(text), backend=backend.name)
+    metrics.inc("tts_audio_bytes_total", len(audio), backend=backend.name)
+
+    if cache_path:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(".tmp")
+        tmp.write_bytes(audio)
+        tmp.replace(cache_path)
+    return audio
+
+
+class SharedSegments:
+    """
+    Segment syntheses shared by the units that need them, so identical
+    segments (repeated headers, dedup aliases) are synthesized once. Entries
+    are reference-counted per unit: `acquire` a unit's segments, `release`
+    them once its audio is assembled, and a segment's audio is dropped when
+    no unit still waiting for it remains (a later repeat is served from the
+    on-disk segment cache). Safe to call from several threads.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor, backend: TTSBackend, lang: str = "en"):
+        self.pool = pool
+        self.backend = backend
+        self.lang = lang
+        self._futures: Dict[str, Future] = {}
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, segments: List[str]) -> List[Future]:
+        futs = []
+        with self._lock:
+            for seg in segments:
+                if seg not in self._futures:
+                    self._futures[seg] = self.pool.submit(synthesize_segment, self.backend, seg, self.lang)
+                self._refs[seg] = self._refs.get(seg, 0) + 1
+                futs.append(self._futures[seg])
+        return futs
+
+    def release(self, segments: List[str]) -> None:
+        with self._lock:
+            for seg in segments:
+                self._refs[seg] -= 1
+                if not self._refs[seg]:
+                    del self._refs[seg]
+                    del self._futures[seg]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._futures)
 
-from gtts import gTTS
 
 def txt_to_mp3_tree(
     txt_files: Iterable[Path],
     base_dir: Path,
     out_audio_root: Path,
     lang: str = 'en',
-    progress_callback=None
-) -> None:
+    progress_callback=None,
+    backend: Optional[TTSBackend] = None,
+    max_workers: int = TTS_MAX_WORKERS,
+    texts: Optional[Dict[Path, str]] = None,
+) -> List[Path]:
+    """
+    Convert every text file to audio under `out_audio_root`, mirroring `base_dir`.
+    A file's text is taken from `texts` when given (e.g. rendered from the
+    result store) and read from disk otherwise.
+
+    Files are split into segments that are synthesized concurrently and cached
+    by (backend, voice, rate, lang, text); each file's segments are then joined
+    into one audio file. Backends whose output cannot be joined byte-for-byte
+    get one segment per file.
+    """
+    backend = backend or get_tts_backend(TTS_BACKEND)
     txt_files = list(txt_files)
     total = len(txt_files)
+    written: List[Path] = []
+    if not total:
+        return written
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        # Identical segments (repeated headers, duplicate units) are synthesized once
+        shared = SharedSegments(pool, backend, lang)
+        file_jobs: Dict[Future, Path] = {}
 
-    for idx, txt_path in enumerate(txt_files, start=1):
-        rel_path = txt_path.relative_to(base_dir)
-        mp3_path = out_audio_root / rel_path.with_suffix(".mp3")
-        mp3_path.parent.mkdir(parents=True, exist_ok=True)
+        def assemble(txt_path: Path, segments: List[str], futs: List[Future]) -> Path:
+            try:
+                rel_path = txt_path.relative_to(base_dir)
+                audio_path = out_audio_root / rel_path.with_suffix(f".{backend.ext}")
+                audio_path.parent.mkdir(parents=True, exist_ok=True)
+                audio_path.write_bytes(backend.join([f.result() for f in futs]))
+                return audio_path
+            finally:
+                shared.release(segments)
 
-        content = read_text(txt_path)
-        tts = gTTS(text=content, lang=lang)
-        tts.save(str(mp3_path))
+        # A second small pool joins files as soon as their segments are ready
+        with ThreadPoolExecutor(max_workers=2) as joiner:
+            for txt_path in txt_files:
+                content = texts[txt_path] if texts is not None and txt_path in texts else read_text(txt_path)
+                segments = split_segments(content) if backend.concat_safe else [content]
+                futs = shared.acquire(segments)
+                file_jobs[joiner.submit(assemble, txt_path, segments, futs)] = txt_path
 
-        if progress_callback:
-            progress_callback(int(idx / total * 100))
+            for idx, fut in enumerate(as_completed(file_jobs), start=1):
+                written.append(fut.result())
+                if progress_callback:
+                    progress_callback(int(idx / total * 100))
+    return written
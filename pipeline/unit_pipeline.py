@@ -0,0 +1,150 @@
+# pipeline/unit_pipeline.py
+from __future__ import annotations
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import PIPELINE_QUEUE_DEPTH, PIPELINE_TTS_CONSUMERS, TTS_BACKEND, TTS_MAX_WORKERS
+from core import metrics
+from io_utils.zipping import BundleWriter
+from pipeline.tts_backends import TTSBackend, get_tts_backend
+from pipeline.tts_convert import SharedSegments, split_segments
+
+_STOP = None
+
+
+class UnitPipeline:
+    """
+    Producer/consumer chain for saved units: text → TTS → archives.
+
+    `submit` adds the unit's text to the text archives right away, requests its
+    segments from a shared TTS pool (a segment still pending for another
+    queued unit, such as a dedup alias, is reused; see SharedSegments) and
+    puts it on a bounded queue; consumer threads join each unit's segments,
+    write the audio file and append it to the audio archives.
+    A full queue blocks `submit`, which holds back QnA generation instead of
+    buffering an unbounded backlog. `close` drains the queue and returns the
+    archive paths.
+    """
+
+    def __init__(
+        self,
+        text_root: Path,
+        audio_root: Path,
+        bundle_dir: Path,
+        backend: Optional[TTSBackend] = None,
+        lang: str = "en",
+        queue_size: int = PIPELINE_QUEUE_DEPTH,
+        consumers: int = PIPELINE_TTS_CONSUMERS,
+        tts_workers: int = TTS_MAX_WORKERS,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ):
+        self.text_root = text_root
+        self.audio_root = audio_root
+        self.backend = backend or get_tts_backend(TTS_BACKEND)
+        self.lang = lang
+        self.progress_callback = progress_callback
+        self.writer = BundleWriter(bundle_dir)
+        self.audio_files: List[Path] = []
+        self.reused = 0  # units whose existing audio went straight into the archives
+        self.errors: List[Tuple[str, str]] = []
+        self._queue: "queue.Queue[Optional[Tuple[str, List[str], List[Future]]]]" = queue.Queue(
+            maxsize=max(1, queue_size)
+        )
+        self._segments = ThreadPoolExecutor(max_workers=max(1, tts_workers))
+        self._shared = SharedSegments(self._segments, self.backend, lang)
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._drained = False
+        self._paths: Optional[Dict[str, Path]] = None
+        self._consumers = [
+            threading.Thread(target=self._consume, name=f"unit-tts-{i}", daemon=True)
+            for i in range(max(1, consumers))
+        ]
+        for t in self._consumers:
+            t.start()
+
+    def submit(self, path: Path, text: str) -> None:
+        """Queue one saved unit (`path` under text_root); blocks while the queue is full."""
+        rel = path.relative_to(self.text_root).as_posix()
+        self.writer.add("text", rel, text.encode("utf-8"))
+        segments = split_segments(text) if self.backend.concat_safe else [text]
+        self._queue.put((rel, segments, self._shared.acquire(segments)))
+
+    def submit_existing(self, units: Iterable[Tuple[Path, str]]) -> int:
+        """
+        Add (path, text) units generated earlier (e.g. kept from an earlier run,
+        rendered from the result store); returns how many. A unit whose audio
+        file exists is archived with it as-is, the rest are queued for TTS.
+        """
+        count = 0
+        for path, text in units:
+            rel = path.relative_to(self.text_root)
+            audio_rel = rel.with_suffix(f".{self.backend.ext}")
+            audio_path = self.audio_root / audio_rel
+            if audio_path.exists():
+                self.writer.add("text", rel.as_posix(), text.encode("utf-8"))
+                self.writer.add_file("audio", audio_path, audio_rel.as_posix())
+                with self._lock:
+                    self.audio_files.append(audio_path)
+                    self.reused += 1
+                    done = len(self.audio_files)
+                if self.progress_callback:
+                    self.progress_callback(done)
+            else:
+                self.submit(path, text)
+            count += 1
+        return count
+
+    def _consume(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            rel, segments, futs = item
+            if self._cancelled.is_set():
+                self._shared.release(segments)
+                continue
+            try:
+                with metrics.span("tts_unit", file=rel):
+                    try:
+                        audio = self.backend.join([f.result() for f in futs])
+                    finally:
+                        self._shared.release(segments)
+                    audio_rel = Path(rel).with_suffix(f".{self.backend.ext}")
+                    audio_path = self.audio_root / audio_rel
+                    audio_path.parent.mkdir(parents=True, exist_ok=True)
+                    audio_path.write_bytes(audio)
+                    self.writer.add("audio", audio_rel.as_posix(), audio)
+            except Exception as e:
+                print(f"[WARN] TTS failed for {rel}: {e}")
+                with self._lock:
+                    self.errors.append((rel, str(e)))
+                continue
+            with self._lock:
+                self.audio_files.append(audio_path)
+                done = len(self.audio_files)
+            if self.progress_callback:
+                self.progress_callback(done)
+
+    def drain(self, cancel: bool = False) -> None:
+        """Wait for every queued unit to be voiced (or drop them with `cancel=True`)."""
+        if self._drained:
+            return
+        self._drained = True
+        if cancel:
+            self._cancelled.set()
+        for _ in self._consumers:
+            self._queue.put(_STOP)
+        for t in self._consumers:
+            t.join()
+        self._segments.shutdown(wait=True)
+
+    def close(self, cancel: bool = False) -> Dict[str, Path]:
+        """Drain, finish the archives and return "text" / "audio" / "both" → path."""
+        self.drain(cancel)
+        if self._paths is None:
+            self._paths = self.writer.close()
+        return self._paths
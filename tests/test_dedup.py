@@ -0,0 +1,36 @@
+from pipeline.dedup import collapse_subtopics
+
+
+def _collapse(*subtopics, topic="Skills"):
+    tree = {"topics": [{"topic": topic, "subtopics": list(subtopics)}]}
+    deduped, aliases, stats = collapse_subtopics(tree)
+    return [s for t in deduped["topics"] for s in t["subtopics"]], aliases, stats
+
+
+def test_spelling_variants_merge():
+    kept, aliases, stats = _collapse("ML Ops", "MLOps", "mlops", "Python OOP", "Python OOPs")
+    assert kept == ["ML Ops", "Python OOP"]
+    assert stats["calls_saved"] == 3
+
+
+def test_same_subtopic_under_two_topics_merges():
+    tree = {"topics": [
+        {"topic": "Backend", "subtopics": ["REST APIs"]},
+        {"topic": "Web", "subtopics": ["REST APIs"]},
+    ]}
+    _, aliases, stats = collapse_subtopics(tree)
+    assert aliases == {("Backend", "REST APIs"): [("Web", "REST APIs")]}
+    assert stats["clusters"] == 1
+
+
+def test_versions_stay_apart():
+    kept, aliases, _ = _collapse("Python 2", "Python 3", "Java 8", "Java 17")
+    assert kept == ["Python 2", "Python 3", "Java 8", "Java 17"]
+    assert aliases == {}
+
+
+def test_distinct_roles_stay_apart():
+    roles = ["Data Scientist (WitZeal)", "Data Scientist (Acme)", "Senior Data Scientist", "Data Scientist"]
+    kept, aliases, _ = _collapse(*roles, topic="Experience")
+    assert kept == roles
+    assert aliases == {}
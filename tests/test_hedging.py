@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+import core.llm_client
+from core.llm_client import DynamicLLMClient
+from core.providers import GROQ_MODELS
+
+PRIMARY, SECONDARY = GROQ_MODELS[:2]
+
+
+class _Model:
+    # model → (seconds before answering, content or exception)
+    script = {}
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+
+    def invoke(self, messages, **kwargs):
+        delay, outcome = self.script.get(self.model, (0.0, '{"from": "other"}'))
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return type("R", (), {"content": outcome, "response_metadata": {}})()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(core.llm_client, "LLM_HEDGE_MAX_DELAY_S", 0.05)
+    c = DynamicLLMClient(hedge=True, client_factory=_Model)
+    c.cache.enabled = False
+    c.rate_limiter.rpm = c.rate_limiter.tpm = None
+    return c
+
+
+def test_slow_primary_is_hedged_and_secondary_wins(client):
+    _Model.script = {PRIMARY: (0.5, '{"from": "primary"}'), SECONDARY: (0.0, '{"from": "secondary"}')}
+    started = time.monotonic()
+    assert client.run_prompt("sys", "user") == '{"from": "secondary"}'
+    assert time.monotonic() - started < 0.4
+    assert client.hedge_stats == {"hedged": 1, "hedge_wins": 1, "abandoned": 1}
+
+
+def test_fast_primary_sends_no_hedge(client):
+    _Model.script = {PRIMARY: (0.0, '{"from": "primary"}'), SECONDARY: (0.0, '{"from": "secondary"}')}
+    assert client.run_prompt("sys", "user") == '{"from": "primary"}'
+    assert client.hedge_stats == {"hedged": 0, "hedge_wins": 0, "abandoned": 0}
+
+
+def test_failed_primary_fails_over_without_counting_a_hedge(client):
+    _Model.script = {PRIMARY: (0.0, ConnectionError("down")), SECONDARY: (0.0, '{"from": "secondary"}')}
+    assert client.run_prompt("sys", "user") == '{"from": "secondary"}'
+    assert client.hedge_stats["hedged"] == 0 and client.hedge_stats["hedge_wins"] == 0
+
+
+def test_non_json_answer_loses_to_a_json_one(client):
+    _Model.script = {PRIMARY: (0.0, "not json"), SECONDARY: (0.1, '{"from": "secondary"}')}
+    assert client.run_prompt("sys", "user") == '{"from": "secondary"}'
@@ -0,0 +1,76 @@
+from core.job_store import JobStore, resume_hash
+from core.workspace import Workspace
+from pipeline.incremental import dirty_units, prepare_incremental, section_diff
+from pipeline.save_outputs import qna_path
+
+RESUME = """Jane Doe
+Backend Engineer
+
+SUMMARY
+Engineer building data platforms.
+
+EXPERIENCE
+Acme | Senior Engineer | 2020 - 2024
+- Built streaming ingestion on Kafka handling 2M events per day.
+- Migrated services to Kubernetes with Helm charts.
+- Wrote Python tooling for release automation.
+
+Globex | Engineer | 2017 - 2020
+- Built React dashboards for operations teams.
+- Tuned PostgreSQL queries for reporting.
+"""
+
+TREE = {"topics": [
+    {"topic": "Backend", "subtopics": ["Kafka", "Kubernetes", "Python", "PostgreSQL"]},
+    {"topic": "Frontend", "subtopics": ["React"]},
+]}
+
+
+def _dirty(old, new):
+    return {sub for _, sub in dirty_units(TREE, *section_diff(old, new))}
+
+
+def test_small_edit_leaves_unrelated_units_clean():
+    edited = RESUME.replace("2M events per day", "5M events per day")
+    assert _dirty(RESUME, edited) == {"Kafka"}
+
+
+def test_edit_without_subtopic_terms_dirties_nothing():
+    edited = RESUME.replace("Acme | Senior Engineer", "Acme | Staff Engineer")
+    assert _dirty(RESUME, edited) == set()
+
+
+def test_removed_and_added_sections_both_count():
+    edited = RESUME.replace("- Built React dashboards for operations teams.\n", "").replace(
+        "release automation.", "release automation.\n- Ran Kubernetes upgrades."
+    )
+    assert _dirty(RESUME, edited) == {"React", "Kubernetes"}
+
+
+def test_whitespace_only_changes_are_not_edits():
+    assert section_diff(RESUME, RESUME.replace("\n- ", "\n-   ")) == ([], [])
+
+
+def _qna(sub):
+    return {"unit": sub, "long": [{"q": f"{sub}?", "a": "Because."}], "short": []}
+
+
+def test_prepare_incremental_reuses_clean_units(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    base = store.create_job(resume_hash(RESUME), "full", resume_text=RESUME)
+    store.set_topic_tree(base, TREE)
+    base_ws = Workspace(tmp_path / "base").create()
+    for t in TREE["topics"]:
+        for sub in t["subtopics"]:
+            base_ws.results.put(t["topic"], sub, _qna(sub))
+            store.mark_unit(base, t["topic"], sub, "done")
+
+    edited = RESUME.replace("2M events per day", "5M events per day")
+    job = store.create_job(resume_hash(edited), "full", resume_text=edited, base_job=base)
+    ws = Workspace(tmp_path / "job").create()
+    note = prepare_incremental(store, job, base, edited, ws, base_ws, "mp3")
+
+    assert "reused 4 of 5 units" in note
+    assert ("Backend", "Kafka") not in store.done_units(job)
+    assert ws.results.get("Frontend", "React") == _qna("React")
+    assert qna_path("Frontend", "React", ws.text_dir).exists()
@@ -0,0 +1,99 @@
+import pytest
+
+import core.llm_client
+import pipeline.tts_convert
+from core.fake_llm import FakeChatModel
+from core.job_store import JobStore, resume_hash
+from core.llm_client import DynamicLLMClient
+from core.question_bank import get_question_bank
+from core.workspace import Workspace
+from pipeline.runner import run_pipeline
+from pipeline.tts_backends import FakeTTSBackend
+
+RESUME = """Jane Doe
+Backend Engineer
+
+EXPERIENCE
+- Built streaming ingestion on Kafka.
+- Migrated services to Kubernetes.
+- Built React dashboards.
+"""
+TREE = {"topics": [
+    {"topic": "Backend", "subtopics": ["Kafka", "Kubernetes"]},
+    {"topic": "Frontend", "subtopics": ["React"]},
+]}
+
+
+def _qna(sub):
+    return {"unit": sub, "long": [{"q": f"{sub}?", "a": "Because."}], "short": []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.sqlite3")
+
+
+def test_pending_tree_keeps_every_unit_that_is_not_done(store):
+    job = store.create_job(resume_hash(RESUME), "full")
+    store.set_topic_tree(job, TREE)
+    store.mark_unit(job, "Backend", "Kafka", "done")
+    store.mark_unit(job, "Backend", "Kubernetes", "failed", "boom")
+    store.mark_unit(job, "Frontend", "React", "running")
+    assert store.pending_tree(job) == {"topics": [
+        {"topic": "Backend", "subtopics": ["Kubernetes"]},
+        {"topic": "Frontend", "subtopics": ["React"]},
+    ]}
+    assert store.failures(job) == {("Backend", "Kubernetes"): "boom"}
+
+
+def test_only_unfinished_jobs_are_resumable(store):
+    r_hash = resume_hash(RESUME)
+    done = store.create_job(r_hash, "full")
+    store.set_status(done, "done")
+    assert store.find_resumable(r_hash, "full") is None
+    job = store.create_job(r_hash, "full")
+    store.set_status(job, "incomplete")
+    assert store.find_resumable(r_hash, "full") == job
+    assert store.find_resumable(r_hash, "test") is None
+
+
+def test_done_units_without_output_go_back_to_pending(store):
+    job = store.create_job(resume_hash(RESUME), "full")
+    store.set_topic_tree(job, TREE)
+    for sub in ("Kafka", "Kubernetes"):
+        store.mark_unit(job, "Backend", sub, "done")
+    assert store.reset_missing(job, lambda t, s: s == "Kafka") == 1
+    assert store.done_units(job) == [("Backend", "Kafka")]
+
+
+class _RecordingModel(FakeChatModel):
+    prompts = []
+
+    def invoke(self, messages, max_tokens=None, **kwargs):
+        self.prompts.append(messages[-1][1])
+        return super().invoke(messages, max_tokens=max_tokens, **kwargs)
+
+
+def test_resumed_run_generates_only_unfinished_units(store, tmp_path, monkeypatch):
+    client = DynamicLLMClient(hedge=False, client_factory=_RecordingModel)
+    client.cache.enabled = False
+    client.rate_limiter.rpm = client.rate_limiter.tpm = None
+    monkeypatch.setattr(core.llm_client, "_client", client)
+    monkeypatch.setattr(pipeline.tts_convert, "TTS_CACHE_DIR", None)
+    monkeypatch.setattr(get_question_bank(), "enabled", False)
+    _RecordingModel.prompts = []
+
+    job = store.create_job(resume_hash(RESUME), "full")
+    store.set_topic_tree(job, TREE)  # an interrupted run got this far
+    workspace = Workspace(tmp_path / "ws").create()
+    workspace.results.put("Backend", "Kafka", _qna("Kafka"))
+    store.mark_unit(job, "Backend", "Kafka", "done")
+
+    result = run_pipeline(store, job, RESUME, "full", workspace=workspace, tts_backend=FakeTTSBackend())
+
+    assert result["failed"] == []
+    assert store.summary(job) == {"done": 3}
+    assert any("Resumed" in note for note in result["notes"])
+    asked = sorted(p.split("for the unit: ", 1)[1].split(".", 1)[0] for p in _RecordingModel.prompts)
+    assert asked == ["Kubernetes", "React"]
+    assert workspace.results.get("Backend", "Kafka") == _qna("Kafka")
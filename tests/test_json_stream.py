@@ -0,0 +1,39 @@
+import json
+
+from core.json_stream import QnAStreamParser, salvage_batch, salvage_qna
+
+ITEM = {"q": "Why Kafka?", "a": "Ordered, replayable logs."}
+SHORT = {"q": "What is a partition?", "a": "An ordered shard of a topic."}
+
+
+def test_unit_key_after_sections_is_still_matched():
+    text = json.dumps({"units": [
+        {"long": [ITEM], "short": [SHORT], "unit": "Kafka"},
+        {"unit": "Python", "long": [ITEM], "short": []},
+    ]})
+    out = salvage_batch(text[:-5])  # truncated after the last unit closed
+    assert out == {
+        "Kafka": {"long": [ITEM], "short": [SHORT]},
+        "Python": {"long": [ITEM], "short": []},
+    }
+
+
+def test_held_items_are_released_when_the_unit_key_streams_in():
+    text = json.dumps({"units": [{"long": [ITEM], "unit": "Kafka", "short": [SHORT]}]})
+    cut = text.index('"unit"')
+    parser = QnAStreamParser()
+    assert parser.feed_units(text[:cut]) == []
+    assert parser.feed_units(text[cut:]) == [("Kafka", "long", ITEM), ("Kafka", "short", SHORT)]
+
+
+def test_feed_yields_items_without_waiting_for_a_unit_key():
+    text = json.dumps({"long": [ITEM], "short": [SHORT], "unit": "Kafka"})
+    cut = text.index('"short"')
+    parser = QnAStreamParser()
+    assert parser.feed("```json\n" + text[:cut]) == [("long", ITEM)]
+    assert parser.feed(text[cut:]) == [("short", SHORT)]
+
+
+def test_truncated_single_unit_keeps_complete_items():
+    text = json.dumps({"unit": "Kafka", "long": [ITEM, ITEM], "short": [SHORT]})
+    assert salvage_qna(text[: text.index('"short"') - 10]) == {"long": [ITEM], "short": []}
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from core.llm_cache import LLMCache
+from core.llm_client import DynamicLLMClient
+
+
+def test_key_covers_model_temperature_and_prompts():
+    base = ("m", 0.2, "sys", "user")
+    variants = [("n", 0.2, "sys", "user"), ("m", 0.3, "sys", "user"), ("m", 0.2, "sys!", "user"), ("m", 0.2, "sys", "user!")]
+    assert LLMCache.make_key(*base) == LLMCache.make_key(*base)
+    assert len({LLMCache.make_key(*k) for k in [base] + variants}) == 5
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put("a", "m", "A")
+    time.sleep(0.01)
+    cache.put("b", "m", "B")
+    time.sleep(0.01)
+    assert cache.get("a") == "A"  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "m", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", ttl_seconds=0.05)
+    cache.put("a", "m", "A")
+    assert cache.get("a") == "A"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+class _Model:
+    calls = 0
+
+    def __init__(self, **kwargs):
+        pass
+
+    def invoke(self, messages, **kwargs):
+        _Model.calls += 1
+        content = '{"n": %d}' % _Model.calls if "json" in messages[-1][1] else "plain text"
+        return type("R", (), {"content": content, "response_metadata": {}})()
+
+
+@pytest.fixture
+def client(tmp_path):
+    _Model.calls = 0
+    c = DynamicLLMClient(hedge=False, client_factory=_Model)
+    c.cache = LLMCache(tmp_path / "cache.sqlite3")
+    c.rate_limiter.rpm = c.rate_limiter.tpm = None
+    return c
+
+
+def test_repeated_prompt_is_served_from_cache(client):
+    assert client.run_prompt("sys", "give json") == '{"n": 1}'
+    assert client.run_prompt("sys", "  give json  ") == '{"n": 1}'
+    assert client.run_prompt("sys", "give json", use_cache=False) == '{"n": 2}'
+    assert _Model.calls == 2
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_responses_that_are_not_json_are_not_cached(client):
+    client.run_prompt("sys", "give text")
+    client.run_prompt("sys", "give text")
+    assert _Model.calls == 2
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from core.llm_client import DynamicLLMClient
+from core.model_router import ModelRouter
+from core.providers import GROQ_MODELS
+
+
+def test_fastest_healthy_model_first():
+    router = ModelRouter(["a", "b", "c"], default_latency=5.0)
+    router.record_success("c", 1.0)
+    router.record_success("a", 3.0)
+    assert router.candidates() == ["c", "a", "b"]
+
+
+def test_circuit_opens_after_consecutive_failures_and_half_opens():
+    router = ModelRouter(["a", "b"], failure_threshold=2, cooldown=0.05)
+    router.record_failure("a")
+    assert router.candidates() == ["a", "b"]
+    router.record_failure("a")
+    assert router.candidates() == ["b", "a"]
+
+    time.sleep(0.06)
+    assert router.candidates() == ["a", "b"]  # half-open: offered again
+    router.record_failure("a")  # one failure re-opens it
+    assert router.candidates() == ["b", "a"]
+    time.sleep(0.06)
+    router.record_success("a", 0.1)  # one success closes it
+    assert router.candidates() == ["a", "b"]
+
+
+def test_circuit_opens_on_rolling_error_rate():
+    router = ModelRouter(["a", "b"], failure_threshold=10, error_rate_threshold=0.5, min_samples=4)
+    for _ in range(2):
+        router.record_success("a", 0.1)
+        router.record_failure("a")
+    assert router.snapshot()["a"]["open"]
+    assert router.candidates() == ["b", "a"]
+
+
+class _Model:
+    built = []
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        self.built.append(model)
+
+    def invoke(self, messages, **kwargs):
+        if self.model == GROQ_MODELS[0]:
+            raise ConnectionError("down")
+        return type("R", (), {"content": '{"ok": true}', "response_metadata": {}})()
+
+
+@pytest.fixture
+def client():
+    _Model.built = []
+    c = DynamicLLMClient(hedge=False, client_factory=_Model)
+    c.cache.enabled = False
+    c.rate_limiter.rpm = c.rate_limiter.tpm = None
+    return c
+
+
+def test_client_falls_back_and_reuses_one_client_per_model(client):
+    for _ in range(5):
+        assert client.run_prompt("sys", "user") == '{"ok": true}'
+    assert _Model.built == GROQ_MODELS[:2]
+    # The fallback answered, so later calls went to it first
+    assert client.router.candidates()[0] == GROQ_MODELS[1]
+    assert client.router.snapshot()[GROQ_MODELS[0]]["error_rate"] == 1.0
@@ -0,0 +1,40 @@
+import math
+
+from core.job_store import JobStore, resume_hash
+from pipeline.planner import history, plan_job
+from pipeline.runner import estimate_job
+
+RESUME = "Jane Doe\nBackend Engineer\n\nEXPERIENCE\n- Built streaming ingestion on Kafka.\n- Tuned PostgreSQL queries.\n"
+TREE = {"topics": [{"topic": "Backend", "subtopics": ["Kafka Streams", "PostgreSQL Tuning", "gRPC Services"]}]}
+
+
+def _report(calls, repairs):
+    return {
+        "llm_calls": [{"model": "gemma2-9b-it", "ok": True, "latency_s": 2.0, "completion_tokens": 1000}] * calls,
+        "counters": {"qna_repair_calls_total": repairs},
+    }
+
+
+def test_estimate_includes_topic_extraction_and_repairs():
+    plans = estimate_job(RESUME)
+    for plan in plans.values():
+        assert plan["topic_calls"] == 1
+        qna_calls = plan["llm_calls"] - plan["topic_calls"] - plan["repair_calls"]
+        assert plan["repair_calls"] == math.ceil(qna_calls * 0.1) > 0
+        assert plan["estimated_s"]["topics"] > 0
+
+
+def test_plan_of_an_extracted_tree_has_no_topic_calls():
+    plan = plan_job(TREE, RESUME)
+    assert plan["topic_calls"] == 0
+    assert plan["estimated_s"]["topics"] == 0
+    assert plan["llm_calls"] == 3 + plan["repair_calls"]
+
+
+def test_repair_rate_comes_from_recent_jobs(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    for calls, repairs in ((10, 3), (30, 7)):
+        job = store.create_job(resume_hash(RESUME), "full")
+        store.set_metrics(job, _report(calls, repairs))
+    assert history(store)["repair_rate"] == 10 / 40
+    assert plan_job(TREE, RESUME, store)["repair_calls"] == 1
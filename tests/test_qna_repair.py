@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import core.llm_client
+from core.llm_client import DynamicLLMClient
+from pipeline.qna_generation import _build_part
+
+
+def _items(prefix, n):
+    return [{"q": f"{prefix} question {i}?", "a": f"Answer {i}."} for i in range(n)]
+
+
+class _Model:
+    replies = []
+    prompts = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def invoke(self, messages, **kwargs):
+        self.prompts.append(messages[-1][1])
+        return type("R", (), {"content": self.replies.pop(0), "response_metadata": {}})()
+
+
+@pytest.fixture(autouse=True)
+def client(monkeypatch):
+    _Model.replies, _Model.prompts = [], []
+    c = DynamicLLMClient(hedge=False, client_factory=_Model)
+    c.cache.enabled = False
+    c.rate_limiter.rpm = c.rate_limiter.tpm = None
+    monkeypatch.setattr(core.llm_client, "_client", c)
+
+
+def test_truncated_completion_keeps_its_items_and_asks_only_for_the_rest():
+    first = json.dumps({"unit": "Kafka", "long": _items("long", 3), "short": _items("short", 2)})
+    cut = first.index('{"q": "long question 2?') + 12  # third long item cut off mid-object
+    _Model.replies = [
+        first[:cut],
+        json.dumps({"unit": "Kafka", "long": _items("more long", 2), "short": _items("more short", 2)}),
+    ]
+    part = _build_part("resume", "Kafka", 4, 2, [])
+
+    assert part["long"] == _items("long", 2) + _items("more long", 2)
+    assert part["short"] == _items("more short", 2)
+    assert len(_Model.prompts) == 2
+    assert "long question 1?" in _Model.prompts[1]  # already-answered questions are not asked again
+
+
+def test_repairs_stop_after_the_configured_attempts():
+    _Model.replies = [json.dumps({"unit": "Kafka", "long": [], "short": []})] * 3
+    part = _build_part("resume", "Kafka", 2, 0, [])
+    assert part == {"unit": "Kafka", "long": [], "short": []}
+    assert len(_Model.prompts) == 3  # the first call and QNA_REPAIR_ATTEMPTS follow-ups
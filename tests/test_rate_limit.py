@@ -0,0 +1,51 @@
+import threading
+import time
+
+from core.rate_limit import RateLimiter
+
+
+def _timed(fn):
+    started = time.monotonic()
+    fn()
+    return time.monotonic() - started
+
+
+def test_requests_over_rpm_wait_for_the_window():
+    limiter = RateLimiter(rpm=2, window=0.2)
+    assert _timed(lambda: [limiter.acquire() for _ in range(2)]) < 0.1
+    assert _timed(limiter.acquire) >= 0.15
+
+
+def test_oversized_request_passes_on_an_empty_window_only():
+    limiter = RateLimiter(tpm=100, window=0.2)
+    assert _timed(lambda: limiter.acquire(500)) < 0.05
+    assert _timed(lambda: limiter.acquire(10)) >= 0.15
+
+
+def test_recorded_completion_tokens_count_against_tpm():
+    limiter = RateLimiter(tpm=100, window=0.2)
+    limiter.acquire(10)
+    limiter.record(90)
+    assert _timed(lambda: limiter.acquire(10)) >= 0.15
+
+
+def test_concurrent_callers_share_one_budget():
+    limiter = RateLimiter(rpm=3, window=0.3)
+    started = []
+
+    def call():
+        limiter.acquire()
+        started.append(time.monotonic())
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(s - t0 < 0.2 for s in started) == 3
+
+
+def test_no_limits_never_blocks():
+    limiter = RateLimiter()
+    assert _timed(lambda: [limiter.acquire(10**6) for _ in range(1000)]) < 0.1
@@ -0,0 +1,51 @@
+import pytest
+
+from core.result_store import ResultStore
+
+KAFKA = {
+    "unit": "Kafka",
+    "long": [{"q": "How does Kafka keep ordering?", "a": "Per partition, by offset."}],
+    "short": [{"q": "What is a consumer group?", "a": "Consumers sharing a topic's partitions."}],
+}
+
+
+@pytest.fixture
+def results(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite3")
+    yield store
+    store.close()
+
+
+def test_put_get_round_trip_in_item_order(results):
+    results.put("Backend", "Kafka", KAFKA)
+    assert results.get("Backend", "Kafka") == KAFKA
+    assert results.units() == [("Backend", "Kafka")]
+    assert results.stats() == {"units": 1, "items": 2}
+
+
+def test_streamed_unit_is_hidden_until_put(results):
+    results.begin("Backend", "Kafka")
+    results.append("Backend", "Kafka", "long", KAFKA["long"][0])
+    assert results.get("Backend", "Kafka") is None and not results.has("Backend", "Kafka")
+    assert results.search("ordering") == []
+    results.put("Backend", "Kafka", KAFKA)
+    assert results.has("Backend", "Kafka")
+
+
+def test_regenerating_a_unit_replaces_its_items(results):
+    results.put("Backend", "Kafka", KAFKA)
+    results.begin("Backend", "Kafka")
+    results.put("Backend", "Kafka", {"unit": "Kafka", "long": [], "short": KAFKA["short"]})
+    assert results.get("Backend", "Kafka")["long"] == []
+    assert results.stats()["items"] == 1
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_search_matches_every_word(results, fts):
+    results.fts = fts
+    results.put("Backend", "Kafka", KAFKA)
+    results.put("Streaming", "Apache Kafka", {**KAFKA, "unit": "Apache Kafka"}, alias_of=["Backend", "Kafka"])
+    hits = results.search("partition offset")
+    assert {(h["topic"], h["section"]) for h in hits} == {("Backend", "long"), ("Streaming", "long")}
+    assert results.search("consumer group") and results.search("consumer zebra") == []
+    assert results.search('NEAR( AND "') == []  # user input is never parsed as FTS syntax
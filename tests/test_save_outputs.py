@@ -0,0 +1,38 @@
+from core.result_store import ResultStore
+from pipeline.save_outputs import qna_path, save_all_qna
+
+TREE = {"topics": [{"topic": "Backend", "subtopics": ["Kafka", "Python"]}]}
+
+
+def _build(resume_text, unit):
+    return {"unit": unit, "long": [{"q": f"Why {unit}?", "a": "Because."}], "short": []}
+
+
+def _stream(resume_text, unit):
+    yield "long", {"q": f"Why {unit}?", "a": "Because."}
+    yield "short", {"q": f"{unit}?", "a": "Yes."}
+
+
+def test_units_and_aliases_are_written_under_output_dir_only(tmp_path):
+    text_dir = tmp_path / "text"
+    results = ResultStore(tmp_path / "results.sqlite3")
+    saved = []
+    errors = save_all_qna(
+        TREE, "resume", _build, text_dir,
+        aliases={("Backend", "Kafka"): [("Streaming", "Apache Kafka")]},
+        on_saved=lambda t, s, path, text: saved.append((t, s)),
+        results=results,
+    )
+    assert errors == {}
+    assert sorted(saved) == [("Backend", "Kafka"), ("Backend", "Python"), ("Streaming", "Apache Kafka")]
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*.txt")) == [
+        "text/Backend/Kafka.txt", "text/Backend/Python.txt", "text/Streaming/Apache Kafka.txt",
+    ]
+    assert qna_path("Streaming", "Apache Kafka", text_dir).read_text(encoding="utf-8").startswith("Unit: Apache Kafka\n")
+    assert results.get("Streaming", "Apache Kafka")["unit"] == "Apache Kafka"
+
+
+def test_streamed_units_land_in_output_dir(tmp_path):
+    errors = save_all_qna(TREE, "resume", _build, tmp_path, stream_builder=_stream)
+    assert errors == {}
+    assert "SHORT-ANSWER:\n1. Q: Python?" in qna_path("Backend", "Python", tmp_path).read_text(encoding="utf-8")
@@ -0,0 +1,39 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from core.token_budget import count_tokens, output_budget, plan_qna, qna_output_tokens
+
+SAMPLES = sorted((Path(__file__).resolve().parent.parent / "output").rglob("*.txt"))
+
+
+def _load(path: Path) -> dict:
+    """A saved QnA text file back in the JSON shape the model returns."""
+    text = path.read_text(encoding="utf-8")
+    unit = text.splitlines()[0][len("Unit: "):]
+    long_part, _, short_part = text.partition("SHORT-ANSWER:")
+    items = re.compile(r"^\d+\. Q: (.*)\n A: (.*)$", re.M)
+    return {
+        "unit": unit,
+        "long": [{"q": q, "a": a} for q, a in items.findall(long_part)],
+        "short": [{"q": q, "a": a} for q, a in items.findall(short_part)],
+    }
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=lambda p: p.stem)
+def test_estimate_covers_real_completion(path):
+    qna = _load(path)
+    assert qna["long"] and qna["short"]
+    actual = count_tokens(json.dumps(qna, ensure_ascii=False, indent=2))
+    estimate = qna_output_tokens(len(qna["long"]), len(qna["short"]), safety=1.0)
+    assert actual <= estimate < actual * 1.5
+
+
+def test_plan_splits_only_when_the_unit_does_not_fit():
+    assert plan_qna(1000, 10, 10, ["llama-3.3-70b-versatile"]) == [(10, 10)]
+    plan = plan_qna(1000, 10, 10, ["allam-2-7b"])
+    assert len(plan) > 1
+    assert sum(lo for lo, _ in plan) == 10 and sum(sh for _, sh in plan) == 10
+    assert all(qna_output_tokens(lo, sh) <= output_budget("allam-2-7b", 1000) for lo, sh in plan)
@@ -0,0 +1,30 @@
+import io
+import wave
+
+import pytest
+
+from pipeline.tts_backends import Pyttsx3Backend
+
+
+def _wav(n_frames, rate=22050, fill=b"\x01\x00"):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(fill * n_frames)
+    return buf.getvalue()
+
+
+def test_wav_segments_join_into_one_file():
+    joined = Pyttsx3Backend().join([_wav(100), _wav(250, fill=b"\x02\x00"), _wav(50)])
+    with wave.open(io.BytesIO(joined), "rb") as w:
+        assert w.getnframes() == 400
+        assert w.getframerate() == 22050
+        frames = w.readframes(400)
+    assert frames == b"\x01\x00" * 100 + b"\x02\x00" * 250 + b"\x01\x00" * 50
+
+
+def test_wav_join_rejects_mismatched_formats():
+    with pytest.raises(ValueError):
+        Pyttsx3Backend().join([_wav(10), _wav(10, rate=16000)])
@@ -0,0 +1,42 @@
+import os
+import time
+
+import pytest
+
+from core.workspace import WorkspaceManager, WorkspaceQuotaError
+
+
+def test_workspaces_are_isolated_per_job(tmp_path):
+    manager = WorkspaceManager(tmp_path, ttl_seconds=60, quota_bytes=None)
+    a, b = manager.get("job-a"), manager.get("job-b")
+    (a.text_dir / "unit.txt").write_text("a")
+    assert not (b.text_dir / "unit.txt").exists()
+    assert a.text_dir.is_dir() and a.audio_dir.is_dir() and a.bundle_dir.is_dir()
+
+
+@pytest.mark.parametrize("job_id", ["../escape", "a/b", "", "x" * 65])
+def test_unsafe_ids_are_rejected(tmp_path, job_id):
+    with pytest.raises(ValueError):
+        WorkspaceManager(tmp_path).get(job_id)
+
+
+def test_quota_is_enforced(tmp_path):
+    ws = WorkspaceManager(tmp_path, quota_bytes=1024).get("job")
+    (ws.audio_dir / "small.mp3").write_bytes(b"\0" * 512)
+    ws.check_quota()
+    (ws.audio_dir / "big.mp3").write_bytes(b"\0" * 1024)
+    with pytest.raises(WorkspaceQuotaError):
+        ws.check_quota()
+
+
+def test_gc_removes_only_workspaces_unused_past_the_ttl(tmp_path):
+    manager = WorkspaceManager(tmp_path, ttl_seconds=3600, quota_bytes=None)
+    stale, fresh = manager.get("stale"), manager.get("fresh")
+    old = time.time() - 7200
+    os.utime(stale.root / ".last_used", (old, old))
+    assert manager.collect_garbage() == [stale.root]
+    assert not stale.root.exists() and fresh.root.exists()
+
+    fresh.touch()  # e.g. a download; resets the TTL
+    assert manager.collect_garbage(now=time.time() + 1800) == []
+    assert [p.name for p in manager.collect_garbage(now=time.time() + 7200)] == ["fresh"]
@@ -0,0 +1,46 @@
+import io
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from io_utils.zipping import COMBINED_BUNDLE, build_bundles, stream_bundle
+
+
+def _tree(tmp_path):
+    text, audio = tmp_path / "text", tmp_path / "audio"
+    (text / "Backend").mkdir(parents=True)
+    (audio / "Backend").mkdir(parents=True)
+    (text / "Backend" / "Kafka.txt").write_text("Unit: Kafka\n" * 200, encoding="utf-8")
+    (audio / "Backend" / "Kafka.mp3").write_bytes(bytes(range(256)) * 40)
+    return text, audio
+
+
+def _contents(zf):
+    return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def test_combined_bundle_holds_files_not_nested_zips(tmp_path):
+    text, audio = _tree(tmp_path)
+    paths = build_bundles(text, audio, tmp_path / "bundles")
+    with ZipFile(paths["both"]) as zf:
+        assert sorted(zf.namelist()) == ["audio/Backend/Kafka.mp3", "texts/Backend/Kafka.txt"]
+        assert zf.getinfo("audio/Backend/Kafka.mp3").compress_type == ZIP_STORED
+        assert zf.getinfo("texts/Backend/Kafka.txt").compress_type == ZIP_DEFLATED
+    with ZipFile(paths["text"]) as zf:
+        assert zf.namelist() == ["Backend/Kafka.txt"]
+
+
+def test_rendered_texts_replace_the_text_tree(tmp_path):
+    text, audio = _tree(tmp_path)
+    paths = build_bundles(text, audio, tmp_path / "bundles", texts=[("Backend/Kafka.txt", "from the store")])
+    with ZipFile(paths["text"]) as zf:
+        assert zf.read("Backend/Kafka.txt") == b"from the store"
+
+
+def test_streamed_bundle_matches_the_built_one(tmp_path):
+    text, audio = _tree(tmp_path)
+    built = build_bundles(text, audio, tmp_path / "bundles")["both"]
+    assert built.name == COMBINED_BUNDLE
+    chunks = list(stream_bundle([(text, "texts"), (audio, "audio")], block_size=1024))
+    assert len(chunks) > 2
+    with ZipFile(io.BytesIO(b"".join(chunks))) as streamed, ZipFile(built) as zf:
+        assert streamed.testzip() is None
+        assert _contents(streamed) == _contents(zf)